@@ -362,6 +362,7 @@ const QName: React.FC = () => {
       // 파일 업로드 및 처리 (예치금 차감 없이)
       const blob = await qnameApiRequest('/api/qname/process-file', {
         method: 'POST',
+        token: user.token,
         body: formData
       });
 
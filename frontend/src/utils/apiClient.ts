@@ -296,12 +296,18 @@ export const qnameApiRequest = async <T = any>(
     method = 'GET',
     headers = {},
     body,
+    token,
     timeout = 300000 // QName은 5분 타임아웃
   } = options;
 
   const url = `${baseUrl}${endpoint}`;
   const defaultHeaders: Record<string, string> = {};
 
+  // 로그인 토큰 - QName 서비스가 공정 분배 사용자를 이 토큰으로 확인 (X-User-ID는 내부 호출만 신뢰)
+  if (token && token.split('.').length === 3) {
+    defaultHeaders.Authorization = `Bearer ${token}`;
+  }
+
   // FormData인 경우 Content-Type을 설정하지 않음
   if (!(body instanceof FormData)) {
     defaultHeaders['Content-Type'] = 'application/json';
@@ -6,7 +6,6 @@ from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr, validator
 import os
-import logging
 from dotenv import load_dotenv
 import re
 from passlib.context import CryptContext
@@ -15,10 +14,10 @@ from sqlalchemy import or_
 
 from database import get_db
 from models.user import User
+from api.utils.logging import get_logger
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# 로깅 설정 (토큰 검증 등 요청마다 반복되는 로그는 DEBUG - X-Debug-Log 요청에서만 기록)
+logger = get_logger("auth")
 
 # 환경변수 로드 (안전하게)
 try:
@@ -212,7 +211,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         )
     
     # 토큰 형식 검증 강화
-    logger.info(f"토큰 검증 시작: 길이={len(token)}, 시작={token[:20]}...")
+    logger.debug("토큰 검증 시작: 길이=%d", len(token), extra={"category": "auth"})
     
     # 토큰 형식 기본 검증
     if not token or len(token.strip()) == 0:
@@ -240,9 +239,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     )
     
     try:
-        logger.info(f"JWT 디코드 시도: SECRET_KEY 길이={len(SECRET_KEY)}, ALGORITHM={ALGORITHM}")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.info(f"JWT 디코드 성공: payload={payload}")
+        logger.debug("JWT 디코드 성공: sub=%s", payload.get("sub"), extra={"category": "auth"})
         
         email: str = payload.get("sub")
         
@@ -251,7 +249,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
             
         token_data = TokenData(email=email)
-        logger.info(f"토큰 데이터 생성 완료: email={email}")
+        logger.debug("토큰 데이터 생성 완료: email=%s", email, extra={"category": "auth"})
         
     except JWTError as e:
         logger.error(f"JWT 디코드 오류 상세: {str(e)}, 토큰 길이={len(token)}, 토큰 시작={token[:30]}...")
@@ -264,7 +262,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         logger.error(f"DB에서 사용자를 찾을 수 없음: {token_data.email}")
         raise credentials_exception
         
-    logger.debug(f"사용자 인증 성공: {user.email}")
+    logger.debug("사용자 인증 성공: %s", user.email, extra={"category": "auth"})
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -1,42 +1,86 @@
 """
 로깅 설정 및 유틸리티
+- 큐 기반 비동기 로깅: 요청 스레드는 큐에 넣기만 하고 파일/콘솔 I/O는 리스너 스레드가 처리
+- JSON 구조화 레코드, 카테고리별 샘플링/초당 제한 (LOG_SAMPLING, LOG_RATE_LIMIT)
+- X-Debug-Log 헤더(LOG_DEBUG_TOKEN과 일치할 때)로 요청 단위 DEBUG 로그 활성화
+- 포맷터/필터/큐 핸들러는 공용 패키지 log_core (services/shared/log_core, qname-service와 공용)
 """
 import logging
+import logging.handlers
 import os
+import queue
+import atexit
+import threading
 from datetime import datetime
 from pathlib import Path
 
+from log_core import (
+    DEBUG_HEADER, REQUEST_DEBUG, JsonFormatter, SamplingFilter, DroppingQueueHandler,
+    parse_category_config, debug_requested
+)
+
+_listener = None
+_setup_lock = threading.Lock()
+
 def setup_logging():
     """로깅 시스템을 설정합니다"""
-    
-    # 로그 디렉토리 생성
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
-    # 로그 레벨 설정
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-    
-    # 로거 설정
-    logging.basicConfig(
-        level=getattr(logging, log_level),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            # 콘솔 출력
-            logging.StreamHandler(),
-            # 파일 출력
-            logging.FileHandler(
-                log_dir / f"qclick_{datetime.now().strftime('%Y%m%d')}.log",
+    global _listener
+
+    with _setup_lock:
+        if _listener is None:
+            # 로그 디렉토리 생성
+            log_dir = Path("logs")
+            log_dir.mkdir(exist_ok=True)
+
+            # 로그 레벨 설정
+            log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+            base_level = getattr(logging, log_level, logging.INFO)
+
+            formatter = JsonFormatter()
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            file_handler = logging.FileHandler(
+                os.getenv("LOG_FILE") or log_dir / f"qclick_{datetime.now().strftime('%Y%m%d')}.log",
                 encoding='utf-8'
             )
-        ]
-    )
-    
-    # 특정 라이브러리 로그 레벨 조정
-    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
-    
+            file_handler.setFormatter(formatter)
+
+            log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+            queue_handler = DroppingQueueHandler(log_queue)
+            queue_handler.addFilter(SamplingFilter(
+                base_level,
+                parse_category_config(os.getenv("LOG_SAMPLING", "")),
+                parse_category_config(os.getenv("LOG_RATE_LIMIT", ""))
+            ))
+
+            # 기존 동기 핸들러(basicConfig 등)를 큐 핸들러로 교체
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(queue_handler)
+            root.setLevel(base_level)
+
+            # 애플리케이션 로거는 DEBUG 레코드를 만들고, 통과 여부는 필터가 결정
+            logging.getLogger("qclick").setLevel(logging.DEBUG)
+
+            _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler)
+            _listener.start()
+            atexit.register(_listener.stop)
+
+            # 특정 라이브러리 로그 레벨 조정
+            logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+            logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
     return logging.getLogger("qclick")
 
+async def request_log_context(request, call_next):
+    """X-Debug-Log 헤더가 LOG_DEBUG_TOKEN과 일치하는 요청에서만 DEBUG 로그를 활성화하는 HTTP 미들웨어"""
+    token = REQUEST_DEBUG.set(debug_requested(request.headers))
+    try:
+        return await call_next(request)
+    finally:
+        REQUEST_DEBUG.reset(token)
+
 def get_logger(name: str = None):
     """모듈별 로거를 가져옵니다"""
     if name:
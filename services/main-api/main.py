@@ -121,6 +121,13 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# 요청 단위 DEBUG 로그 (X-Debug-Log 헤더)
+try:
+    from api.utils.logging import request_log_context
+    app.middleware("http")(request_log_context)
+except ImportError:
+    pass
+
 # 프로덕션 보안 설정 적용
 try:
     setup_production_security(app)
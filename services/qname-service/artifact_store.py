@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+QName 결과 파일(아티팩트) 저장소
+- 내용 해시 기반 경로로 동시 작업 간 파일 덮어쓰기 방지
+- 임시 파일 작성 후 os.replace로 원자적 저장
+- 용량/보관기간 기준 백그라운드 정리 (작업이 쓰고 있는 임시 파일은 제외)
+- 아티팩트 ID로 다운로드
+"""
+
+import os
+import re
+import time
+import uuid
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Optional, Set
+
+from io_executor import run_io
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """파일 내용의 SHA-256 (청크 단위로 읽어 메모리 사용 일정)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """내용 주소 기반 결과 파일 저장소"""
+
+    def __init__(self, root: str = None, max_bytes: int = None, max_age_seconds: float = None,
+                 temp_max_age_seconds: float = 3600):
+        self.root = root or os.getenv("QNAME_ARTIFACT_DIR", os.path.join(SCRIPT_DIR, 'artifacts'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(
+            os.getenv("QNAME_ARTIFACT_MAX_BYTES", str(1024 * 1024 * 1024)))
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else float(
+            os.getenv("QNAME_ARTIFACT_MAX_AGE_HOURS", "24")) * 3600
+        self.temp_max_age_seconds = temp_max_age_seconds
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        # new_temp_path로 만든 뒤 아직 put_file/discard_temp 되지 않은 임시 파일 (정리 대상에서 제외)
+        # 한 시간 넘게 걸리는 작업도 업로드 원본을 끝까지 다시 읽을 수 있어야 함
+        self._active_temp: Set[str] = set()
+        self._active_lock = threading.Lock()
+
+    def new_temp_path(self, suffix: str = '.xlsx', prefix: str = 'job_') -> str:
+        """저장소 임시 디렉토리에 충돌 없는 파일 경로 생성 (업로드/작업 중간 파일용)
+        반환된 경로는 put_file로 등록하거나 discard_temp로 지울 때까지 정리되지 않습니다."""
+        fd, path = tempfile.mkstemp(prefix=f"{prefix}{uuid.uuid4().hex[:8]}_", suffix=suffix, dir=self.tmp_dir)
+        os.close(fd)
+        with self._active_lock:
+            self._active_temp.add(os.path.abspath(path))
+        return path
+
+    def discard_temp(self, path: str) -> bool:
+        """임시 파일 사용 종료 - 파일이 있으면 삭제하고 True"""
+        self._release_temp(path)
+        return self._remove(path) == 1
+
+    def _release_temp(self, path: str):
+        with self._active_lock:
+            self._active_temp.discard(os.path.abspath(path))
+
+    def put_file(self, src_path: str, suffix: str = None, sha256: str = None) -> str:
+        """파일을 저장소로 이동하고 아티팩트 ID 반환 (원본 파일은 이동/삭제됨)"""
+        suffix = suffix if suffix is not None else os.path.splitext(src_path)[1]
+        digest = sha256 or file_sha256(src_path)
+        artifact_id = digest[:32]
+        dest_dir = os.path.join(self.objects_dir, artifact_id[:2])
+        dest_path = os.path.join(dest_dir, f"{artifact_id}{suffix}")
+        os.makedirs(dest_dir, exist_ok=True)
+
+        if os.path.exists(dest_path):
+            # 동일 내용이 이미 있으면 보관기간만 갱신
+            os.utime(dest_path)
+            os.remove(src_path)
+            self._release_temp(src_path)
+            return artifact_id
+
+        if os.path.dirname(os.path.abspath(src_path)) != os.path.abspath(self.tmp_dir):
+            # 다른 파일시스템일 수 있으므로 임시 디렉토리로 복사 후 교체
+            staged_path = self.new_temp_path(suffix=suffix, prefix='stage_')
+            shutil.copyfile(src_path, staged_path)
+            os.remove(src_path)
+            self._release_temp(src_path)
+            src_path = staged_path
+        os.replace(src_path, dest_path)
+        self._release_temp(src_path)
+        return artifact_id
+
+    def path_for(self, artifact_id: str) -> Optional[str]:
+        """아티팩트 ID에 해당하는 파일 경로 (없으면 None)"""
+        if not artifact_id or not ARTIFACT_ID_PATTERN.match(artifact_id):
+            return None
+        dest_dir = os.path.join(self.objects_dir, artifact_id[:2])
+        if not os.path.isdir(dest_dir):
+            return None
+        for name in os.listdir(dest_dir):
+            if name.startswith(artifact_id):
+                return os.path.join(dest_dir, name)
+        return None
+
+    def evict(self) -> dict:
+        """보관기간 초과 파일 삭제 후, 총 용량이 한도를 넘으면 오래된 순으로 삭제"""
+        now = time.time()
+        removed = 0
+        entries = []
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    removed += self._remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total_bytes -= size
+
+        # 비정상 종료 등으로 남은 임시 파일 정리 (진행 중인 작업의 파일은 오래돼도 유지)
+        with self._active_lock:
+            active = set(self._active_temp)
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            if os.path.abspath(path) in active:
+                continue
+            try:
+                if now - os.path.getmtime(path) > self.temp_max_age_seconds:
+                    removed += self._remove(path)
+            except FileNotFoundError:
+                continue
+
+        if removed:
+            logger.info(f"아티팩트 정리: {removed}개 삭제, 현재 {total_bytes} bytes")
+        return {'removed': removed, 'total_bytes': total_bytes}
+
+    def _remove(self, path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"아티팩트 삭제 실패: {path}, 오류: {e}")
+            return 0
+
+    async def run_eviction_loop(self, interval_seconds: float = 300):
+        """백그라운드 정리 루프 (요청 처리 경로와 분리)"""
+        while True:
+            try:
+                await run_io(self.evict)
+            except Exception as e:
+                logger.error(f"아티팩트 정리 오류: {str(e)}")
+            await asyncio.sleep(interval_seconds)
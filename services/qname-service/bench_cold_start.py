@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+QName 서비스 콜드 스타트 벤치마크
+매 측정마다 새 파이썬 프로세스에서
+  - import: main 모듈 임포트 (헬스체크 응답 가능 시점)
+  - ready:  공용 프로세서 생성 (카테고리 인덱스 로드 완료 시점)
+까지의 시간을 재고, 중앙값이 예산을 넘으면 종료 코드 1로 실패합니다.
+
+사용 예:
+    python build_category_index.py && python bench_cold_start.py --runs 5
+    python bench_cold_start.py --import-budget-ms 1200 --ready-budget-ms 2500
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 자식 프로세스에서 실행되는 측정 코드 (결과는 stdout 마지막 줄의 JSON)
+CHILD_CODE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.get_processor()
+ready = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'ready_ms': (ready - started) * 1000}))
+"""
+
+
+def measure_once() -> dict:
+    """새 프로세스에서 한 번 측정"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    completed = subprocess.run(
+        [sys.executable, '-c', CHILD_CODE],
+        cwd=SCRIPT_DIR, env=env, capture_output=True, text=True, timeout=120
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"측정 프로세스 실패:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QName 콜드 스타트 벤치마크")
+    parser.add_argument('--runs', type=int, default=5, help="측정 횟수 (중앙값 사용)")
+    parser.add_argument('--import-budget-ms', type=float,
+                        default=float(os.getenv("QNAME_COLD_START_IMPORT_BUDGET_MS", "1500")),
+                        help="main 임포트 시간 예산 (ms)")
+    parser.add_argument('--ready-budget-ms', type=float,
+                        default=float(os.getenv("QNAME_COLD_START_READY_BUDGET_MS", "3000")),
+                        help="프로세서 준비 완료 시간 예산 (ms)")
+    args = parser.parse_args()
+
+    # 첫 실행은 .pyc/디스크 캐시 워밍용으로 버림
+    measure_once()
+    samples = [measure_once() for _ in range(args.runs)]
+
+    import_ms = statistics.median(sample['import_ms'] for sample in samples)
+    ready_ms = statistics.median(sample['ready_ms'] for sample in samples)
+
+    print("=== 콜드 스타트 (중앙값, %d회) ===" % args.runs)
+    print(f"main 임포트:     {import_ms:8.1f} ms (예산 {args.import_budget_ms:.0f} ms)")
+    print(f"프로세서 준비:   {ready_ms:8.1f} ms (예산 {args.ready_budget_ms:.0f} ms)")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"main 임포트 {import_ms:.0f}ms > {args.import_budget_ms:.0f}ms")
+    if ready_ms > args.ready_budget_ms:
+        failures.append(f"프로세서 준비 {ready_ms:.0f}ms > {args.ready_budget_ms:.0f}ms")
+
+    if failures:
+        print("❌ 콜드 스타트 예산 초과: " + ", ".join(failures))
+        sys.exit(1)
+    print("✅ 콜드 스타트 예산 이내")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+QName 골든 파일 회귀 벤치마크 (출력 품질 + 처리 속도)
+저장소의 예제 워크북(test_realdata.xlsx, 테스트용엑셀파일.xlsx)을 프로세서로 처리하되,
+네이버/Gemini 호출은 녹화해 둔 응답(benchmarks/cassettes)으로 재생하고
+결과를 골든 파일(benchmarks/golden)과 비교합니다.
+
+- 행별 출력(카테고리 코드/형식, 상품명, 연관검색어, 상태)이 골든과 다르면 실패
+- 품질 지표: 상품명 길이(25~35자) 준수율, 중복 태그 수, 카테고리 정확 매칭률,
+  연관검색어에 없는 네이버태그 수 - 골든보다 나빠지면 실패
+- 처리 시간과 업스트림 호출 수를 골든과 함께 출력 (호출 수가 늘면 경고)
+
+예제 워크북 2개의 녹화본/골든은 API 키 없이 --record로 만든 것이고 (업스트림 호출 없이 기본 생성기 출력을
+고정 시드로 녹화), benchmarks/workbooks/llm_sample.xlsx 녹화본에는 네이버/Gemini 응답이 들어 있어
+골든이 LLM 경로(prefix → 상품명 → 태그, 빈 검색 결과, 429 대체값)까지 덮습니다.
+모두 CI에서 키 없이 재생됩니다 (tests/test_benchmark_golden.py). 실제 API 녹화는 키를 설정하고 다시 --record.
+녹화본을 저장할 때 설정된 API 키/시크릿과 Google API 키 형태의 문자열은 지웁니다.
+
+처리량 최적화는 이 벤치마크를 통과할 때만(출력이 조용히 나빠지지 않을 때만) 반영합니다.
+재생 시 업스트림 지연은 녹화된 지연 × --latency-scale 만큼 흉내 냅니다.
+
+사용 예:
+    python benchmark_golden.py --record          # 실제 API로 응답 녹화 후 골든 생성 (API 키 필요)
+    python benchmark_golden.py                   # 녹화본으로 재생해 골든과 비교
+    python benchmark_golden.py --latency-scale 0 # 업스트림 지연 없이 출력만 빠르게 검증
+    python benchmark_golden.py --metrics-only    # 행별 차이는 보고만 하고 품질 지표로만 판정
+    python benchmark_golden.py --update-golden   # 의도한 출력 변경 후 골든 갱신
+"""
+
+import os
+import sys
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_DIR = os.path.join(SCRIPT_DIR, 'benchmarks')
+CASSETTE_DIR = os.path.join(BENCHMARK_DIR, 'cassettes')
+GOLDEN_DIR = os.path.join(BENCHMARK_DIR, 'golden')
+
+WORKBOOKS = ['test_realdata.xlsx', '테스트용엑셀파일.xlsx', os.path.join('benchmarks', 'workbooks', 'llm_sample.xlsx')]
+
+# 골든과 행 단위로 비교하는 결과 필드 (naver_tags는 무작위 추출이라 지표로만 확인)
+COMPARED_FIELDS = ('naver_code', 'category_format', 'product_name', 'related_keywords', 'status')
+
+NAME_MIN_LEN = 25
+NAME_MAX_LEN = 35
+
+# 높을수록 좋은 지표 / 낮을수록 좋은 지표
+HIGHER_IS_BETTER = ('name_length_compliance', 'category_match_rate')
+LOWER_IS_BETTER = ('duplicate_tags', 'tags_outside_related')
+
+# naver_tags 추출(random.sample) 등 재생 결과를 고정하기 위한 시드
+BENCHMARK_SEED = 20250705
+
+# 녹화본에 남기지 않을 값 (설정된 키/시크릿 외에 오류 메시지 등에 섞인 Google API 키)
+GOOGLE_API_KEY_PATTERN = re.compile(r'AIza[0-9A-Za-z_\-]{35}')
+REDACTED = '<redacted>'
+
+
+def scrub_secrets(value, secrets: Iterable[str]):
+    """녹화 데이터(중첩 dict/list/str)에서 키/시크릿 문자열을 REDACTED로 치환"""
+    secrets = sorted({secret for secret in secrets if secret and len(secret) >= 4}, key=len, reverse=True)
+
+    def scrub(item):
+        if isinstance(item, str):
+            for secret in secrets:
+                item = item.replace(secret, REDACTED)
+            return GOOGLE_API_KEY_PATTERN.sub(REDACTED, item)
+        if isinstance(item, dict):
+            return {key: scrub(child) for key, child in item.items()}
+        if isinstance(item, list):
+            return [scrub(child) for child in item]
+        return item
+
+    return scrub(value)
+
+
+class ReplayMiss(Exception):
+    """녹화본에 없는 업스트림 호출 (프롬프트/키워드가 바뀌었거나 녹화가 오래됨)"""
+
+
+class UpstreamStats:
+    """업스트림 호출 횟수 (Gemini 호출은 스레드에서 일어나므로 잠금 사용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.naver = 0
+        self.gemini = 0
+        self.replay_misses = 0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self) -> dict:
+        return {'naver': self.naver, 'gemini': self.gemini, 'replay_misses': self.replay_misses}
+
+
+class Cassette:
+    """업스트림 응답 녹화본 - 네이버는 키워드별, Gemini는 프롬프트 해시별"""
+
+    def __init__(self, path: str, data: dict = None):
+        self.path = path
+        data = data or {}
+        self.naver_enabled = data.get('naver_enabled', False)
+        self.gemini_enabled = data.get('gemini_enabled', False)
+        self.naver: Dict[str, dict] = data.get('naver', {})
+        self.gemini: Dict[str, dict] = data.get('gemini', {})
+        # 녹화 중 사용한 API 키/시크릿 (저장 시 지움)
+        self.secrets = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> Optional['Cassette']:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(path, json.load(f))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'naver_enabled': self.naver_enabled,
+            'gemini_enabled': self.gemini_enabled,
+            'naver': scrub_secrets(self.naver, self.secrets),
+            'gemini': scrub_secrets(self.gemini, self.secrets)
+        }
+        _write_json(self.path, data)
+
+    def record_naver(self, keyword: str, entry: dict):
+        with self._lock:
+            self.naver[keyword] = entry
+
+    def record_gemini(self, prompt: str, entry: dict):
+        from canonical import stable_hash
+        with self._lock:
+            self.gemini[stable_hash(prompt)] = entry
+
+    def naver_entry(self, keyword: str) -> dict:
+        entry = self.naver.get(keyword)
+        if entry is None:
+            raise ReplayMiss(f"네이버 응답 녹화 없음: {keyword}")
+        return entry
+
+    def gemini_entry(self, prompt: str) -> dict:
+        from canonical import stable_hash
+        entry = self.gemini.get(stable_hash(prompt))
+        if entry is None:
+            raise ReplayMiss(f"Gemini 응답 녹화 없음: {prompt.strip()[:40]}...")
+        return entry
+
+
+class _GeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class RecordingGeminiModel:
+    """실제 Gemini 모델 호출을 녹화본에 기록"""
+
+    def __init__(self, model, cassette: Cassette, stats: UpstreamStats):
+        self.model = model
+        self.cassette = cassette
+        self.stats = stats
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.stats.count('gemini')
+        started = time.perf_counter()
+        try:
+            response = self.model.generate_content(prompt, **kwargs)
+            text = response.text
+        except Exception as e:
+            self.cassette.record_gemini(prompt, {'error': str(e), 'latency': time.perf_counter() - started})
+            raise
+        self.cassette.record_gemini(prompt, {'text': text, 'latency': time.perf_counter() - started})
+        return _GeminiResponse(text)
+
+
+class ReplayGeminiModel:
+    """녹화된 Gemini 응답 재생 (녹화된 지연 × latency_scale 만큼 대기)"""
+
+    def __init__(self, cassette: Cassette, stats: UpstreamStats, latency_scale: float):
+        self.cassette = cassette
+        self.stats = stats
+        self.latency_scale = latency_scale
+
+    def generate_content(self, prompt: str, **kwargs):
+        self.stats.count('gemini')
+        try:
+            entry = self.cassette.gemini_entry(prompt)
+        except ReplayMiss:
+            self.stats.count('replay_misses')
+            raise
+        if self.latency_scale:
+            time.sleep(entry.get('latency', 0) * self.latency_scale)
+        if 'error' in entry:
+            raise RuntimeError(entry['error'])
+        return _GeminiResponse(entry['text'])
+
+
+def create_benchmark_processor(cassette: Cassette, stats: UpstreamStats, record: bool = False,
+                               latency_scale: float = 1.0, tag_model_dir: str = None):
+    """업스트림 경계(_request_naver, model)를 녹화/재생으로 바꾼 프로세서 생성"""
+    from processor import OptimizedQNameProcessor
+    from tag_model import LocalTagModel
+    from keyword_history import KeywordHistory
+
+    class BenchmarkProcessor(OptimizedQNameProcessor):
+        def __init__(self):
+            super().__init__()
+            # 로컬 태그 모델은 실행마다 비어 있는 상태에서 시작 (data/tag_model.json에 따라 결과가 달라지지 않도록)
+            state_dir = tag_model_dir or tempfile.mkdtemp()
+            self.tag_model = LocalTagModel(os.path.join(state_dir, 'tag_model.json'))
+            self.keyword_history = KeywordHistory(os.path.join(state_dir, 'keyword_history.json'))
+            if record:
+                for pool in (self.gemini_credentials, self.naver_credentials):
+                    for credential in pool.credentials:
+                        cassette.secrets.update(value for value in (credential.key, credential.secret) if value)
+                real_model = super().model
+                cassette.naver_enabled = super().naver_configured
+                cassette.gemini_enabled = real_model is not None
+                self._benchmark_model = RecordingGeminiModel(real_model, cassette, stats) if real_model else None
+            else:
+                self._benchmark_model = (ReplayGeminiModel(cassette, stats, latency_scale)
+                                         if cassette.gemini_enabled else None)
+
+        @property
+        def model(self):
+            return self._benchmark_model
+
+        @property
+        def naver_configured(self) -> bool:
+            return cassette.naver_enabled
+
+        async def _request_naver(self, session, keyword: str) -> Tuple[int, Optional[dict]]:
+            stats.count('naver')
+            if record:
+                started = time.perf_counter()
+                try:
+                    status, payload = await super()._request_naver(session, keyword)
+                except Exception as e:
+                    cassette.record_naver(keyword, {'error': str(e), 'latency': time.perf_counter() - started})
+                    raise
+                cassette.record_naver(keyword, {'status': status, 'payload': payload,
+                                                'latency': time.perf_counter() - started})
+                return status, payload
+
+            try:
+                entry = cassette.naver_entry(keyword)
+            except ReplayMiss:
+                stats.count('replay_misses')
+                raise
+            if latency_scale:
+                await asyncio.sleep(entry.get('latency', 0) * latency_scale)
+            if 'error' in entry:
+                raise RuntimeError(entry['error'])
+            return entry['status'], entry['payload']
+
+    return BenchmarkProcessor()
+
+
+def load_keywords(path: str) -> List[str]:
+    """워크북의 '메인키워드' 열 읽기 - 서비스와 같은 read_keyword_column (빈 셀은 '')
+    test_realdata.xlsx는 확장자만 xlsx인 CSV이므로 CSV로 읽되 빈 셀 처리는 같게 맞춤"""
+    import csv
+    import zipfile
+    from row_results import KEYWORD_COLUMN, read_keyword_column
+    if zipfile.is_zipfile(path):
+        return read_keyword_column(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = csv.reader(f)
+        header = next(rows, [])
+        if KEYWORD_COLUMN not in header:
+            raise ValueError(f"'{KEYWORD_COLUMN}' 컬럼이 없습니다: {path}")
+        position = header.index(KEYWORD_COLUMN)
+        return [row[position] if position < len(row) else '' for row in rows]
+
+
+def _split_tags(value: str) -> List[str]:
+    return [tag.strip() for tag in (value or '').split(',') if tag.strip()]
+
+
+def compute_metrics(results: List[Dict]) -> dict:
+    """출력 품질 지표"""
+    completed = [result for result in results if result.get('status') == '완료']
+    named = [result for result in completed if result.get('product_name')]
+    compliant = sum(1 for result in named if NAME_MIN_LEN <= len(result['product_name']) <= NAME_MAX_LEN)
+    matched = sum(1 for result in completed if not result.get('category_format', '').startswith('X'))
+
+    duplicate_tags = 0
+    tags_outside_related = 0
+    for result in completed:
+        tags = _split_tags(result.get('related_keywords'))
+        folded = [tag.casefold() for tag in tags]
+        duplicate_tags += len(folded) - len(set(folded))
+        related = set(folded)
+        tags_outside_related += sum(1 for tag in _split_tags(result.get('naver_tags'))
+                                    if tag.casefold() not in related)
+
+    return {
+        'rows': len(results),
+        'completed': len(completed),
+        'name_length_compliance': round(compliant / len(named), 4) if named else 0.0,
+        'category_match_rate': round(matched / len(completed), 4) if completed else 0.0,
+        'duplicate_tags': duplicate_tags,
+        'tags_outside_related': tags_outside_related
+    }
+
+
+async def run_workbook(processor, keywords: List[str]) -> Tuple[List[Dict], float]:
+    """프로세서로 키워드 처리 (파일 입출력 제외), (결과, 소요 초)"""
+    random.seed(BENCHMARK_SEED)
+    batch_size = processor.calculate_optimal_batch_size(len(keywords))
+    started = time.perf_counter()
+    results = await processor.process_keywords_async(keywords, batch_size)
+    return results, time.perf_counter() - started
+
+
+def benchmark_workbook(workbook: str, cassette: Cassette, record: bool, latency_scale: float) -> dict:
+    """워크북 1개 실행 결과 (골든 파일 형식)"""
+    stats = UpstreamStats()
+    with tempfile.TemporaryDirectory() as tag_model_dir:
+        processor = create_benchmark_processor(cassette, stats, record=record, latency_scale=latency_scale,
+                                               tag_model_dir=tag_model_dir)
+        keywords = load_keywords(os.path.join(SCRIPT_DIR, workbook))
+        results, elapsed = asyncio.run(run_workbook(processor, keywords))
+
+    return {
+        'workbook': workbook,
+        'category_index_version': processor.category_mapper.snapshot().version,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(len(results) / elapsed, 2) if elapsed else 0.0,
+        'latency_scale': latency_scale,
+        'upstream': stats.as_dict(),
+        'metrics': compute_metrics(results),
+        'results': [
+            dict({'keyword': result.get('keyword', '')}, **{field: result.get(field, '') for field in COMPARED_FIELDS},
+                 naver_tags=result.get('naver_tags', ''))
+            for result in results
+        ]
+    }
+
+
+def compare_with_golden(golden: dict, run: dict, metrics_only: bool = False) -> Tuple[List[str], List[str]]:
+    """골든과 비교해 (실패 목록, 경고 목록) 반환"""
+    failures, warnings = [], []
+
+    if run['upstream']['replay_misses']:
+        failures.append(f"녹화되지 않은 업스트림 호출 {run['upstream']['replay_misses']}회 (--record로 다시 녹화)")
+    if golden.get('category_index_version') != run['category_index_version']:
+        warnings.append(f"카테고리 인덱스 버전 다름: 골든 {golden.get('category_index_version')} / "
+                        f"현재 {run['category_index_version']}")
+
+    golden_rows, run_rows = golden['results'], run['results']
+    if len(golden_rows) != len(run_rows):
+        failures.append(f"행 수 불일치: 골든 {len(golden_rows)} / 현재 {len(run_rows)}")
+    else:
+        diffs = []
+        for index, (expected, actual) in enumerate(zip(golden_rows, run_rows)):
+            for field in COMPARED_FIELDS:
+                if expected.get(field) != actual.get(field):
+                    diffs.append(f"{index + 1}행 {field}: {expected.get(field)!r} → {actual.get(field)!r}")
+        if diffs:
+            message = f"골든과 다른 출력 {len(diffs)}건:\n      " + "\n      ".join(diffs[:5])
+            if len(diffs) > 5:
+                message += f"\n      ... 외 {len(diffs) - 5}건"
+            (warnings if metrics_only else failures).append(message)
+
+    for name in HIGHER_IS_BETTER:
+        if run['metrics'][name] < golden['metrics'][name]:
+            failures.append(f"품질 저하 {name}: {golden['metrics'][name]} → {run['metrics'][name]}")
+    for name in LOWER_IS_BETTER:
+        if run['metrics'][name] > golden['metrics'][name]:
+            failures.append(f"품질 저하 {name}: {golden['metrics'][name]} → {run['metrics'][name]}")
+
+    for name in ('naver', 'gemini'):
+        if run['upstream'][name] > golden['upstream'][name]:
+            warnings.append(f"{name} 호출 증가: {golden['upstream'][name]} → {run['upstream'][name]}")
+    return failures, warnings
+
+
+def print_report(run: dict, golden: Optional[dict]):
+    metrics, upstream = run['metrics'], run['upstream']
+    print(f"=== {run['workbook']} ({metrics['rows']}행) ===")
+    golden_elapsed = f", 골든 {golden['elapsed_seconds']:.2f}초" if golden else ""
+    print(f"처리 시간:          {run['elapsed_seconds']:.2f}초 ({run['rows_per_second']:.1f}행/초{golden_elapsed})")
+    golden_calls = f" (골든 {golden['upstream']['naver']}/{golden['upstream']['gemini']})" if golden else ""
+    print(f"업스트림 호출:      네이버 {upstream['naver']}회, Gemini {upstream['gemini']}회{golden_calls}")
+    print(f"상품명 길이 준수:   {metrics['name_length_compliance'] * 100:.1f}% ({NAME_MIN_LEN}~{NAME_MAX_LEN}자)")
+    print(f"카테고리 정확 매칭: {metrics['category_match_rate'] * 100:.1f}%")
+    print(f"중복 태그:          {metrics['duplicate_tags']}개")
+    print(f"연관검색어 밖 태그: {metrics['tags_outside_related']}개")
+
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def _load_json(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QName 골든 파일 회귀 벤치마크")
+    parser.add_argument('workbooks', nargs='*', default=WORKBOOKS, help="대상 워크북 (기본: 저장소 예제 2개)")
+    parser.add_argument('--record', action='store_true', help="실제 API 응답을 녹화하고 골든 갱신 (API 키 필요)")
+    parser.add_argument('--update-golden', action='store_true', help="녹화본 재생 결과로 골든 갱신")
+    parser.add_argument('--metrics-only', action='store_true', help="행별 출력 차이는 경고로만 보고")
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="재생 시 녹화된 업스트림 지연 배율")
+    args = parser.parse_args()
+
+    failed = False
+    for workbook in args.workbooks:
+        stem = os.path.splitext(os.path.basename(workbook))[0]
+        cassette_path = os.path.join(CASSETTE_DIR, f"{stem}.json")
+        golden_path = os.path.join(GOLDEN_DIR, f"{stem}.json")
+
+        if args.record:
+            cassette = Cassette(cassette_path)
+            benchmark_workbook(workbook, cassette, record=True, latency_scale=1.0)
+            cassette.save()
+            print(f"녹화 완료: {cassette_path} (네이버 {len(cassette.naver)}건, Gemini {len(cassette.gemini)}건)")
+        else:
+            cassette = Cassette.load(cassette_path)
+            if cassette is None:
+                print(f"❌ 녹화본 없음: {cassette_path} (먼저 --record로 녹화하세요)")
+                failed = True
+                continue
+
+        # 골든은 항상 녹화본 재생 결과로 만듦 (재생과 녹화 실행의 미세한 차이가 골든에 섞이지 않도록)
+        run = benchmark_workbook(workbook, cassette, record=False, latency_scale=args.latency_scale)
+        golden = None if (args.record or args.update_golden) else _load_json(golden_path)
+        print_report(run, golden)
+
+        if args.record or args.update_golden:
+            if run['upstream']['replay_misses']:
+                print(f"❌ 재생 중 녹화 누락 {run['upstream']['replay_misses']}회 - 골든을 갱신하지 않습니다.")
+                failed = True
+                continue
+            run['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            _write_json(golden_path, run)
+            print(f"골든 갱신: {golden_path}")
+            continue
+
+        if golden is None:
+            print(f"❌ 골든 파일 없음: {golden_path} (--update-golden으로 생성)")
+            failed = True
+            continue
+
+        failures, warnings = compare_with_golden(golden, run, metrics_only=args.metrics_only)
+        for warning in warnings:
+            print(f"⚠️  {warning}")
+        for failure in failures:
+            print(f"❌ {failure}")
+        if failures:
+            failed = True
+        else:
+            print("✅ 골든과 일치")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
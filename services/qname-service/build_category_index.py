@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+카테고리 인덱스 빌드 스크립트 (배포 빌드 단계용)
+data/naver.xlsx를 읽어 카테고리 테이블(data/category_table_<해시>.bin)을 미리 만들어 두면,
+서비스 시작 시 엑셀 파싱/벡터화 없이 테이블 파일을 mmap으로 열기만 합니다.
+테이블에는 naver.xlsx 해시가 기록되어, 원본이 바뀌면 다음 빌드(또는 런타임)에서 다시 생성됩니다.
+
+사용 예:
+    python build_category_index.py          # 원본과 일치하면 건너뜀
+    python build_category_index.py --force  # 항상 다시 생성
+"""
+
+import sys
+import time
+import argparse
+
+from processor import CategoryMapper
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QName 카테고리 인덱스 빌드")
+    parser.add_argument('--force', action='store_true', help="기존 인덱스가 최신이어도 다시 생성")
+    args = parser.parse_args()
+
+    mapper = CategoryMapper()
+    started = time.time()
+    if not mapper.load_or_build(force=args.force):
+        print(f"카테고리 인덱스 생성 실패: {mapper.source_file}")
+        sys.exit(1)
+
+    index = mapper.snapshot()
+    print(f"카테고리 인덱스 준비 완료: {index.table.path} "
+          f"({len(index.category_map)}개, 버전 {index.version}, 유사도 색인 {'사용' if index.has_vectors else '미사용'}, "
+          f"{time.time() - started:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
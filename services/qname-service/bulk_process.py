@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+대량 엑셀 일괄 처리 CLI (HTTP 서비스를 거치지 않는 야간 카탈로그 갱신용)
+디렉토리 또는 glob 패턴의 입력 파일들을 하나의 프로세서(공용 캐시/레이트 리미터)로
+동시에 처리하고, 결과 파일을 원자적으로 저장한 뒤 처리량 요약을 출력합니다.
+
+사용 예:
+    python bulk_process.py ./input_dir "./more/*.xlsx" --output-dir ./bulk_output --concurrency 3
+"""
+
+import os
+import sys
+import glob
+import time
+import asyncio
+import argparse
+from typing import List
+
+from processor import OptimizedQNameProcessor, check_api_keys, logger
+from rate_limiter import AsyncRateLimiter
+
+
+def collect_input_files(inputs: List[str]) -> List[str]:
+    """디렉토리/glob 패턴에서 처리할 엑셀 파일 목록 수집 (중복 제거, 정렬)"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = glob.glob(os.path.join(item, '*.xlsx')) + glob.glob(os.path.join(item, '*.xls'))
+        else:
+            candidates = glob.glob(item)
+        for path in candidates:
+            name = os.path.basename(path)
+            # 엑셀 잠금 파일(~$)과 임시 파일 제외
+            if name.startswith('~$') or name.startswith('.tmp_'):
+                continue
+            path = os.path.abspath(path)
+            if path not in files:
+                files.append(path)
+    return sorted(files)
+
+
+def output_path_for(input_path: str, output_dir: str) -> str:
+    """입력 파일에 대응하는 결과 파일 경로"""
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"가공완료_{stem}.xlsx")
+
+
+async def run_bulk(files: List[str], output_dir: str, concurrency: int, max_concurrent: int,
+                   naver_rps: float, gemini_rps: float, skip_existing: bool, time_budget: float = None) -> dict:
+    """공용 프로세서로 여러 파일을 동시 처리"""
+    processor = OptimizedQNameProcessor(
+        max_concurrent=max_concurrent,
+        naver_rate_limiter=AsyncRateLimiter(naver_rps),
+        gemini_rate_limiter=AsyncRateLimiter(gemini_rps)
+    )
+    file_semaphore = asyncio.Semaphore(concurrency)
+    summary = {'files_ok': 0, 'files_failed': 0, 'files_skipped': 0, 'rows': 0, 'rows_success': 0, 'rows_degraded': 0}
+
+    async def process_one(index: int, input_path: str):
+        output_path = output_path_for(input_path, output_dir)
+        if skip_existing and os.path.exists(output_path):
+            logger.info(f"[{index}/{len(files)}] 건너뜀 (결과 존재): {input_path}")
+            summary['files_skipped'] += 1
+            return
+        async with file_semaphore:
+            started = time.time()
+            result = await processor.process_excel_file(input_path, output_path=output_path, time_budget=time_budget)
+            elapsed = time.time() - started
+            if result['success']:
+                summary['files_ok'] += 1
+                summary['rows'] += result['total_processed']
+                summary['rows_success'] += result['success_count']
+                summary['rows_degraded'] += result['degraded_count']
+                logger.info(
+                    f"[{index}/{len(files)}] 완료: {input_path} → {output_path} "
+                    f"({result['total_processed']}행, {elapsed:.1f}초)"
+                )
+            else:
+                summary['files_failed'] += 1
+                logger.error(f"[{index}/{len(files)}] 실패: {input_path} - {result['error']}")
+
+    await asyncio.gather(*(process_one(i + 1, path) for i, path in enumerate(files)))
+
+    summary['cache'] = {
+        'naver': processor.naver_cache.stats(),
+        'product_name': processor.product_name_cache.stats(),
+        'related': processor.related_cache.stats()
+    }
+    summary['rate_limit_wait'] = {
+        'naver': round(processor.naver_rate_limiter.total_wait, 1),
+        'gemini': round(processor.gemini_rate_limiter.total_wait, 1)
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QName 대량 엑셀 일괄 처리")
+    parser.add_argument('inputs', nargs='+', help="입력 디렉토리 또는 glob 패턴")
+    parser.add_argument('--output-dir', default='bulk_output', help="결과 파일 저장 디렉토리")
+    parser.add_argument('--concurrency', type=int, default=2, help="동시에 처리할 파일 수")
+    parser.add_argument('--max-concurrent', type=int, default=5, help="파일별 단계당 동시 API 요청 수")
+    parser.add_argument('--naver-rps', type=float, default=8.0, help="네이버 API 초당 요청 한도 (전체 공유)")
+    parser.add_argument('--gemini-rps', type=float, default=4.0, help="Gemini API 초당 요청 한도 (전체 공유)")
+    parser.add_argument('--skip-existing', action='store_true', help="결과 파일이 이미 있으면 건너뜀")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="파일당 시간 예산(초) - 초과가 예상되면 남은 행을 간소화 모드로 처리")
+    args = parser.parse_args()
+
+    files = collect_input_files(args.inputs)
+    if not files:
+        print("처리할 엑셀 파일이 없습니다.")
+        sys.exit(1)
+
+    check_api_keys()
+    os.makedirs(args.output_dir, exist_ok=True)
+    print(f"=== 일괄 처리 시작: {len(files)}개 파일, 동시 처리 {args.concurrency}개 ===")
+
+    started = time.time()
+    summary = asyncio.run(run_bulk(
+        files, args.output_dir, args.concurrency, args.max_concurrent,
+        args.naver_rps, args.gemini_rps, args.skip_existing, args.time_budget
+    ))
+    elapsed = time.time() - started
+
+    print("=== 처리량 요약 ===")
+    print(f"파일: 성공 {summary['files_ok']} / 실패 {summary['files_failed']} / 건너뜀 {summary['files_skipped']}")
+    print(f"행: {summary['rows']}행 처리, {summary['rows_success']}행 성공, {summary['rows_degraded']}행 간소화")
+    print(f"소요 시간: {elapsed:.1f}초, 처리량: {summary['rows'] / elapsed if elapsed else 0:.2f}행/초")
+    for name, stats in summary['cache'].items():
+        print(f"캐시[{name}]: 적중 {stats['hits']} / 미스 {stats['misses']} (적중률 {stats['hit_rate'] * 100:.1f}%)")
+    print(f"레이트 리밋 대기: 네이버 {summary['rate_limit_wait']['naver']}초, Gemini {summary['rate_limit_wait']['gemini']}초")
+
+    sys.exit(1 if summary['files_failed'] else 0)
+
+
+if __name__ == "__main__":
+    main()
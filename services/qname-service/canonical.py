@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+키워드 정규화(canonicalization)
+같은 상품 키워드가 공백/전각 문자/뒤쪽 옵션 문구/유니코드 정규화 형태/'nan' 등으로
+조금씩 다르게 들어와 키워드별 캐시를 모두 놓치는 문제를 줄이기 위해,
+네이버/Gemini 단계 전에 키워드를 하나의 정규형으로 맞춥니다.
+정규 키워드는 캐시 키이면서 네이버/Gemini에 보내는 문구이므로, 상품을 바꾸지 않는 표기 차이만 지웁니다.
+- NFC 정규화, 전각 → 반각
+- 구두점/기호를 공백으로 접고 연속 공백 정리 ('+', '&', '%', '.', '-'는 유지)
+- 뒤쪽 괄호 옵션 문구 제거: '원피스 (블랙/M)' → '원피스'
+  (옵션 구분자('/', ',', '옵션', '사이즈' 등)나 잡음 토큰만 든 괄호만 제거 - '(갤럭시 S23)' 같은 모델/규격은 유지)
+- 잡음 토큰 제거 (QNAME_NOISE_TOKENS, 쉼표 구분 - 기본값은 한글 판촉 문구만,
+  'New Balance'/'Hot Wheels'처럼 브랜드에 쓰이는 영어 단어는 넣지 않음)
+- 캐시 키용 안정 해시 (프로세스/실행과 무관하게 동일)
+"""
+
+import os
+import re
+import hashlib
+import unicodedata
+from typing import Iterable
+
+DEFAULT_NOISE_TOKENS = "무료배송,당일발송,당일배송,빠른배송,특가,할인,세일,1+1,2+1"
+
+# pandas astype(str) 등에서 들어오는 빈 값 표기
+EMPTY_VALUES = {'', 'nan', 'none', 'null', 'nat', '<na>'}
+
+# 구두점/기호 중 키워드 의미를 바꿀 수 있어 유지하는 문자
+KEEP_SYMBOLS = set('+&%.-')
+
+# 키워드 끝의 괄호 문구 1개 (뒤에서부터 하나씩 검사)
+TRAILING_BRACKET_PATTERN = re.compile(r'\s*[\(\[\{<【]([^\(\)\[\]\{\}<>【】]*)[\)\]\}>】]\s*$')
+
+# 괄호 안에 있으면 옵션 문구로 보는 표시 (모델명/규격 괄호와 구분)
+OPTION_MARKERS = ('/', ',', ':', '옵션', '선택', '택1', '색상', '컬러', '사이즈', 'color', 'size')
+
+# '옵션:' / '옵션 선택' 이후 문구
+OPTION_SUFFIX_PATTERN = re.compile(r'\s*옵션\s*(선택)?\s*[:：].*$')
+
+
+def _fold_fullwidth(text: str) -> str:
+    """전각 ASCII(！～)와 전각 공백을 반각으로 변환"""
+    chars = []
+    for ch in text:
+        code = ord(ch)
+        if 0xFF01 <= code <= 0xFF5E:
+            chars.append(chr(code - 0xFEE0))
+        elif code == 0x3000:
+            chars.append(' ')
+        else:
+            chars.append(ch)
+    return ''.join(chars)
+
+
+def _fold_punctuation(text: str) -> str:
+    """구두점/기호/제어 문자를 공백으로 변환 (KEEP_SYMBOLS 제외)"""
+    chars = []
+    for ch in text:
+        if ch in KEEP_SYMBOLS:
+            chars.append(ch)
+            continue
+        category = unicodedata.category(ch)
+        if category[0] in ('P', 'S', 'C') or category == 'Zs':
+            chars.append(' ')
+        else:
+            chars.append(ch)
+    return ''.join(chars)
+
+
+def stable_hash(*parts) -> str:
+    """캐시 키용 안정 해시 (파이썬 hash()와 달리 프로세스마다 달라지지 않음)"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part if part is not None else '').encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+class KeywordCanonicalizer:
+    """원본 키워드 → 정규 키워드 변환기"""
+
+    def __init__(self, noise_tokens: Iterable[str] = None):
+        if noise_tokens is None:
+            noise_tokens = os.getenv("QNAME_NOISE_TOKENS", DEFAULT_NOISE_TOKENS).split(',')
+        self.noise_tokens = {token.strip().casefold() for token in noise_tokens if token.strip()}
+
+    def canonicalize(self, keyword) -> str:
+        """정규 키워드 반환 (빈 값/'nan'이면 빈 문자열)"""
+        if keyword is None:
+            return ''
+        text = str(keyword)
+        text = unicodedata.normalize('NFC', text)
+        text = _fold_fullwidth(text)
+        text = OPTION_SUFFIX_PATTERN.sub('', text)
+        text = self._strip_trailing_options(text)
+        text = _fold_punctuation(text)
+
+        tokens = [token.strip('.-') or token for token in text.split()]
+        tokens = [token for token in tokens if token]
+        meaningful = [token for token in tokens if token.casefold() not in self.noise_tokens]
+        # 잡음 토큰만으로 이루어진 키워드는 그대로 사용
+        canonical = ' '.join(meaningful or tokens)
+        return '' if canonical.casefold() in EMPTY_VALUES else canonical
+
+    def _strip_trailing_options(self, text: str) -> str:
+        """뒤쪽 괄호 중 옵션/판촉 문구만 제거 (모델명/규격 괄호를 만나면 멈춤, 괄호만 남으면 그대로 둠)"""
+        while True:
+            match = TRAILING_BRACKET_PATTERN.search(text)
+            if not match or not self._is_option_text(match.group(1)):
+                return text
+            stripped = text[:match.start()]
+            if not stripped.strip():
+                return text
+            text = stripped
+
+    def _is_option_text(self, content: str) -> bool:
+        folded = content.casefold()
+        if any(marker in folded for marker in OPTION_MARKERS):
+            return True
+        tokens = _fold_punctuation(folded).split()
+        return bool(tokens) and all(token in self.noise_tokens for token in tokens)
+
+    def key(self, keyword) -> str:
+        """정규 키워드의 안정 해시"""
+        return stable_hash(self.canonicalize(keyword))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+배열 기반 카테고리 테이블 (mmap 공유)
+카테고리 경로 문자열 → 코드 매핑과 문자 n-gram TF-IDF 색인을 하나의 바이너리 파일에 담고,
+각 uvicorn 워커는 이 파일을 읽기 전용 mmap으로 열어 같은 물리 메모리(페이지 캐시)를 공유합니다.
+워커 수가 늘어도 카테고리 데이터 메모리는 한 벌만 사용됩니다.
+
+파일 구성 (리틀 엔디언, 섹션은 8바이트 정렬):
+- 헤더: 매직, 형식 버전, 항목/용어/포스팅 수, 원본 naver.xlsx sha256, 섹션 오프셋
+- 카테고리: UTF-8 바이트 순 정렬, 문자열 오프셋(uint32) + 연속 문자열 버퍼
+- 코드: 시트에 적힌 그대로 문자열 오프셋(uint32) + 버퍼 + 종류(uint8, 0=숫자 셀, 1=문자 셀)
+  (문자 셀 코드는 앞자리 0을 유지, 코드가 비었거나 NaN인 행은 빌드에서 건너뜀)
+- TF-IDF: 용어(문자 2~3-gram) 정렬 테이블, idf(float32),
+  용어별 포스팅(CSC 형식: indptr(uint32), 카테고리 번호(uint32), L2 정규화 가중치(float32))
+
+유사도는 scikit-learn의 TfidfVectorizer(analyzer='char', ngram_range=(2, 3)) + 코사인 유사도와
+같은 방식으로 계산하며, numpy만 사용합니다.
+"""
+
+import os
+import re
+import mmap
+import math
+import struct
+import logging
+import numbers
+import tempfile
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'QCATTBL1'
+FORMAT_VERSION = 2
+NGRAM_RANGE = (2, 3)
+
+# 매직(8) + 버전/항목 수/용어 수/포스팅 수(uint32 x4) + sha256 hex(64) + 섹션 오프셋(uint64 x11)
+HEADER_FORMAT = '<8s4I64s11Q'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+CODE_NUMBER = 0
+CODE_TEXT = 1
+
+Code = Union[int, str]
+
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+def char_ngrams(text: str) -> List[str]:
+    """TfidfVectorizer(analyzer='char')와 같은 문자 n-gram 추출 (소문자화, 연속 공백 정리)"""
+    text = _WHITE_SPACES.sub(" ", text.lower())
+    min_n, max_n = NGRAM_RANGE
+    ngrams = []
+    for n in range(min_n, min(max_n + 1, len(text) + 1)):
+        for i in range(len(text) - n + 1):
+            ngrams.append(text[i:i + n])
+    return ngrams
+
+
+def normalize_code(value) -> Optional[Tuple[int, str]]:
+    """시트 catecode 셀 → (종류, 코드 문자열), 비었거나 NaN/소수면 None
+    숫자 셀은 정수로(NaN이 섞인 열에서 float로 읽힌 값 포함), 문자 셀은 앞자리 0을 포함해 그대로 유지"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if not text or text.casefold() in ('nan', 'none', 'null'):
+            return None
+        return CODE_TEXT, text
+    if isinstance(value, numbers.Integral):
+        return CODE_NUMBER, str(int(value))
+    if isinstance(value, numbers.Real):
+        number = float(value)
+        if math.isnan(number) or not number.is_integer():
+            return None
+        return CODE_NUMBER, str(int(number))
+    return None
+
+
+def _pack_strings(strings: List[bytes]) -> Tuple[np.ndarray, bytes]:
+    offsets = np.zeros(len(strings) + 1, dtype='<u4')
+    position = 0
+    for i, value in enumerate(strings):
+        position += len(value)
+        offsets[i + 1] = position
+    return offsets, b''.join(strings)
+
+
+def _align(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class CategoryTable:
+    """읽기 전용 카테고리 테이블 - dict처럼 `in`, `[]`, `get`, `len` 지원"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header = struct.unpack_from(HEADER_FORMAT, self._mmap, 0)
+        except struct.error:
+            self._mmap.close()
+            raise ValueError(f"카테고리 테이블 헤더 손상: {path}")
+        magic, version, count, term_count, nnz, sha256, *sections = header
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"카테고리 테이블 형식 불일치: {path}")
+
+        self.source_sha256 = sha256.decode('ascii').strip('\x00') or None
+        buffer = self._mmap
+        (key_offsets, key_bytes, code_offsets, code_bytes, code_kinds, term_offsets, idf,
+         indptr, rows, weights, term_bytes) = sections
+        self._key_offsets = np.frombuffer(buffer, dtype='<u4', count=count + 1, offset=key_offsets)
+        self._key_bytes = np.frombuffer(buffer, dtype=np.uint8, count=int(self._key_offsets[-1]), offset=key_bytes)
+        self._code_offsets = np.frombuffer(buffer, dtype='<u4', count=count + 1, offset=code_offsets)
+        self._code_bytes = np.frombuffer(buffer, dtype=np.uint8, count=int(self._code_offsets[-1]),
+                                         offset=code_bytes)
+        self._code_kinds = np.frombuffer(buffer, dtype=np.uint8, count=count, offset=code_kinds)
+        self._term_offsets = np.frombuffer(buffer, dtype='<u4', count=term_count + 1, offset=term_offsets)
+        self._idf = np.frombuffer(buffer, dtype='<f4', count=term_count, offset=idf)
+        self._indptr = np.frombuffer(buffer, dtype='<u4', count=term_count + 1, offset=indptr)
+        self._rows = np.frombuffer(buffer, dtype='<u4', count=nnz, offset=rows)
+        self._weights = np.frombuffer(buffer, dtype='<f4', count=nnz, offset=weights)
+        self._term_bytes = np.frombuffer(buffer, dtype=np.uint8, count=int(self._term_offsets[-1]), offset=term_bytes)
+        self._count = count
+        self._term_count = term_count
+
+    @classmethod
+    def open(cls, path: str) -> 'CategoryTable':
+        return cls(path)
+
+    @staticmethod
+    def build(category_map: Dict[str, object], path: str, source_sha256: str = None) -> int:
+        """카테고리 맵으로 테이블 파일 생성 (같은 디렉토리 임시 파일 작성 후 교체)
+        코드가 비었거나 잘못된 항목은 건너뛰고 로그로 남김, 저장한 항목 수 반환"""
+        entries = []
+        skipped = []
+        for key, value in category_map.items():
+            code = normalize_code(value)
+            if code is None:
+                skipped.append(key)
+                continue
+            entries.append((str(key).encode('utf-8'), code))
+        if skipped:
+            logger.warning(f"catecode가 비었거나 잘못된 카테고리 {len(skipped)}개 건너뜀 (예: {skipped[:3]})")
+        entries.sort(key=lambda item: item[0])
+        keys = [key for key, _ in entries]
+        key_offsets, key_bytes = _pack_strings(keys)
+        code_offsets, code_bytes = _pack_strings([code.encode('utf-8') for _, (_, code) in entries])
+        code_kinds = np.array([kind for _, (kind, _) in entries], dtype=np.uint8)
+
+        # 문자 n-gram TF-IDF (smooth idf, L2 정규화)
+        doc_counts = [Counter(char_ngrams(key.decode('utf-8'))) for key in keys]
+        document_frequency = Counter()
+        for counts in doc_counts:
+            document_frequency.update(counts.keys())
+        terms = sorted(document_frequency, key=lambda term: term.encode('utf-8'))
+        term_ids = {term: i for i, term in enumerate(terms)}
+        idf = np.array(
+            [math.log((1 + len(keys)) / (1 + document_frequency[term])) + 1 for term in terms], dtype='<f4'
+        )
+
+        postings: List[List[Tuple[int, float]]] = [[] for _ in terms]
+        for row, counts in enumerate(doc_counts):
+            weighted = {term_ids[term]: count * float(idf[term_ids[term]]) for term, count in counts.items()}
+            norm = math.sqrt(sum(value * value for value in weighted.values())) or 1.0
+            for term_id, value in weighted.items():
+                postings[term_id].append((row, value / norm))
+
+        indptr = np.zeros(len(terms) + 1, dtype='<u4')
+        for i, posting in enumerate(postings):
+            indptr[i + 1] = indptr[i] + len(posting)
+        rows = np.array([row for posting in postings for row, _ in posting], dtype='<u4')
+        weights = np.array([weight for posting in postings for _, weight in posting], dtype='<f4')
+        term_offsets, term_bytes = _pack_strings([term.encode('utf-8') for term in terms])
+
+        sections = [
+            key_offsets.tobytes(), key_bytes, code_offsets.tobytes(), code_bytes, code_kinds.tobytes(),
+            term_offsets.tobytes(), idf.tobytes(),
+            indptr.tobytes(), rows.tobytes(), weights.tobytes(), term_bytes
+        ]
+        offsets = []
+        position = _align(HEADER_SIZE)
+        for section in sections:
+            offsets.append(position)
+            position = _align(position + len(section))
+
+        header = struct.pack(
+            HEADER_FORMAT, MAGIC, FORMAT_VERSION, len(keys), len(terms), len(rows),
+            (source_sha256 or '').encode('ascii'), *offsets
+        )
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.bin', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                for offset, section in zip(offsets, sections):
+                    f.seek(offset)
+                    f.write(section)
+                f.truncate(position)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return len(keys)
+
+    # ---- 카테고리 조회 ----
+
+    def _key_at(self, index: int) -> bytes:
+        return self._key_bytes[self._key_offsets[index]:self._key_offsets[index + 1]].tobytes()
+
+    def _code_at(self, index: int) -> Code:
+        """숫자 셀 코드는 int, 문자 셀 코드는 시트에 적힌 문자열"""
+        code = self._code_bytes[self._code_offsets[index]:self._code_offsets[index + 1]].tobytes().decode('utf-8')
+        return int(code) if self._code_kinds[index] == CODE_NUMBER else code
+
+    def _term_at(self, index: int) -> bytes:
+        return self._term_bytes[self._term_offsets[index]:self._term_offsets[index + 1]].tobytes()
+
+    @staticmethod
+    def _search(value: bytes, size: int, item_at) -> int:
+        """정렬된 문자열 배열에서 이진 탐색 (없으면 -1)"""
+        low, high = 0, size
+        while low < high:
+            middle = (low + high) // 2
+            if item_at(middle) < value:
+                low = middle + 1
+            else:
+                high = middle
+        if low < size and item_at(low) == value:
+            return low
+        return -1
+
+    def index_of(self, key: str) -> int:
+        return self._search(key.encode('utf-8'), self._count, self._key_at)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self.index_of(key) >= 0
+
+    def __getitem__(self, key: str) -> Code:
+        index = self.index_of(key) if isinstance(key, str) else -1
+        if index < 0:
+            raise KeyError(key)
+        return self._code_at(index)
+
+    def get(self, key: str, default=None):
+        index = self.index_of(key) if isinstance(key, str) else -1
+        return self._code_at(index) if index >= 0 else default
+
+    def keys(self) -> Iterator[str]:
+        for index in range(self._count):
+            yield self._key_at(index).decode('utf-8')
+
+    def items(self) -> Iterator[Tuple[str, Code]]:
+        for index in range(self._count):
+            yield self._key_at(index).decode('utf-8'), self._code_at(index)
+
+    # ---- 유사도 매칭 ----
+
+    @property
+    def has_vectors(self) -> bool:
+        return self._term_count > 0
+
+    def most_similar(self, text: str) -> Optional[Tuple[str, Code, float]]:
+        """코사인 유사도가 가장 높은 카테고리 (경로, 코드, 유사도), 공통 n-gram이 없으면 None"""
+        scores = np.zeros(self._count, dtype=np.float32)
+        norm = 0.0
+        for term, count in Counter(char_ngrams(text)).items():
+            term_id = self._search(term.encode('utf-8'), self._term_count, self._term_at)
+            if term_id < 0:
+                continue
+            weight = count * float(self._idf[term_id])
+            norm += weight * weight
+            start, end = self._indptr[term_id], self._indptr[term_id + 1]
+            # 한 용어의 포스팅 안에서 카테고리 번호는 중복되지 않음
+            scores[self._rows[start:end]] += weight * self._weights[start:end]
+        if norm == 0.0:
+            return None
+        best = int(scores.argmax())
+        return self._key_at(best).decode('utf-8'), self._code_at(best), float(scores[best]) / math.sqrt(norm)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+업스트림 API 키 풀 (Gemini / 네이버)
+키를 여러 개 등록해 두면 호출마다 남은 할당량과 최근 오류율이 가장 좋은 키를 고르고,
+429(한도 초과)나 인증 실패가 난 키는 일정 시간 격리한 뒤 다시 사용합니다.
+배포 환경변수에 키만 추가하면 업스트림 처리량이 키 수만큼 늘어납니다.
+
+환경변수:
+- GEMINI_API_KEYS: 쉼표 구분 Gemini 키 목록 (GEMINI_API_KEY도 함께 사용)
+- NAVER_CREDENTIALS: 쉼표 구분 '클라이언트ID:시크릿' 목록 (NAVER_CLIENT_ID/SECRET도 함께 사용)
+- QNAME_GEMINI_KEY_QUOTA / QNAME_GEMINI_KEY_QUOTA_WINDOW: 키당 할당량 / 기간(초) (기본 60회 / 60초)
+- QNAME_NAVER_KEY_QUOTA / QNAME_NAVER_KEY_QUOTA_WINDOW: 키당 할당량 / 기간(초) (기본 25000회 / 86400초)
+- QNAME_CREDENTIAL_QUARANTINE_SECONDS: 429 격리 시간 (기본 60초, 연속 격리 시 두 배씩 최대 15분)
+- QNAME_CREDENTIAL_AUTH_QUARANTINE_SECONDS: 인증 실패 격리 시간 (기본 600초)
+"""
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 격리 대상 HTTP 상태 (한도 초과 / 인증 실패)
+RATE_LIMITED_STATUSES = {429}
+AUTH_FAILED_STATUSES = {401, 403}
+
+MAX_QUARANTINE_SECONDS = 900
+
+# 최근 오류율 지수 이동 평균 가중치
+ERROR_RATE_SMOOTHING = 0.2
+
+
+# 현재 컨텍스트(태스크와 그 하위 태스크/스레드)에서 나간 키 풀 요청 수 (count_requests 안에서만 설정)
+_REQUEST_COUNTER = contextvars.ContextVar('upstream_request_counter', default=None)
+
+
+class RequestCounter:
+    """count_requests() 블록 안에서 나간 업스트림 요청 수 (Gemini + 네이버)"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self.count += 1
+
+
+@contextmanager
+def count_requests():
+    """이 블록에서 시작한 호출의 키 풀 요청만 셈 - 같은 시간 다른 요청의 호출은 포함하지 않음
+    (asyncio 태스크/asyncio.to_thread/run_io는 컨텍스트를 복사하므로 하위 호출도 함께 셈)"""
+    counter = RequestCounter()
+    token = _REQUEST_COUNTER.set(counter)
+    try:
+        yield counter
+    finally:
+        _REQUEST_COUNTER.reset(token)
+
+
+class CredentialsUnavailable(Exception):
+    """사용 가능한 키가 없음 (모두 격리 중이거나 등록된 키 없음)"""
+
+
+def parse_key_list(value: str) -> List[str]:
+    """'k1,k2' 형식의 키 목록 파싱"""
+    return [key.strip() for key in (value or "").split(",") if key.strip()]
+
+
+def parse_naver_credentials(value: str) -> List[Tuple[str, str]]:
+    """'id1:secret1,id2:secret2' 형식의 네이버 키 목록 파싱"""
+    pairs = []
+    for item in parse_key_list(value):
+        client_id, separator, secret = item.partition(":")
+        if separator and client_id.strip() and secret.strip():
+            pairs.append((client_id.strip(), secret.strip()))
+        else:
+            logger.warning("NAVER_CREDENTIALS 항목 형식 오류 ('ID:시크릿' 필요) - 무시합니다.")
+    return pairs
+
+
+def _mask(value: str) -> str:
+    return f"…{value[-4:]}" if len(value) > 4 else "…"
+
+
+class Credential:
+    """키 1개와 사용량/오류/격리 상태"""
+
+    def __init__(self, name: str, key: str, secret: str = None, quota: int = 60, window_seconds: float = 60):
+        self.name = name
+        self.key = key
+        self.secret = secret
+        self.quota = quota
+        self.window_seconds = window_seconds
+        self.window_started = time.monotonic()
+        self.used_in_window = 0
+        self.requests = 0
+        self.errors = 0
+        self.error_rate = 0.0
+        self.quarantined_until = 0.0
+        self.quarantine_count = 0
+        self.consecutive_quarantines = 0
+        self.last_error: Optional[str] = None
+        self.last_used = 0.0
+
+    @property
+    def label(self) -> str:
+        """로그/지표용 표시 이름 (키 값은 끝 4자리만)"""
+        return f"{self.name}({_mask(self.key)})"
+
+    def remaining(self, now: float) -> int:
+        if now - self.window_started >= self.window_seconds:
+            self.window_started = now
+            self.used_in_window = 0
+        return max(0, self.quota - self.used_in_window)
+
+    def quarantined(self, now: float) -> bool:
+        return now < self.quarantined_until
+
+    def score(self, now: float) -> float:
+        """남은 할당량 비율 × (1 - 최근 오류율) - 높을수록 우선"""
+        return (self.remaining(now) / self.quota if self.quota else 0.0) * (1.0 - self.error_rate)
+
+
+class CredentialPool:
+    """서비스 1개(Gemini 또는 네이버)의 키 풀 - 스레드 안전 (Gemini 호출은 스레드에서 실행됨)"""
+
+    def __init__(self, service: str, credentials: List[Credential], quarantine_seconds: float = None,
+                 auth_quarantine_seconds: float = None):
+        self.service = service
+        self.credentials = credentials
+        self.quarantine_seconds = quarantine_seconds if quarantine_seconds is not None else float(
+            os.getenv("QNAME_CREDENTIAL_QUARANTINE_SECONDS", "60"))
+        self.auth_quarantine_seconds = auth_quarantine_seconds if auth_quarantine_seconds is not None else float(
+            os.getenv("QNAME_CREDENTIAL_AUTH_QUARANTINE_SECONDS", "600"))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_gemini(cls, extra_keys: Iterable[str] = ()) -> 'CredentialPool':
+        """GEMINI_API_KEYS + 단일 키(GEMINI_API_KEY 등)로 Gemini 키 풀 생성"""
+        keys = list(dict.fromkeys(parse_key_list(os.getenv("GEMINI_API_KEYS", "")) + [k for k in extra_keys if k]))
+        quota = int(os.getenv("QNAME_GEMINI_KEY_QUOTA", "60"))
+        window = float(os.getenv("QNAME_GEMINI_KEY_QUOTA_WINDOW", "60"))
+        return cls('gemini', [
+            Credential(f"gemini-{i + 1}", key, quota=quota, window_seconds=window) for i, key in enumerate(keys)
+        ])
+
+    @classmethod
+    def for_naver(cls, extra_pairs: Iterable[Tuple[str, str]] = ()) -> 'CredentialPool':
+        """NAVER_CREDENTIALS + 단일 키(NAVER_CLIENT_ID/SECRET 등)로 네이버 키 풀 생성"""
+        pairs = parse_naver_credentials(os.getenv("NAVER_CREDENTIALS", ""))
+        pairs += [(client_id, secret) for client_id, secret in extra_pairs if client_id and secret]
+        pairs = list(dict.fromkeys(pairs))
+        quota = int(os.getenv("QNAME_NAVER_KEY_QUOTA", "25000"))
+        window = float(os.getenv("QNAME_NAVER_KEY_QUOTA_WINDOW", "86400"))
+        return cls('naver', [
+            Credential(f"naver-{i + 1}", client_id, secret, quota=quota, window_seconds=window)
+            for i, (client_id, secret) in enumerate(pairs)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def __bool__(self) -> bool:
+        return bool(self.credentials)
+
+    def available(self) -> int:
+        """격리되지 않은 키 수"""
+        with self._lock:
+            now = time.monotonic()
+            return sum(1 for credential in self.credentials if not credential.quarantined(now))
+
+    def acquire(self) -> Credential:
+        """호출에 사용할 키 선택 (할당량을 1 차감)
+        격리되지 않은 키 중 점수가 가장 높은 키, 동점이면 가장 오래 쉰 키.
+        모든 키의 할당량이 바닥나도 격리 전이면 계속 사용 (할당량은 로컬 추정치이므로)"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [credential for credential in self.credentials if not credential.quarantined(now)]
+            if not candidates:
+                raise CredentialsUnavailable(f"{self.service} 키가 모두 격리 중입니다.")
+            credential = max(candidates, key=lambda c: (c.score(now), -c.last_used))
+            credential.used_in_window += 1
+            credential.requests += 1
+            credential.last_used = now
+        counter = _REQUEST_COUNTER.get()
+        if counter is not None:
+            counter.add()
+        return credential
+
+    def report_success(self, credential: Credential):
+        with self._lock:
+            credential.error_rate *= (1 - ERROR_RATE_SMOOTHING)
+            credential.consecutive_quarantines = 0
+
+    def report_failure(self, credential: Credential, status: int = None, error: str = None):
+        """호출 실패 기록 - 429/인증 실패면 키를 격리"""
+        with self._lock:
+            credential.errors += 1
+            credential.error_rate = credential.error_rate * (1 - ERROR_RATE_SMOOTHING) + ERROR_RATE_SMOOTHING
+            credential.last_error = f"{status} {error or ''}".strip() if status else (error or None)
+            if status in RATE_LIMITED_STATUSES:
+                credential.consecutive_quarantines += 1
+                seconds = min(MAX_QUARANTINE_SECONDS,
+                              self.quarantine_seconds * 2 ** (credential.consecutive_quarantines - 1))
+                # 한도 초과면 이번 기간 할당량은 소진된 것으로 간주
+                credential.used_in_window = credential.quota
+            elif status in AUTH_FAILED_STATUSES:
+                seconds = self.auth_quarantine_seconds
+            else:
+                return
+            credential.quarantined_until = time.monotonic() + seconds
+            credential.quarantine_count += 1
+        logger.warning(f"{self.service} 키 격리: {credential.label} {seconds:.0f}초 (HTTP {status})")
+
+    def stats(self) -> List[dict]:
+        """키별 사용량 지표 (키 값은 노출하지 않음)"""
+        with self._lock:
+            now = time.monotonic()
+            return [{
+                'key': credential.label,
+                'requests': credential.requests,
+                'errors': credential.errors,
+                'error_rate': round(credential.error_rate, 3),
+                'quota': credential.quota,
+                'remaining': credential.remaining(now),
+                'quarantined_seconds': round(max(0.0, credential.quarantined_until - now), 1),
+                'quarantine_count': credential.quarantine_count,
+                'last_error': credential.last_error
+            } for credential in self.credentials]
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """SDK 예외에서 HTTP 상태 추출 (google.api_core 예외의 code, 잘못된 키는 401로 취급)"""
+    code = getattr(error, 'code', None)
+    try:
+        status = int(code) if code is not None else None
+    except (TypeError, ValueError):
+        status = None
+    if status == 400 and 'API key not valid' in str(error):
+        return 401
+    return status
+
+
+class KeyedGeminiModel:
+    """API 키 하나에 묶인 Gemini 모델 - GenerativeModel.generate_content(prompt, request_options=...)와 같은 호출/응답
+    genai.configure는 프로세스 전역 설정이라, 키마다 공개 API인 GenerativeServiceClient를
+    client_options.api_key로 따로 만들어 씀 (SDK 내부 _ClientManager/_client에 의존하지 않음)"""
+
+    def __init__(self, api_key: str, model_name: str):
+        import google.ai.generativelanguage as glm
+        self._glm = glm
+        self.model_name = model_name if model_name.startswith('models/') else f"models/{model_name}"
+        self.client = glm.GenerativeServiceClient(client_options={'api_key': api_key})
+
+    def generate_content(self, prompt: str, request_options: Optional[dict] = None):
+        from google.generativeai.types import GenerateContentResponse
+        glm = self._glm
+        request = glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[glm.Content(role='user', parts=[glm.Part(text=prompt)])]
+        )
+        response = self.client.generate_content(request, **(request_options or {}))
+        return GenerateContentResponse.from_response(response)
+
+
+def create_gemini_model(api_key: str, model_name: str) -> KeyedGeminiModel:
+    """키별 Gemini 모델"""
+    return KeyedGeminiModel(api_key, model_name)
+
+
+class PooledGeminiModel:
+    """키 풀을 쓰는 Gemini 모델 - GenerativeModel.generate_content와 같은 방식으로 호출
+    429/인증 실패면 해당 키를 격리하고 다른 키로 재시도"""
+
+    def __init__(self, pool: CredentialPool, model_name: str,
+                 model_factory: Callable[[str, str], object] = create_gemini_model):
+        self.pool = pool
+        self.model_name = model_name
+        self._model_factory = model_factory
+        self._models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _model_for(self, credential: Credential):
+        model = self._models.get(credential.name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(credential.name)
+                if model is None:
+                    model = self._model_factory(credential.key, self.model_name)
+                    self._models[credential.name] = model
+        return model
+
+    def generate_content(self, *args, **kwargs):
+        last_error: Optional[Exception] = None
+        for _ in range(len(self.pool)):
+            credential = self.pool.acquire()
+            try:
+                response = self._model_for(credential).generate_content(*args, **kwargs)
+            except Exception as e:
+                status = error_status(e)
+                self.pool.report_failure(credential, status, str(e)[:200])
+                if status in RATE_LIMITED_STATUSES or status in AUTH_FAILED_STATUSES:
+                    last_error = e
+                    continue
+                raise
+            self.pool.report_success(credential)
+            return response
+        raise last_error or CredentialsUnavailable("gemini 키가 없습니다.")
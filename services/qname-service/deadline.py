@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+작업 시간 예산(deadline) 관리
+배치마다 실제 소요 시간을 관찰해, 남은 배치를 정상(LLM) 모드로 처리하면
+예산을 넘길 것 같을 때 간소화 모드(캐시/기본 생성기)로 전환하도록 판단합니다.
+한 번 전환하면 작업이 끝날 때까지 간소화 모드를 유지합니다.
+"""
+
+import time
+from typing import Optional
+
+
+class JobDeadline:
+    """작업 단위 시간 예산 추적기"""
+
+    def __init__(self, budget_seconds: float, safety_factor: float = 1.5,
+                 degraded_batch_seconds: float = 0.5, smoothing: float = 0.3):
+        self.budget_seconds = float(budget_seconds)
+        self.safety_factor = safety_factor
+        self.smoothing = smoothing
+        self.started = time.monotonic()
+        self.degraded = False
+        self.degraded_at: Optional[float] = None
+        # 배치당 소요 시간 추정치 (지수 이동 평균)
+        self._full_batch_seconds: Optional[float] = None
+        self._degraded_batch_seconds = degraded_batch_seconds
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining(self) -> float:
+        return self.budget_seconds - self.elapsed()
+
+    def observe(self, seconds: float, degraded: bool):
+        """배치 1개 처리에 걸린 시간 기록"""
+        if degraded:
+            self._degraded_batch_seconds = self._ewma(self._degraded_batch_seconds, seconds)
+        else:
+            self._full_batch_seconds = self._ewma(self._full_batch_seconds, seconds)
+
+    def should_degrade(self, batches_after: int) -> bool:
+        """다음 배치를 정상 모드로 처리해도 나머지 배치를 간소화 모드로 예산 안에 끝낼 수 있는지 판단"""
+        if self.degraded:
+            return True
+        remaining = self.remaining()
+        if self._full_batch_seconds is None:
+            # 아직 관찰값이 없으면 예산이 이미 소진된 경우에만 전환
+            at_risk = remaining <= 0
+        else:
+            needed = (self._full_batch_seconds * self.safety_factor
+                      + batches_after * self._degraded_batch_seconds)
+            at_risk = needed > remaining
+        if at_risk:
+            self.degraded = True
+            self.degraded_at = self.elapsed()
+        return at_risk
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return current + self.smoothing * (value - current)
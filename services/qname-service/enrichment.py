@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+2차 보강 (fallback 행 재처리)
+1차 처리에서 업스트림 일시 오류나 시간 예산 간소화 때문에 기본 카테고리/기본 상품명/기본 연관검색어로
+채워진 행(degraded)을 작업별 재시도 큐에 기록해 두고, 업스트림 키가 회복되면 background 레인
+(bulk 대기 행이 없을 때만 실행)에서 다시 처리해 결과 파일을 새 아티팩트로 갱신합니다.
+1차 처리는 짧은 시간 예산으로 빠르게 돌려도 품질을 잃지 않습니다.
+
+- 진행 상황/갱신된 아티팩트: GET /api/qname/enrichment/{job_id} (1차 응답의 X-Enrichment-Job 헤더)
+- 재시도: QNAME_ENRICHMENT_MAX_ATTEMPTS (기본 5회), QNAME_ENRICHMENT_RETRY_SECONDS (기본 60초, 회차마다 두 배)
+- 키 격리 대기 한도: QNAME_ENRICHMENT_MAX_WAIT_SECONDS (기본 6시간, 등록 시점부터) - 넘으면 작업 종료
+- Gemini 키가 아예 설정되지 않았으면 기다려도 회복되지 않으므로 바로 실패 처리
+- 보관 작업 수: QNAME_ENRICHMENT_MAX_JOBS (기본 100개, 초과 시 오래된 종료 작업부터 정리)
+- 큐는 프로세스 메모리에만 있음 (재시작 시 대기 작업은 사라지고 1차 결과 파일은 그대로 유지)
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from io_executor import run_io
+from row_results import ResultColumns, write_results_workbook
+from scheduler import LANE_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = '대기'
+STATUS_RUNNING = '진행중'
+STATUS_DONE = '완료'
+STATUS_PARTIAL = '부분완료'
+STATUS_FAILED = '실패'
+
+FINISHED_STATUSES = (STATUS_DONE, STATUS_PARTIAL, STATUS_FAILED)
+
+MAX_RETRY_SECONDS = 3600
+
+
+class EnrichmentJob:
+    """1차 결과 1건의 보강 대상 행과 진행 상태"""
+
+    def __init__(self, job_id: str, artifact_id: str, results: ResultColumns, user_id: str = None,
+                 flag_degraded: bool = False, cache_key: str = None):
+        self.job_id = job_id
+        self.source_artifact_id = artifact_id
+        self.artifact_id = artifact_id
+        self.results: Optional[ResultColumns] = results
+        self.pending: List[int] = results.degraded_indices()
+        self.initial_pending = len(self.pending)
+        self.user_id = user_id
+        self.flag_degraded = flag_degraded
+        self.cache_key = cache_key
+        self.status = STATUS_QUEUED
+        self.attempts = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.next_attempt_at = self.created_at
+        self.error: Optional[str] = None
+        # 보강된 행이 아직 결과 파일에 반영되지 않음
+        self.dirty = False
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'source_artifact_id': self.source_artifact_id,
+            'artifact_id': self.artifact_id,
+            'updated': self.artifact_id != self.source_artifact_id,
+            'degraded_rows': self.initial_pending,
+            'remaining_rows': len(self.pending),
+            'attempts': self.attempts,
+            'next_attempt_in': round(max(0.0, self.next_attempt_at - time.time()), 1)
+            if self.status == STATUS_QUEUED else None,
+            'error': self.error
+        }
+
+
+class SecondPassEnricher:
+    """fallback 행 재시도 큐와 백그라운드 보강 루프"""
+
+    def __init__(self, processor_factory: Callable, artifact_store, result_cache=None, max_jobs: int = None,
+                 max_attempts: int = None, retry_seconds: float = None, max_wait_seconds: float = None,
+                 batch_size: int = 10):
+        self.processor_factory = processor_factory
+        self.artifact_store = artifact_store
+        self.result_cache = result_cache
+        self.max_jobs = max_jobs or int(os.getenv("QNAME_ENRICHMENT_MAX_JOBS", "100"))
+        self.max_attempts = max_attempts or int(os.getenv("QNAME_ENRICHMENT_MAX_ATTEMPTS", "5"))
+        self.retry_seconds = retry_seconds if retry_seconds is not None else float(
+            os.getenv("QNAME_ENRICHMENT_RETRY_SECONDS", "60"))
+        self.max_wait_seconds = max_wait_seconds if max_wait_seconds is not None else float(
+            os.getenv("QNAME_ENRICHMENT_MAX_WAIT_SECONDS", str(6 * 3600)))
+        self.batch_size = batch_size
+        self.jobs: Dict[str, EnrichmentJob] = OrderedDict()
+        self.enriched_rows = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def submit(self, artifact_id: str, results: ResultColumns, user_id: str = None, flag_degraded: bool = False,
+               cache_key: str = None) -> Optional[str]:
+        """1차 결과의 degraded 행을 보강 큐에 등록하고 작업 ID 반환 (보강할 행이 없거나 큐가 가득 차면 None)"""
+        if not results.degraded_count:
+            return None
+        self._prune()
+        if len(self.jobs) >= self.max_jobs:
+            logger.warning(f"2차 보강 큐가 가득 참 ({len(self.jobs)}개) - 등록하지 않음")
+            return None
+        job = EnrichmentJob(uuid.uuid4().hex, artifact_id, results, user_id, flag_degraded, cache_key)
+        self.jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        logger.info(f"2차 보강 등록: 작업 {job.job_id[:8]}, {job.initial_pending}개 행 (아티팩트 {artifact_id})")
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    async def run(self):
+        """보강 루프 (서버 시작 시 백그라운드 작업으로 실행, 작업은 한 번에 하나씩)"""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._attempt(job)
+            except Exception as e:
+                logger.error(f"2차 보강 오류: 작업 {job.job_id[:8]} {str(e)}")
+                job.error = str(e)[:200]
+                await self._retry_or_finish(job)
+
+    async def _attempt(self, job: EnrichmentJob):
+        processor = await asyncio.to_thread(self.processor_factory)
+        if not processor.upstream_configured():
+            await self._finish(job, STATUS_FAILED, 'Gemini API 키가 설정되지 않아 보강할 수 없습니다.')
+            return
+        if not processor.upstream_available():
+            # 키가 모두 격리 중이면 시도 횟수를 쓰지 않고 회복을 기다림 (등록 후 대기 한도까지만)
+            if time.time() - job.created_at >= self.max_wait_seconds:
+                status = STATUS_PARTIAL if len(job.pending) < job.initial_pending else STATUS_FAILED
+                await self._finish(job, status, f'업스트림 키 격리가 {self.max_wait_seconds:.0f}초 안에 풀리지 않음')
+                return
+            job.error = '업스트림 키 격리 중'
+            self._schedule(job, self.retry_seconds)
+            return
+
+        job.status = STATUS_RUNNING
+        job.attempts += 1
+        keywords = job.results.column('keyword')
+        unique_keywords = list(dict.fromkeys(keywords[index] for index in job.pending))
+        logger.info(f"2차 보강 시작: 작업 {job.job_id[:8]} {len(job.pending)}개 행 "
+                    f"(고유 키워드 {len(unique_keywords)}개, {job.attempts}회차)")
+
+        enriched = {}
+        async for batch_results in processor.iter_keywords_async(unique_keywords, self.batch_size,
+                                                                  user_id=job.user_id, lane=LANE_BACKGROUND):
+            for row in batch_results:
+                if row.status == '완료' and not row.degraded:
+                    enriched[row.keyword] = row
+
+        remaining = []
+        for index in job.pending:
+            row = enriched.get(keywords[index])
+            if row is None:
+                remaining.append(index)
+            else:
+                job.results[index] = row
+                job.dirty = True
+        updated_rows = len(job.pending) - len(remaining)
+        job.pending = remaining
+        job.error = None
+        self.enriched_rows += updated_rows
+
+        if job.dirty:
+            if not await self._publish(job):
+                return
+            logger.info(f"2차 보강 반영: 작업 {job.job_id[:8]} {updated_rows}개 행, 남은 행 {len(remaining)}개 "
+                        f"→ 아티팩트 {job.artifact_id}")
+        await self._retry_or_finish(job)
+
+    async def _publish(self, job: EnrichmentJob) -> bool:
+        """보강된 결과를 직전 결과 파일에 덮어써 새 아티팩트로 저장 (직전 파일이 정리됐으면 작업 실패)"""
+        base_path = await run_io(self.artifact_store.path_for, job.artifact_id)
+        if base_path is None:
+            await self._finish(job, STATUS_FAILED, '이전 결과 파일이 정리되어 갱신할 수 없습니다.')
+            return False
+        output_path = await run_io(self.artifact_store.new_temp_path, '.xlsx', 'enrich_')
+        try:
+            await run_io(write_results_workbook, base_path, job.results, output_path, job.flag_degraded)
+            job.artifact_id = await run_io(self.artifact_store.put_file, output_path)
+        except Exception:
+            await run_io(self.artifact_store.discard_temp, output_path)
+            raise
+        job.dirty = False
+        job.updated_at = time.time()
+        return True
+
+    async def _retry_or_finish(self, job: EnrichmentJob):
+        if not job.pending and not job.dirty:
+            await self._finish(job, STATUS_DONE)
+        elif job.attempts >= self.max_attempts:
+            await self._finish(job, STATUS_PARTIAL, job.error)
+        else:
+            self._schedule(job, min(MAX_RETRY_SECONDS, self.retry_seconds * 2 ** max(0, job.attempts - 1)))
+
+    def _schedule(self, job: EnrichmentJob, delay: float):
+        job.status = STATUS_QUEUED
+        job.next_attempt_at = time.time() + delay
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job)
+
+    async def _finish(self, job: EnrichmentJob, status: str, error: str = None):
+        job.status = status
+        job.error = error
+        job.updated_at = time.time()
+        if status == STATUS_DONE and job.cache_key and self.result_cache:
+            # 모든 행이 보강됐으면 같은 파일 재업로드 시 보강된 결과를 바로 반환
+            await run_io(self.result_cache.store, job.cache_key, job.artifact_id, {
+                'total_processed': len(job.results),
+                'success_count': job.results.success_count,
+                'error_count': len(job.results) - job.results.success_count,
+                'degraded_count': job.results.degraded_count
+            })
+        job.results = None
+        logger.info(f"2차 보강 종료: 작업 {job.job_id[:8]} {status} "
+                    f"({job.initial_pending - len(job.pending)}/{job.initial_pending}개 행 보강)")
+
+    def _prune(self):
+        """보관 한도를 넘으면 오래된 종료 작업부터 정리"""
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES]:
+            if len(self.jobs) < self.max_jobs:
+                break
+            del self.jobs[job_id]
+
+    def stats(self) -> dict:
+        statuses = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            'jobs': statuses,
+            'pending_rows': sum(len(job.pending) for job in self.jobs.values() if job.status not in FINISHED_STATUSES),
+            'enriched_rows': self.enriched_rows
+        }
+
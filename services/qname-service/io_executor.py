@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+파일/워크북 I/O 전용 실행기
+엑셀 읽기/쓰기, 업로드 스풀링, 아티팩트 이동/해시, 임시 파일 정리처럼 블로킹되는 파일 작업을
+이벤트 루프 밖의 전용 스레드 풀에서 실행합니다. 큰 워크북을 저장하는 동안에도 /health와
+다른 요청이 멈추지 않고, 기본 실행기(asyncio.to_thread)를 쓰는 다른 작업과도 스레드를 다투지 않습니다.
+
+- 스레드 수: QNAME_IO_WORKERS (기본 4)
+- 호출한 쪽의 contextvars(요청 ID, 요청 단위 DEBUG)를 그대로 전달
+"""
+
+import os
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+IO_WORKERS = int(os.getenv("QNAME_IO_WORKERS", "4"))
+
+T = TypeVar('T')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """공용 I/O 스레드 풀 (최초 사용 시 생성)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='qname-io')
+    return _executor
+
+
+async def run_io(func: Callable[..., T], *args, **kwargs) -> T:
+    """블로킹 파일 작업을 I/O 스레드 풀에서 실행하고 결과를 기다림"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_io_executor(), call)
+
+
+def shutdown_io_executor(wait: bool = True):
+    """서버 종료 시 진행 중인 파일 작업을 마무리하고 스레드 풀 정리"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+최근 작업 키워드/카테고리 이력
+파일/배치 작업에서 처리한 정규 키워드와 카테고리 출현 횟수를 일자별로 모아 두고,
+캐시 예열(prewarm.py)이 최근 며칠 동안 자주 나온 키워드/카테고리를 고를 때 사용합니다.
+
+- 저장 위치: data/keyword_history.json (QNAME_KEYWORD_HISTORY_PATH)
+- 보관 기간: QNAME_KEYWORD_HISTORY_DAYS (기본 7일)
+- 일자별 보관 키워드 수: QNAME_KEYWORD_HISTORY_MAX_KEYWORDS (기본 20000개, 저장 시 드문 항목부터 정리)
+- 저장 시 마지막 저장 이후 쌓인 횟수만 파일에 합침 (여러 워커가 같은 파일을 써도 이력이 유실되지 않음)
+"""
+
+import os
+import threading
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from state_file import merge_json_file, read_json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY_PATH = os.path.join(SCRIPT_DIR, 'data', 'keyword_history.json')
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('keywords', 'categories')
+
+
+class KeywordHistory:
+    """일자별 키워드/카테고리 출현 횟수"""
+
+    def __init__(self, path: str = None, keep_days: int = None, max_keywords_per_day: int = None):
+        self.path = path or os.getenv("QNAME_KEYWORD_HISTORY_PATH", DEFAULT_HISTORY_PATH)
+        self.keep_days = keep_days or int(os.getenv("QNAME_KEYWORD_HISTORY_DAYS", "7"))
+        self.max_keywords_per_day = max_keywords_per_day or int(
+            os.getenv("QNAME_KEYWORD_HISTORY_MAX_KEYWORDS", "20000"))
+        # 일자(YYYY-MM-DD) → {'keywords': Counter, 'categories': Counter}
+        self.days: Dict[str, Dict[str, Counter]] = {}
+        # 마지막 저장 이후 누적분 (days와 같은 형태)
+        self._pending: Dict[str, Dict[str, Counter]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = None, **kwargs) -> 'KeywordHistory':
+        """저장된 이력 로드 (없으면 빈 이력)"""
+        history = cls(path, **kwargs)
+        if not os.path.exists(history.path):
+            return history
+        history.days = _parse_days(read_json(history.path))
+        logger.info(f"키워드 이력 로드: {len(history.days)}일")
+        return history
+
+    def record(self, rows: Iterable[Tuple[str, str]]):
+        """(정규 키워드, 카테고리) 목록 누적 - 빈 키워드/카테고리는 건너뜀"""
+        added = {'keywords': Counter(), 'categories': Counter()}
+        for keyword, category in rows:
+            if keyword:
+                added['keywords'][keyword] += 1
+            if category:
+                added['categories'][category] += 1
+        if not added['keywords'] and not added['categories']:
+            return
+        additions = {date.today().isoformat(): added}
+        with self._lock:
+            _apply(self.days, additions)
+            _apply(self._pending, additions)
+
+    def top_keywords(self, limit: int, days: int = None) -> List[str]:
+        """최근 days일 동안 자주 나온 키워드 (많은 순)"""
+        return [keyword for keyword, _ in self.most_common('keywords', limit, days)]
+
+    def top_categories(self, limit: int, days: int = None) -> List[str]:
+        return [category for category, _ in self.most_common('categories', limit, days)]
+
+    def most_common(self, field: str, limit: int, days: int = None) -> List[Tuple[str, int]]:
+        """field('keywords' 또는 'categories')별 (항목, 횟수) 상위 목록"""
+        since = (date.today() - timedelta(days=(days or self.keep_days) - 1)).isoformat()
+        total = Counter()
+        with self._lock:
+            for day, counts in self.days.items():
+                if day >= since:
+                    total.update(counts[field])
+        return total.most_common(limit)
+
+    def save(self) -> bool:
+        """마지막 저장 이후 누적분을 파일의 최신 이력에 합치고, 오래된 일자/드문 키워드를 정리해 저장"""
+        with self._lock:
+            if not self._pending:
+                return False
+            pending, self._pending = self._pending, {}
+
+        merged = {}
+
+        def merge(data: dict) -> dict:
+            days = _parse_days(data)
+            _apply(days, pending)
+            self._prune(days)
+            merged.update(days)
+            return {
+                'version': 1,
+                'updated_at': datetime.now().isoformat(),
+                'days': {day: {name: dict(counter) for name, counter in counts.items()}
+                         for day, counts in days.items()}
+            }
+
+        try:
+            merge_json_file(self.path, merge)
+        except Exception as e:
+            logger.error(f"키워드 이력 저장 오류: {str(e)}")
+            with self._lock:
+                # 다음 저장 때 다시 시도하도록 누적분을 되돌림
+                _apply(self._pending, pending)
+            return False
+
+        with self._lock:
+            # 저장하는 동안 들어온 누적분은 아직 파일에 없으므로 병합 결과 위에 다시 얹음
+            _apply(merged, self._pending)
+            self.days = merged
+        return True
+
+    def _prune(self, days: Dict[str, Dict[str, Counter]]):
+        """보관 기간이 지난 일자와 일자별 한도를 넘는 드문 키워드 정리"""
+        since = (date.today() - timedelta(days=self.keep_days - 1)).isoformat()
+        for day in [day for day in days if day < since]:
+            del days[day]
+        for counts in days.values():
+            if len(counts['keywords']) > self.max_keywords_per_day:
+                counts['keywords'] = Counter(dict(counts['keywords'].most_common(self.max_keywords_per_day)))
+
+
+def _parse_days(data: dict) -> Dict[str, Dict[str, Counter]]:
+    """저장 파일 내용 → 일자별 Counter"""
+    return {
+        day: {name: Counter(counts.get(name, {})) for name in FIELDS}
+        for day, counts in data.get('days', {}).items()
+    }
+
+
+def _apply(days: Dict[str, Dict[str, Counter]], additions: Dict[str, Dict[str, Counter]]):
+    """일자별 횟수를 더함"""
+    for day, counts in additions.items():
+        target = days.setdefault(day, {name: Counter() for name in FIELDS})
+        for name in FIELDS:
+            target[name].update(counts[name])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+비동기 구조화 로깅 파이프라인
+- 요청 스레드는 QueueHandler로 레코드를 큐에 넣기만 하고, 파일/콘솔 I/O는 QueueListener 스레드가 처리
+- JSON 한 줄 레코드 (extra 필드 포함)
+- 카테고리별 샘플링 및 초당 기록 수 제한 (LOG_SAMPLING, LOG_RATE_LIMIT)
+- X-Debug-Log 헤더(LOG_DEBUG_TOKEN과 일치할 때)로 요청 단위 DEBUG 로그 활성화
+- 포맷터/필터/큐 핸들러는 공용 패키지 log_core (services/shared/log_core, main-api와 공용)
+"""
+
+import os
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from typing import Optional
+
+from log_core import (
+    DEBUG_HEADER, REQUEST_DEBUG, REQUEST_ID, JsonFormatter, SamplingFilter, DroppingQueueHandler,
+    parse_category_config, debug_requested, redact_headers
+)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_setup_lock = threading.Lock()
+_log_files = set()
+
+
+def is_debug_enabled() -> bool:
+    """현재 요청에서 DEBUG 로그가 활성화되어 있는지"""
+    return REQUEST_DEBUG.get()
+
+
+def setup_logging(log_file: str = None, level: str = None) -> logging.handlers.QueueListener:
+    """루트 로거에 큐 기반 비동기 로깅 파이프라인 설치 (여러 번 호출해도 한 번만 설치)
+    이미 설치된 뒤에 log_file을 넘기면 파일 출력만 추가합니다."""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            if log_file:
+                _add_file_handler(log_file)
+            return _listener
+
+        base_level = getattr(logging, (level or os.getenv("LOG_LEVEL", "INFO")).upper(), logging.INFO)
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+        _queue_handler = DroppingQueueHandler(log_queue)
+        _queue_handler.addFilter(SamplingFilter(
+            base_level,
+            parse_category_config(os.getenv("LOG_SAMPLING", "")),
+            parse_category_config(os.getenv("LOG_RATE_LIMIT", ""))
+        ))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_queue_handler)
+        root.setLevel(base_level)
+
+        _listener = logging.handlers.QueueListener(log_queue, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        if log_file:
+            _add_file_handler(log_file)
+        return _listener
+
+
+def _add_file_handler(log_file: str):
+    """리스너에 일별 로테이션 파일 핸들러 추가 (같은 파일은 한 번만, _setup_lock 안에서 호출)"""
+    log_file = os.path.abspath(log_file)
+    if log_file in _log_files:
+        return
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    file_handler = logging.handlers.TimedRotatingFileHandler(
+        log_file, when='midnight', interval=1, backupCount=7, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter())
+    # 리스너 스레드는 handlers 튜플을 매 레코드마다 다시 읽으므로 튜플 교체만으로 반영됨
+    _listener.handlers = _listener.handlers + (file_handler,)
+    _log_files.add(log_file)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """애플리케이션 로거 - DEBUG 레코드는 X-Debug-Log 요청(LOG_DEBUG_TOKEN 일치)에서만 통과"""
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def pipeline_stats() -> dict:
+    """버려진 로그 레코드 수 (큐 포화/샘플링)"""
+    if _queue_handler is None:
+        return {}
+    sampling = next((f for f in _queue_handler.filters if isinstance(f, SamplingFilter)), None)
+    return {
+        "queue_dropped": _queue_handler.dropped,
+        "sampled_out": dict(sampling.dropped) if sampling else {}
+    }
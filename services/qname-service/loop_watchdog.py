@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+이벤트 루프 지연(loop lag) 감시
+루프 안에서 주기적으로 하트비트를 찍고, 별도 감시 스레드가 하트비트가 임계값보다 오래
+멈춘 것을 발견하면 그 순간 루프 스레드의 스택(sys._current_frames)을 떠서 경고 로그로 남깁니다.
+루프를 막는 블로킹 코드가 어디인지 멈춘 도중에 확인할 수 있습니다.
+
+- 임계값: QNAME_LOOP_LAG_THRESHOLD_MS (기본 500ms)
+- 비활성화: QNAME_LOOP_WATCHDOG=false
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 로그에 남길 스택 최대 프레임 수 (안쪽 프레임 기준)
+STACK_LIMIT = 25
+
+
+class LoopLagWatchdog:
+    """이벤트 루프 멈춤 감지기 (하트비트는 루프에서, 감시는 스레드에서)"""
+
+    def __init__(self, threshold_ms: float = None, interval_seconds: float = 0.1):
+        self.threshold_seconds = (threshold_ms if threshold_ms is not None else float(
+            os.getenv("QNAME_LOOP_LAG_THRESHOLD_MS", "500"))) / 1000
+        self.interval_seconds = interval_seconds
+        self.stall_count = 0
+        self.max_lag_ms = 0.0
+        self.last_stall: Optional[dict] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._stalled_since: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self, loop: asyncio.AbstractEventLoop = None):
+        """현재(또는 지정한) 루프에서 하트비트를 시작하고 감시 스레드 실행"""
+        if self._thread is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._loop.call_soon(self._beat)
+        self._thread = threading.Thread(target=self._watch, name='qname-loop-watchdog', daemon=True)
+        self._thread.start()
+        logger.info(f"이벤트 루프 감시 시작: 임계값 {self.threshold_seconds * 1000:.0f}ms")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _beat(self):
+        """루프에서 실행되는 하트비트 (멈춤이 끝나면 총 멈춘 시간 기록)"""
+        now = time.monotonic()
+        with self._lock:
+            lag = now - self._last_beat - self.interval_seconds
+            self._last_beat = now
+            stalled_since, self._stalled_since = self._stalled_since, None
+            if lag * 1000 > self.max_lag_ms:
+                self.max_lag_ms = lag * 1000
+        if stalled_since is not None and self.last_stall is not None:
+            self.last_stall['duration_ms'] = round((now - stalled_since) * 1000, 1)
+            logger.warning(f"이벤트 루프 멈춤 해소: {self.last_stall['duration_ms']:.0f}ms 동안 응답 없음")
+        if not self._stop.is_set():
+            self._loop.call_later(self.interval_seconds, self._beat)
+
+    def _watch(self):
+        """감시 스레드 - 하트비트가 임계값 넘게 멈추면 루프 스레드 스택 샘플링 (멈춤당 1회)"""
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                since_beat = time.monotonic() - self._last_beat
+                if since_beat <= self.threshold_seconds + self.interval_seconds or self._stalled_since is not None:
+                    continue
+                self._stalled_since = self._last_beat
+                self.stall_count += 1
+
+            stack = self._sample_stack()
+            self.last_stall = {
+                'at': datetime.now().isoformat(timespec='seconds'),
+                'duration_ms': round(since_beat * 1000, 1),
+                'stack': stack
+            }
+            logger.warning(
+                f"이벤트 루프 멈춤 감지: {since_beat * 1000:.0f}ms 이상 응답 없음 "
+                f"(임계값 {self.threshold_seconds * 1000:.0f}ms)\n" + ''.join(stack)
+            )
+
+    def _sample_stack(self) -> list:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return []
+        return traceback.format_stack(frame, limit=STACK_LIMIT)
+
+    def stats(self) -> dict:
+        return {
+            'threshold_ms': round(self.threshold_seconds * 1000, 1),
+            'stall_count': self.stall_count,
+            'max_lag_ms': round(self.max_lag_ms, 1),
+            'last_stall': self.last_stall
+        }
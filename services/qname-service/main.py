@@ -1,15 +1,27 @@
 # -*- coding: utf-8 -*-
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 import os
 import json
 import uvicorn
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
-import glob
+import asyncio
+import threading
 from pathlib import Path
+from artifact_store import ArtifactStore
+from upload_spool import spool_upload, UploadTooLarge
+from scheduler import FairScheduler
+from shard_coordinator import ShardCoordinator
+from row_results import count_data_rows
+from io_executor import run_io, shutdown_io_executor
+from loop_watchdog import LoopLagWatchdog
+from result_cache import FileResultCache
+from enrichment import SecondPassEnricher
+from prewarm import CachePrewarmer
+from user_identity import UserIdentityResolver
 
 # 안전한 processor 임포트
 try:
@@ -30,9 +42,11 @@ except ImportError as e:
         async def process_excel_file(self, file_path):
             return {"success": False, "error": "프로세서를 사용할 수 없습니다"}
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+# 로깅 설정 (큐 기반 비동기 구조화 로깅)
+from log_pipeline import setup_logging, get_logger, pipeline_stats
+from middleware import LoggingMiddleware
+setup_logging()
+logger = get_logger(__name__)
 
 # 환경변수 로드 - 여러 위치에서 .env 파일 찾기
 possible_env_paths = [
@@ -91,6 +105,119 @@ app.add_middleware(
 )
 logger.info(f"큐네임 서비스 CORS 설정 완료: {cors_origins}")
 
+# 요청 로깅 미들웨어 (요청 ID, X-Debug-Log 요청 단위 DEBUG)
+app.add_middleware(LoggingMiddleware)
+
+# 엑셀 업로드 최대 크기
+MAX_UPLOAD_BYTES = int(os.getenv("QNAME_MAX_UPLOAD_MB", "50")) * 1024 * 1024
+
+# JSON/NDJSON 배치 요청당 최대 키워드 수
+BATCH_MAX_KEYWORDS = int(os.getenv("QNAME_BATCH_MAX_KEYWORDS", "10000"))
+
+# 결과 파일 저장소 (내용 해시 경로, 백그라운드 용량/기간 정리)
+artifact_store = ArtifactStore()
+ARTIFACT_EVICTION_INTERVAL = float(os.getenv("QNAME_ARTIFACT_EVICTION_INTERVAL", "300"))
+
+# 같은 파일 재업로드 시 이전 결과 아티팩트를 바로 반환 (업로드 해시 + 결과 버전 + 옵션 기준)
+result_cache = FileResultCache(artifact_store) if os.getenv("QNAME_RESULT_CACHE", "true").lower() == "true" else None
+
+# naver.xlsx 변경 감시 주기 (초, 0이면 감시 안 함 - 재로드 엔드포인트만 사용)
+CATEGORY_WATCH_INTERVAL = float(os.getenv("QNAME_CATEGORY_WATCH_INTERVAL", "30"))
+
+# 관리용 엔드포인트 토큰 (설정 시 X-Admin-Token 헤더 필요)
+ADMIN_TOKEN = os.getenv("QNAME_ADMIN_TOKEN")
+
+# 스케줄러 공정 분배 사용자 - main-api 로그인 토큰(QNAME_JWT_SECRET/JWT_SECRET)의 sub,
+# 내부 호출(X-Internal-Token = QNAME_INTERNAL_TOKEN)만 X-User-ID 사용, 그 외는 IP 기준 (user_identity.py)
+user_identity = UserIdentityResolver()
+
+def scheduler_user(request: Request) -> str:
+    return user_identity.resolve(request.headers, request.client.host if request.client else None)
+
+# 이벤트 루프 멈춤 감시 (임계값 초과 시 루프 스레드 스택을 로그로 남김)
+loop_watchdog = LoopLagWatchdog() if os.getenv("QNAME_LOOP_WATCHDOG", "true").lower() == "true" else None
+
+@app.on_event("startup")
+async def start_background_tasks():
+    if loop_watchdog:
+        loop_watchdog.start()
+    asyncio.create_task(artifact_store.run_eviction_loop(ARTIFACT_EVICTION_INTERVAL))
+    logger.info(f"아티팩트 저장소 정리 작업 시작: {artifact_store.root}")
+    if PROCESSOR_AVAILABLE and os.getenv("QNAME_WARM_PROCESSOR", "true").lower() == "true":
+        # 헬스체크는 바로 응답하고, 카테고리 인덱스 로드는 백그라운드 스레드에서 진행
+        asyncio.create_task(asyncio.to_thread(get_processor))
+    if PROCESSOR_AVAILABLE and CATEGORY_WATCH_INTERVAL > 0:
+        asyncio.create_task(watch_category_data(CATEGORY_WATCH_INTERVAL))
+    if enricher:
+        asyncio.create_task(enricher.run())
+    if prewarmer and os.getenv("QNAME_PREWARM", "true").lower() == "true":
+        asyncio.create_task(prewarmer.run_schedule())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    if loop_watchdog:
+        loop_watchdog.stop()
+    shutdown_io_executor(wait=False)
+
+async def watch_category_data(interval_seconds: float):
+    """naver.xlsx 변경 시 백그라운드에서 새 카테고리 인덱스를 만들어 교체"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        if _processor is None:
+            continue
+        try:
+            await run_io(_processor.category_mapper.reload)
+        except Exception as e:
+            logger.error(f"카테고리 데이터 감시 오류: {str(e)}")
+
+# 사용자별 가중 공정 스케줄러 (작업 간 업스트림 동시 실행 슬롯 분배)
+scheduler = FairScheduler()
+
+# 대용량 파일 샤드 분산 처리 (QNAME_WORKER_URLS 설정 시 코디네이터 모드)
+shard_coordinator = ShardCoordinator.from_env()
+if shard_coordinator:
+    logger.info(f"샤드 코디네이터 모드: 워커 {len(shard_coordinator.workers)}개, 샤드 {shard_coordinator.shard_size}행, "
+                f"{shard_coordinator.min_rows}행 이상만 분산")
+
+# 공용 프로세서 인스턴스 (카테고리 데이터를 요청마다 다시 로드하지 않도록 재사용)
+_processor = None
+_processor_lock = threading.Lock()
+
+def get_processor() -> OptimizedQNameProcessor:
+    """공용 QName 프로세서 반환 (최초 호출 시 생성, 시작 시 백그라운드 워밍과 경합해도 한 번만 생성)"""
+    global _processor
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                started = datetime.now()
+                processor = OptimizedQNameProcessor()
+                processor.scheduler = scheduler
+                _processor = processor
+                logger.info(f"QName 프로세서 준비 완료: {(datetime.now() - started).total_seconds():.2f}초")
+    return _processor
+
+async def file_processor_for(path: str):
+    """업로드 파일을 처리할 프로세서 - 코디네이터 모드라도 작은 파일은 샤드 없이 공용 프로세서로"""
+    if shard_coordinator:
+        try:
+            rows = await run_io(count_data_rows, path, shard_coordinator.min_rows)
+        except Exception as e:
+            # 읽을 수 없는 파일은 공용 프로세서가 처리 실패 결과로 돌려줌
+            logger.warning(f"업로드 행 수 확인 실패 - 샤드 없이 처리: {str(e)}")
+            rows = None
+        if rows is not None and shard_coordinator.should_shard(rows):
+            return shard_coordinator
+        if rows is not None:
+            logger.info(f"샤드 분산 생략: {rows}행 < {shard_coordinator.min_rows}행 (QNAME_SHARD_MIN_ROWS)")
+    return await asyncio.to_thread(get_processor)
+
+# 업스트림 오류/시간 예산으로 기본값을 쓴 행을 백그라운드에서 다시 처리해 결과 파일 갱신
+enricher = SecondPassEnricher(get_processor, artifact_store, result_cache) \
+    if PROCESSOR_AVAILABLE and os.getenv("QNAME_SECOND_PASS", "true").lower() == "true" else None
+
+# 한가한 시간에 자주 쓰는 키워드/카테고리로 캐시 예열 (예약 실행 + 관리용 엔드포인트)
+prewarmer = CachePrewarmer(get_processor) if PROCESSOR_AVAILABLE else None
+
 @app.get("/", tags=["루트"])
 async def root():
     return {"message": "QName 서비스에 오신 것을 환영합니다.", "version": "2.0.0"}
@@ -118,11 +245,29 @@ async def service_status():
             "environment": os.getenv("ENVIRONMENT", "development"),
             "cors_origins": len(cors_origins),
             "api_keys_status": api_status,
+            "logging": pipeline_stats(),
+            "sharding": shard_coordinator.stats() if shard_coordinator else None,
+            "event_loop": loop_watchdog.stats() if loop_watchdog else None,
+            "result_cache": result_cache.stats() if result_cache else None,
+            "enrichment": enricher.stats() if enricher else None,
+            "prewarm": prewarmer.stats() if prewarmer else None,
+            "credentials": {
+                "gemini": _processor.gemini_credentials.stats(),
+                "naver": _processor.naver_credentials.stats()
+            } if _processor else None,
+            "singleflight": _processor.singleflight_stats() if _processor else None,
+            "models": _processor.model_stats() if _processor else None,
+            "category_index": _category_index_info() if _processor else None,
             "endpoints": [
                 "/",
                 "/health", 
                 "/api/qname/status",
-                "/api/qname/process-file"
+                "/api/qname/process-file",
+                "/api/qname/process-batch",
+                "/api/qname/artifacts/{artifact_id}",
+                "/api/qname/enrichment/{job_id}",
+                "/api/qname/category/reload",
+                "/api/qname/prewarm"
             ]
         }
     except Exception as e:
@@ -136,10 +281,15 @@ async def service_status():
 
 @app.post("/api/qname/process-file", tags=["큐네임"])
 async def process_excel_file(
-    file: UploadFile = File(...)
+    request: Request,
+    file: UploadFile = File(...),
+    time_budget: float = Form(None)
 ):
-    """엑셀 파일을 업로드하여 상품명을 생성합니다."""
+    """엑셀 파일을 업로드하여 상품명을 생성합니다.
+    time_budget(초)을 주면 예산이 부족해질 때 남은 행을 간소화 모드로 처리합니다."""
+    user_id = scheduler_user(request)
     temp_file_path = None
+    output_temp_path = None
     try:
         logger.info(f"=== 파일 처리 요청 시작 ===")
         logger.info(f"파일명: {file.filename}")
@@ -151,34 +301,51 @@ async def process_excel_file(
         if not file.filename.endswith((".xlsx", ".xls")):
             raise HTTPException(status_code=400, detail="엑셀 파일(.xlsx, .xls)만 업로드 가능합니다.")
         
-        # 이전 임시 파일들 정리
-        for old_temp_file in glob.glob("temp_*.xlsx"):
-            try:
-                os.remove(old_temp_file)
-                logger.info(f"이전 임시 파일 삭제: {old_temp_file}")
-            except Exception as e:
-                logger.warning(f"임시 파일 삭제 실패: {old_temp_file}, 오류: {e}")
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=str(UploadTooLarge(MAX_UPLOAD_BYTES)))
         
-        # 고유한 임시 파일명 생성
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        temp_file_path = f"temp_{timestamp}_{file.filename}"
+        # 고유한 임시 파일명 생성 (오래된 임시 파일은 저장소 백그라운드 정리에서 삭제)
+        temp_file_path = await run_io(artifact_store.new_temp_path, os.path.splitext(file.filename)[1], "upload_")
         logger.info(f"임시 파일 저장: {temp_file_path}")
         
-        # 파일 저장
-        with open(temp_file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # 파일 저장 (청크 단위 스트리밍, 크기 제한 즉시 적용, 해시 동시 계산)
+        try:
+            upload = await spool_upload(file, temp_file_path, MAX_UPLOAD_BYTES)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         
-        logger.info(f"파일 저장 완료: {len(content)} bytes")
+        logger.info(f"파일 저장 완료: {upload.size} bytes (sha256={upload.sha256[:12]})")
         
         # 파일 처리 (비동기)
         logger.info(f"=== 파일 처리 시작 ===")
         logger.info(f"임시 파일 경로: {temp_file_path}")
         logger.info(f"현재 작업 디렉토리: {os.getcwd()}")
-        logger.info(f"임시 파일 크기: {os.path.getsize(temp_file_path)} bytes")
         
-        processor = OptimizedQNameProcessor()
-        result = await processor.process_excel_file(temp_file_path)
+        # 코디네이터 모드에서 QNAME_SHARD_MIN_ROWS 이상인 파일만 워커 레플리카로 샤드 분산, 나머지는 이 인스턴스에서 처리
+        processor = await file_processor_for(temp_file_path)
+        
+        # 같은 파일/구성/옵션의 완료 결과가 있으면 처리 없이 바로 반환
+        cache_key = None
+        result_version = getattr(processor, 'result_version', None)
+        if result_cache and result_version:
+            cache_key = result_cache.make_key(upload.sha256, result_version, degraded_column=bool(time_budget))
+            cached = await run_io(result_cache.lookup, cache_key)
+            if cached:
+                logger.info(f"파일 결과 캐시 적중: 아티팩트 {cached['artifact_id']} "
+                            f"({cached['total_processed']}행, sha256={upload.sha256[:12]})")
+                return FileResponse(
+                    cached['path'],
+                    media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    filename=f"가공완료_상품명카테키워드.xlsx",
+                    headers={"X-Artifact-ID": cached['artifact_id'], "X-Degraded-Rows": "0",
+                             "X-Result-Cache": "hit"}
+                )
+        
+        output_temp_path = await run_io(artifact_store.new_temp_path, ".xlsx", "output_")
+        result = await processor.process_excel_file(
+            temp_file_path, output_path=output_temp_path, user_id=user_id,
+            time_budget=time_budget
+        )
         
         logger.info(f"=== 파일 처리 결과 ===")
         logger.info(f"성공 여부: {result['success']}")
@@ -186,6 +353,8 @@ async def process_excel_file(
             logger.info(f"총 처리 행 수: {result['total_processed']}")
             logger.info(f"성공 행 수: {result['success_count']}")
             logger.info(f"실패 행 수: {result['error_count']}")
+            if result.get('degraded_count'):
+                logger.info(f"간소화 처리 행 수: {result['degraded_count']} (시간 예산 {time_budget}초)")
             logger.info(f"출력 파일: {result['output_file']}")
         else:
             logger.error(f"처리 실패: {result['error']}")
@@ -194,23 +363,37 @@ async def process_excel_file(
             logger.error(f"파일 처리 실패: {result['error']}")
             raise HTTPException(status_code=500, detail=f"파일 처리 중 오류가 발생했습니다: {result['error']}")
         
-        # 결과 파일 반환
-        output_file = result['output_file']
+        # 결과 파일을 저장소에 등록 후 반환 (해시 계산/파일 이동은 I/O 스레드에서)
+        artifact_id = await run_io(artifact_store.put_file, result['output_file'])
+        output_temp_path = None
+        output_file = await run_io(artifact_store.path_for, artifact_id)
+        if cache_key:
+            await run_io(result_cache.store, cache_key, artifact_id, result)
+        
+        # 기본값으로 채운 행은 2차 보강 큐에 등록 (진행 상황/갱신 파일은 X-Enrichment-Job으로 조회)
+        enrichment_job = None
+        if enricher and result.get('degraded_count') and result.get('results') is not None:
+            enrichment_job = enricher.submit(artifact_id, result['results'], user_id=user_id,
+                                             flag_degraded=bool(time_budget), cache_key=cache_key)
         logger.info(f"=== 결과 파일 반환 준비 ===")
-        logger.info(f"결과 파일 경로: {output_file}")
-        logger.info(f"결과 파일 존재 여부: {os.path.exists(output_file)}")
+        logger.info(f"결과 아티팩트: {artifact_id} ({output_file})")
         
-        if os.path.exists(output_file):
-            file_size = os.path.getsize(output_file)
+        file_size = await run_io(_file_size, output_file) if output_file else None
+        if file_size is not None:
             logger.info(f"결과 파일 반환: {output_file}")
             logger.info(f"결과 파일 크기: {file_size} bytes")
             logger.info(f"처리 결과: {result['total_processed']}행 중 {result['success_count']}행 성공")
             logger.info(f"응답 전송 시간: {datetime.now().isoformat()}")
             
+            headers = {"X-Artifact-ID": artifact_id, "X-Degraded-Rows": str(result.get('degraded_count', 0)),
+                       "X-Result-Cache": "miss"}
+            if enrichment_job:
+                headers["X-Enrichment-Job"] = enrichment_job
             return FileResponse(
                 output_file,
                 media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                filename=f"가공완료_상품명카테키워드.xlsx"
+                filename=f"가공완료_상품명카테키워드.xlsx",
+                headers=headers
             )
         else:
             logger.error("결과 파일이 생성되지 않았습니다.")
@@ -225,62 +408,71 @@ async def process_excel_file(
         raise HTTPException(status_code=500, detail=f"파일 처리 중 오류가 발생했습니다: {str(e)}")
     finally:
         # 임시 파일 정리
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-                logger.info(f"임시 파일 정리 완료: {temp_file_path}")
-            except Exception as e:
-                logger.warning(f"임시 파일 정리 실패: {temp_file_path}, 오류: {e}")
+        for path in (temp_file_path, output_temp_path):
+            if path:
+                try:
+                    if await run_io(artifact_store.discard_temp, path):
+                        logger.info(f"임시 파일 정리 완료: {path}")
+                except Exception as e:
+                    logger.warning(f"임시 파일 정리 실패: {path}, 오류: {e}")
+
+def _file_size(path: str):
+    """파일 크기 (없으면 None)"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+@app.get("/api/qname/artifacts/{artifact_id}", tags=["큐네임"])
+async def download_artifact(artifact_id: str):
+    """아티팩트 ID로 결과 파일을 다시 다운로드합니다."""
+    path = await run_io(artifact_store.path_for, artifact_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="결과 파일을 찾을 수 없거나 보관기간이 만료되었습니다.")
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=f"가공완료_상품명카테키워드.xlsx",
+        headers={"X-Artifact-ID": artifact_id}
+    )
+
+@app.get("/api/qname/enrichment/{job_id}", tags=["큐네임"])
+async def get_enrichment_status(job_id: str):
+    """2차 보강 진행 상황을 조회합니다. 'updated'가 true이면 artifact_id로 보강된 결과 파일을 받을 수 있습니다."""
+    job = enricher.get(job_id) if enricher else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="보강 작업을 찾을 수 없습니다.")
+    return job
 
 @app.post("/api/qname/generate-single", tags=["큐네임"])
 async def generate_single_name(
+    request: Request,
     keyword: str = Form(...)
 ):
     """단일 키워드로 상품명을 생성합니다."""
+    user_id = scheduler_user(request)
     try:
         logger.info(f"단일 상품명 생성 요청: keyword={keyword}")
         
-        # 임시 파일 생성
-        import pandas as pd
-        temp_df = pd.DataFrame({
-            '상품코드': ['TEMP001'],
-            '메인키워드': [keyword]
-        })
+        if not PROCESSOR_AVAILABLE:
+            raise HTTPException(status_code=500, detail="상품명 생성에 실패했습니다: 프로세서를 사용할 수 없습니다")
         
-        temp_file = f"temp_single_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        temp_df.to_excel(temp_file, index=False)
-        
-        # 파일 처리 (비동기)
-        processor = OptimizedQNameProcessor()
-        result = await processor.process_excel_file(temp_file)
+        # 엑셀 임시 파일 없이 메모리에서 바로 처리 (준비 중이면 이벤트 루프를 막지 않고 기다림)
+        processor = await asyncio.to_thread(get_processor)
+        row = await processor.process_single_keyword(keyword, user_id=user_id)
         
-        # 임시 파일 삭제
-        try:
-            os.remove(temp_file)
-        except:
-            pass
-        
-        if not result['success']:
-            raise HTTPException(status_code=500, detail=f"상품명 생성에 실패했습니다: {result['error']}")
-        
-        # 결과 읽기
-        output_df = pd.read_excel(result['output_file'])
-        if len(output_df) > 0:
-            row = output_df.iloc[0]
-            return {
-                "status": "success",
-                "data": {
-                    "keyword": keyword,
-                    "product_name": row.get('SEO상품명', ''),
-                    "category_code": row.get('NAVERCODE', ''),
-                    "category_format": row.get('카테분류형식', ''),
-                    "related_keywords": row.get('연관검색어', ''),
-                    "naver_tags": row.get('네이버태그', '')
-                },
-                "message": "상품명이 생성되었습니다."
-            }
-        else:
-            raise HTTPException(status_code=500, detail="상품명 생성 결과를 읽을 수 없습니다.")
+        return {
+            "status": "success",
+            "data": {
+                "keyword": keyword,
+                "product_name": row.get('product_name', ''),
+                "category_code": row.get('naver_code', ''),
+                "category_format": row.get('category_format', ''),
+                "related_keywords": row.get('related_keywords', ''),
+                "naver_tags": row.get('naver_tags', '')
+            },
+            "message": "상품명이 생성되었습니다."
+        }
             
     except HTTPException:
         raise
@@ -288,6 +480,163 @@ async def generate_single_name(
         logger.error(f"단일 상품명 생성 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=f"상품명 생성 중 오류가 발생했습니다: {str(e)}")
 
+def _parse_keyword_item(item) -> str:
+    """배치 요청 항목(문자열 또는 {"keyword": ...})에서 키워드 추출
+    빈 문자열/null은 엑셀 빈 셀과 같이 '건너뜀' 행으로 처리"""
+    if isinstance(item, dict):
+        item = item.get("keyword")
+    if item is None:
+        return ""
+    if not isinstance(item, str):
+        raise HTTPException(status_code=400, detail="키워드는 문자열이어야 합니다.")
+    return item
+
+def _category_index_info() -> dict:
+    index = get_processor().category_mapper.snapshot()
+    return {
+        "version": index.version,
+        "categories": len(index.category_map),
+        "vectorized": index.has_vectors,
+        "loaded_at": index.loaded_at.isoformat()
+    }
+
+@app.post("/api/qname/category/reload", tags=["상태"])
+async def reload_category_data(force: bool = False, x_admin_token: str = Header(None)):
+    """naver.xlsx를 다시 읽어 카테고리 인덱스를 교체합니다. (진행 중인 작업은 기존 인덱스로 완료)"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+    if not PROCESSOR_AVAILABLE:
+        raise HTTPException(status_code=500, detail="프로세서를 사용할 수 없습니다")
+    
+    processor = await asyncio.to_thread(get_processor)
+    reloaded = await run_io(processor.category_mapper.reload, force)
+    return {
+        "status": "success",
+        "reloaded": reloaded,
+        "category_index": _category_index_info()
+    }
+
+@app.post("/api/qname/prewarm", tags=["큐네임"])
+async def prewarm_caches(request: Request, x_admin_token: str = Header(None)):
+    """캐시 예열 실행 요청 - 본문 {"keywords": [...], "quota": N} 생략 시 최근 이력 상위 키워드 사용"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+    if not prewarmer:
+        raise HTTPException(status_code=500, detail="프로세서를 사용할 수 없습니다")
+
+    body = {}
+    if await request.body():
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="요청 본문이 올바른 JSON이 아닙니다.")
+    keywords = body.get("keywords") if isinstance(body, dict) else None
+    quota = body.get("quota") if isinstance(body, dict) else None
+    if keywords is not None and not isinstance(keywords, list):
+        raise HTTPException(status_code=400, detail="keywords는 문자열 배열이어야 합니다.")
+    if quota is not None and (not isinstance(quota, int) or quota < 0):
+        raise HTTPException(status_code=400, detail="quota는 0 이상의 정수여야 합니다.")
+
+    keywords = [str(keyword) for keyword in keywords] if keywords else None
+    try:
+        prewarmer.start(keywords, quota)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {
+        "status": "started",
+        "source": "keywords" if keywords else "history",
+        "quota": prewarmer.quota if quota is None else quota
+    }
+
+async def _read_batch_keywords(request: Request) -> list:
+    """JSON 배열 또는 NDJSON 스트림 요청 본문에서 키워드 목록 읽기"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    keywords = []
+    
+    if content_type in ("application/x-ndjson", "application/jsonl", "application/json-seq"):
+        # NDJSON은 줄 단위로 읽어 본문 전체를 한 번에 파싱하지 않음
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    keywords.append(_parse_keyword_item(json.loads(line)))
+            if len(keywords) > BATCH_MAX_KEYWORDS:
+                break
+        if buffer.strip() and len(keywords) <= BATCH_MAX_KEYWORDS:
+            keywords.append(_parse_keyword_item(json.loads(buffer)))
+    else:
+        body = await request.json()
+        if isinstance(body, dict):
+            body = body.get("keywords")
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="키워드 배열 또는 {\"keywords\": [...]} 형식이어야 합니다.")
+        keywords = [_parse_keyword_item(item) for item in body]
+    
+    if not keywords:
+        raise HTTPException(status_code=400, detail="처리할 키워드가 없습니다.")
+    if len(keywords) > BATCH_MAX_KEYWORDS:
+        raise HTTPException(status_code=413, detail=f"한 번에 최대 {BATCH_MAX_KEYWORDS}개 키워드까지 처리할 수 있습니다.")
+    return keywords
+
+@app.post("/api/qname/process-batch", tags=["큐네임"])
+async def process_keyword_batch(request: Request, time_budget: float = None):
+    """JSON 배열 또는 NDJSON 키워드 목록을 처리하고 결과를 NDJSON으로 스트리밍합니다.
+    time_budget(초, 쿼리 파라미터)을 주면 예산이 부족해질 때 남은 행을 간소화 모드로 처리합니다."""
+    user_id = scheduler_user(request)
+    try:
+        keywords = await _read_batch_keywords(request)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON 형식 오류: {str(e)}")
+    
+    if not PROCESSOR_AVAILABLE:
+        raise HTTPException(status_code=500, detail="프로세서를 사용할 수 없습니다")
+    
+    logger.info(f"배치 처리 요청: {len(keywords)}개 키워드")
+    processor = await asyncio.to_thread(get_processor)
+    batch_size = processor.calculate_optimal_batch_size(len(keywords))
+    
+    async def stream_results():
+        index = 0
+        success_count = 0
+        degraded_count = 0
+        try:
+            async for batch_results in processor.iter_keywords_async(keywords, batch_size, user_id=user_id,
+                                                                     time_budget=time_budget):
+                for row in batch_results:
+                    if row.get('status') == '완료':
+                        success_count += 1
+                    if row.get('degraded'):
+                        degraded_count += 1
+                    line = {
+                        "index": index,
+                        "keyword": row.get('keyword', ''),
+                        "canonical_keyword": row.get('canonical_keyword', ''),
+                        "product_name": row.get('product_name', ''),
+                        "category_code": row.get('naver_code', ''),
+                        "category_format": row.get('category_format', ''),
+                        "related_keywords": row.get('related_keywords', ''),
+                        "naver_tags": row.get('naver_tags', ''),
+                        "status": row.get('status', '실패'),
+                        "degraded": bool(row.get('degraded'))
+                    }
+                    index += 1
+                    yield json.dumps(line, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"배치 처리 중 오류 발생: {str(e)}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+        
+        summary = {
+            "total_processed": index,
+            "success_count": success_count,
+            "error_count": index - success_count,
+            "degraded_count": degraded_count
+        }
+        yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 @app.get("/api/qname/health", tags=["상태"])
 async def qname_health_check():
     """QName 서비스의 상세 상태를 확인합니다."""
@@ -316,11 +665,11 @@ async def qname_health_check():
 async def get_queue_status():
     """현재 처리 대기량을 조회합니다."""
     try:
-        # 현재 처리 중인 작업 수 (임시로 0으로 설정, 실제로는 세션 관리 필요)
-        processing_count = 0
+        stats = scheduler.stats()
         
-        # 대기 중인 작업 수 (임시로 0으로 설정, 실제로는 큐 시스템 필요)
-        waiting_count = 0
+        # 현재 처리 중인 행 수 / 슬롯을 기다리는 행 수
+        processing_count = stats['in_flight']
+        waiting_count = stats['waiting']
         
         # 총 대기량
         total_queue_count = processing_count + waiting_count
@@ -333,6 +682,7 @@ async def get_queue_status():
                 "processing_count": processing_count,
                 "waiting_count": waiting_count,
                 "total_queue_count": total_queue_count,
+                "lanes": stats['lanes'],
                 "message": f"현재 총 처리대기량은 {total_queue_count}개 입니다"
             }
         }
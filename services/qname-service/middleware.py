@@ -1,100 +1,91 @@
 import time
 import uuid
-from fastapi import Request, Response
+from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
-from logger_config import logger
+from log_pipeline import get_logger, REQUEST_DEBUG, REQUEST_ID, debug_requested, redact_headers
+
+logger = get_logger(__name__)
 
 class LoggingMiddleware(BaseHTTPMiddleware):
-    """로깅 미들웨어"""
+    """로깅 미들웨어 - 요청당 접근 로그 1건, X-Debug-Log 헤더(LOG_DEBUG_TOKEN 일치)로 요청 단위 DEBUG 활성화"""
     
     async def dispatch(self, request: Request, call_next):
         # 요청 시작 시간
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # 요청 ID 생성
-        request_id = str(uuid.uuid4())
+        # 요청 ID (상위 서비스에서 전달되면 재사용)
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
         
         # 사용자 ID 추출 (헤더에서)
         user_id = request.headers.get("X-User-ID")
         
-        # 요청 로깅
-        logger.log_request(
-            method=request.method,
-            endpoint=str(request.url.path),
-            user_id=user_id,
-            request_id=request_id,
-            query_params=dict(request.query_params),
-            headers=dict(request.headers)
-        )
+        # 요청 컨텍스트 설정 (엔드포인트와 프로세서 로그에 전파됨)
+        debug_enabled = debug_requested(request.headers)
+        debug_token = REQUEST_DEBUG.set(debug_enabled)
+        request_id_token = REQUEST_ID.set(request_id)
         
         try:
             # 다음 미들웨어/엔드포인트 호출
             response = await call_next(request)
-            
-            # 응답 시간 계산
-            response_time = time.time() - start_time
-            
-            # 응답 로깅
-            logger.log_response(
-                method=request.method,
-                endpoint=str(request.url.path),
-                status_code=response.status_code,
-                response_time=response_time,
-                user_id=user_id,
-                request_id=request_id
-            )
-            
-            # 응답 헤더에 요청 ID 추가
-            response.headers["X-Request-ID"] = request_id
-            
-            return response
-            
         except Exception as e:
             # 에러 발생 시 로깅
-            response_time = time.time() - start_time
-            
-            logger.log_error(
-                error=e,
-                context={
+            logger.error(
+                "요청 처리 오류",
+                exc_info=e,
+                extra={
+                    "category": "access",
                     "method": request.method,
-                    "endpoint": str(request.url.path),
+                    "path": request.url.path,
                     "user_id": user_id,
-                    "request_id": request_id
-                },
-                user_id=user_id
-            )
-            
-            # 에러 응답 로깅
-            logger.log_response(
-                method=request.method,
-                endpoint=str(request.url.path),
-                status_code=500,
-                response_time=response_time,
-                user_id=user_id,
-                request_id=request_id,
-                error=str(e)
+                    "duration_ms": round((time.perf_counter() - start_time) * 1000, 1)
+                }
             )
-            
             raise
+        finally:
+            REQUEST_DEBUG.reset(debug_token)
+            REQUEST_ID.reset(request_id_token)
+        
+        # 응답 로깅 (헤더 전체는 DEBUG 요청에서만)
+        extra = {
+            "category": "access",
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "user_id": user_id,
+            "duration_ms": round((time.perf_counter() - start_time) * 1000, 1)
+        }
+        if debug_enabled:
+            extra["headers"] = redact_headers(request.headers)
+        logger.info("요청 처리 완료", extra=extra)
+        
+        # 응답 헤더에 요청 ID 추가
+        response.headers["X-Request-ID"] = request_id
+        
+        return response
 
 class PerformanceMiddleware(BaseHTTPMiddleware):
     """성능 모니터링 미들웨어"""
     
     async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         # 요청 처리
         response = await call_next(request)
         
         # 처리 시간 계산
-        duration = time.time() - start_time
+        duration = time.perf_counter() - start_time
         
         # 성능 로깅 (느린 요청만)
         if duration > 1.0:  # 1초 이상 걸린 요청
-            logger.log_performance(
-                operation=f"{request.method} {request.url.path}",
-                duration=duration,
-                status_code=response.status_code
+            logger.warning(
+                "느린 요청",
+                extra={
+                    "category": "performance",
+                    "operation": f"{request.method} {request.url.path}",
+                    "duration_ms": round(duration * 1000, 1),
+                    "status": response.status_code
+                }
             )
         
-        return response 
\ No newline at end of file
+        return response
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Gemini 단계별 모델 라우터
+한 단어짜리 prefix 추천, 상품명 생성, 태그 목록 생성이 모두 같은 pro 모델을 쓰지 않도록
+단계마다 모델 체인(우선 모델 → 대체 모델)을 두고 호출합니다.
+- 우선 모델이 오류를 내면 같은 호출을 체인의 다음 모델로 재시도
+- 단계별 최근 지연(지수 이동 평균)이 임계값을 넘거나 오류가 이어지면 그 모델을 일정 시간 건너뜀
+  (기간이 지나면 다시 시도해 회복 여부 확인)
+- 단계/모델별 호출 수, 지연, 토큰 수, 추정 비용 기록 (상태 엔드포인트에서 확인)
+
+환경변수:
+- QNAME_MODEL_PREFIX / QNAME_MODEL_NAME / QNAME_MODEL_TAGS: 단계별 모델 체인 (쉼표 구분, 앞이 우선)
+- QNAME_MODEL_SLOW_SECONDS: 단계별 느림 임계값 ('prefix=2,name=8,tags=6' 형식, 일부만 지정 가능)
+- QNAME_MODEL_COOLDOWN_SECONDS: 느리거나 오류가 이어진 모델을 건너뛰는 시간 (기본 60초)
+- QNAME_MODEL_COSTS: 모델별 100만 토큰당 비용(USD) '모델=입력/출력' 쉼표 구분 (기본표 덮어쓰기)
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGE_PREFIX = 'prefix'
+STAGE_NAME = 'name'
+STAGE_TAGS = 'tags'
+STAGES = (STAGE_PREFIX, STAGE_NAME, STAGE_TAGS)
+
+PRO_MODEL = 'models/gemini-1.5-pro-latest'
+FLASH_MODEL = 'models/gemini-1.5-flash-latest'
+FLASH_8B_MODEL = 'models/gemini-1.5-flash-8b'
+
+# 단계별 기본 체인 - 상품명만 pro, 한 단어 prefix와 태그 목록은 flash 계열
+DEFAULT_ROUTES = {
+    STAGE_PREFIX: (FLASH_8B_MODEL, FLASH_MODEL),
+    STAGE_NAME: (PRO_MODEL, FLASH_MODEL),
+    STAGE_TAGS: (FLASH_MODEL, FLASH_8B_MODEL),
+}
+
+# 단계별 느림 임계값 (초, 최근 지연 평균 기준)
+DEFAULT_SLOW_SECONDS = {STAGE_PREFIX: 2.0, STAGE_NAME: 8.0, STAGE_TAGS: 6.0}
+
+# 100만 토큰당 비용 (USD, 입력/출력) - 128k 이하 프롬프트 공개 가격
+DEFAULT_COSTS = {
+    PRO_MODEL: (1.25, 5.00),
+    FLASH_MODEL: (0.075, 0.30),
+    FLASH_8B_MODEL: (0.0375, 0.15),
+}
+
+# 최근 지연/오류율 지수 이동 평균 가중치
+SMOOTHING = 0.2
+# 오류율이 이 값을 넘으면 건너뜀
+ERROR_RATE_THRESHOLD = 0.5
+# 지연 평균으로 판단하기 전 최소 호출 수
+MIN_CALLS = 3
+# 체인 마지막이 아닌 모델의 호출 제한 시간 = 느림 임계값 × 이 배수
+TIMEOUT_FACTOR = 3
+
+
+def parse_model_chain(value: str) -> Tuple[str, ...]:
+    """'models/a,models/b' 형식의 모델 체인 파싱"""
+    return tuple(name.strip() for name in (value or "").split(",") if name.strip())
+
+
+def parse_stage_seconds(value: str) -> Dict[str, float]:
+    """'prefix=2,name=8' 형식의 단계별 시간 파싱"""
+    seconds = {}
+    for item in (value or "").split(","):
+        stage, separator, number = item.partition("=")
+        if not separator or stage.strip() not in STAGES:
+            continue
+        try:
+            seconds[stage.strip()] = float(number)
+        except ValueError:
+            continue
+    return seconds
+
+
+def parse_model_costs(value: str) -> Dict[str, Tuple[float, float]]:
+    """'models/a=1.25/5,models/b=0.075/0.3' 형식의 모델 비용 파싱"""
+    costs = {}
+    for item in (value or "").split(","):
+        name, separator, prices = item.partition("=")
+        input_price, slash, output_price = prices.partition("/")
+        if not separator or not slash:
+            continue
+        try:
+            costs[name.strip()] = (float(input_price), float(output_price))
+        except ValueError:
+            continue
+    return costs
+
+
+def load_model_routes() -> Dict[str, Tuple[str, ...]]:
+    """환경변수 설정을 반영한 단계별 모델 체인"""
+    return {
+        stage: parse_model_chain(os.getenv(f"QNAME_MODEL_{stage.upper()}", "")) or DEFAULT_ROUTES[stage]
+        for stage in STAGES
+    }
+
+
+def routes_signature(routes: Dict[str, Tuple[str, ...]]) -> str:
+    """결과 캐시 버전용 라우팅 식별자 (단계별 우선 모델)"""
+    return ",".join(f"{stage}={routes[stage][0]}" for stage in STAGES)
+
+
+def _estimate_tokens(text: str) -> int:
+    """사용량 메타데이터가 없을 때의 토큰 수 추정 (한글 기준 대략 2자당 1토큰)"""
+    return max(1, len(text or '') // 2)
+
+
+class _RouteStats:
+    """단계 × 모델 1개의 호출 지표와 건너뛰기 상태"""
+
+    __slots__ = ('calls', 'errors', 'fallbacks', 'latency_ewma', 'latency_total', 'latency_max', 'error_rate',
+                 'input_tokens', 'output_tokens', 'cost_usd', 'skipped_until', 'skip_count', 'last_error')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.latency_ewma = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.error_rate = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.skipped_until = 0.0
+        self.skip_count = 0
+        self.last_error: Optional[str] = None
+
+    def to_dict(self, now: float) -> dict:
+        successes = self.calls - self.errors
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'fallbacks': self.fallbacks,
+            'avg_latency_ms': round(self.latency_total / successes * 1000, 1) if successes else None,
+            'recent_latency_ms': round(self.latency_ewma * 1000, 1),
+            'max_latency_ms': round(self.latency_max * 1000, 1),
+            'error_rate': round(self.error_rate, 3),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'cost_usd': round(self.cost_usd, 6),
+            'skipped_seconds': round(max(0.0, self.skipped_until - now), 1),
+            'skip_count': self.skip_count,
+            'last_error': self.last_error
+        }
+
+
+class ModelRouter:
+    """단계별 모델 체인으로 Gemini 호출 - GenerativeModel.generate_content에 stage 인자만 추가한 형태
+    model_factory(모델 이름)는 generate_content를 가진 모델을 반환 (운영: 키 풀을 쓰는 PooledGeminiModel)"""
+
+    def __init__(self, model_factory: Callable[[str], object], routes: Dict[str, Tuple[str, ...]] = None,
+                 slow_seconds: Dict[str, float] = None, cooldown_seconds: float = None,
+                 costs: Dict[str, Tuple[float, float]] = None, request_timeouts: bool = True):
+        self._model_factory = model_factory
+        self.routes = routes or load_model_routes()
+        self.slow_seconds = dict(DEFAULT_SLOW_SECONDS)
+        self.slow_seconds.update(slow_seconds if slow_seconds is not None else parse_stage_seconds(
+            os.getenv("QNAME_MODEL_SLOW_SECONDS", "")))
+        self.cooldown_seconds = cooldown_seconds if cooldown_seconds is not None else float(
+            os.getenv("QNAME_MODEL_COOLDOWN_SECONDS", "60"))
+        self.costs = dict(DEFAULT_COSTS)
+        self.costs.update(costs if costs is not None else parse_model_costs(os.getenv("QNAME_MODEL_COSTS", "")))
+        self.request_timeouts = request_timeouts
+        self._models: Dict[str, object] = {}
+        self._stats: Dict[Tuple[str, str], _RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def _model_for(self, model_name: str):
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._model_factory(model_name)
+                self._models[model_name] = model
+            return model
+
+    def _route_stats(self, stage: str, model_name: str) -> _RouteStats:
+        stats = self._stats.get((stage, model_name))
+        if stats is None:
+            stats = self._stats[(stage, model_name)] = _RouteStats()
+        return stats
+
+    def candidates(self, stage: str) -> List[str]:
+        """이번 호출에 시도할 모델 순서 (건너뛰는 중인 모델 제외, 체인 마지막 모델은 항상 포함)"""
+        chain = self.routes.get(stage) or self.routes[STAGE_NAME]
+        now = time.monotonic()
+        with self._lock:
+            available = [name for name in chain[:-1] if self._route_stats(stage, name).skipped_until <= now]
+        return available + [chain[-1]]
+
+    def generate_content(self, prompt: str, stage: str = STAGE_NAME, **kwargs):
+        """체인 순서대로 호출 - 오류면 다음 모델로 재시도, 마지막 모델 오류는 그대로 전달"""
+        candidates = self.candidates(stage)
+        for position, model_name in enumerate(candidates):
+            is_last = position == len(candidates) - 1
+            call_kwargs = dict(kwargs)
+            if self.request_timeouts and not is_last:
+                # 대체 모델이 남아 있으면 오래 붙잡지 않고 넘어감
+                call_kwargs.setdefault('request_options', {'timeout': self.slow_seconds[stage] * TIMEOUT_FACTOR})
+            started = time.perf_counter()
+            try:
+                response = self._model_for(model_name).generate_content(prompt, **call_kwargs)
+                text = response.text
+            except Exception as e:
+                self._record_error(stage, model_name, time.perf_counter() - started, e, fallback=not is_last)
+                if is_last:
+                    raise
+                logger.warning(f"Gemini {stage} 단계 {model_name} 오류 - {candidates[position + 1]}로 대체: "
+                               f"{str(e)[:120]}")
+                continue
+            self._record_success(stage, model_name, time.perf_counter() - started, prompt, text, response)
+            return response
+
+    def _record_success(self, stage: str, model_name: str, latency: float, prompt: str, text: str, response):
+        usage = getattr(response, 'usage_metadata', None)
+        input_tokens = getattr(usage, 'prompt_token_count', None) or _estimate_tokens(prompt)
+        output_tokens = getattr(usage, 'candidates_token_count', None) or _estimate_tokens(text)
+        input_price, output_price = self.costs.get(model_name, (0.0, 0.0))
+        with self._lock:
+            stats = self._route_stats(stage, model_name)
+            stats.calls += 1
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            stats.latency_ewma = latency if stats.calls == 1 else \
+                stats.latency_ewma * (1 - SMOOTHING) + latency * SMOOTHING
+            stats.error_rate *= (1 - SMOOTHING)
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost_usd += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+            slow = stats.calls - stats.errors >= MIN_CALLS and stats.latency_ewma > self.slow_seconds[stage]
+            if slow:
+                self._skip(stage, model_name, stats, f"최근 지연 {stats.latency_ewma:.1f}초")
+
+    def _record_error(self, stage: str, model_name: str, latency: float, error: Exception, fallback: bool):
+        with self._lock:
+            stats = self._route_stats(stage, model_name)
+            stats.calls += 1
+            stats.errors += 1
+            stats.fallbacks += 1 if fallback else 0
+            stats.latency_max = max(stats.latency_max, latency)
+            stats.error_rate = stats.error_rate * (1 - SMOOTHING) + SMOOTHING
+            stats.last_error = str(error)[:200]
+            if stats.error_rate > ERROR_RATE_THRESHOLD:
+                self._skip(stage, model_name, stats, f"오류율 {stats.error_rate:.2f}")
+
+    def _skip(self, stage: str, model_name: str, stats: _RouteStats, reason: str):
+        """체인 마지막 모델이 아니면 cooldown 동안 건너뜀 (잠금 안에서 호출)
+        기간이 지나 다시 시도할 때 곧바로 다시 건너뛰지 않도록 지연/오류 평균을 절반으로 낮춤"""
+        chain = self.routes.get(stage, ())
+        if not chain or model_name == chain[-1] or stats.skipped_until > time.monotonic():
+            return
+        stats.skipped_until = time.monotonic() + self.cooldown_seconds
+        stats.skip_count += 1
+        stats.latency_ewma /= 2
+        stats.error_rate /= 2
+        logger.warning(f"Gemini {stage} 단계 {model_name} {self.cooldown_seconds:.0f}초 동안 건너뜀 ({reason})")
+
+    def stats(self) -> dict:
+        """단계별 모델 체인과 모델별 지표"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                stage: {
+                    'chain': list(self.routes[stage]),
+                    'models': {model_name: stats.to_dict(now)
+                               for (route_stage, model_name), stats in self._stats.items() if route_stage == stage}
+                }
+                for stage in STAGES
+            }
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+캐시 예열 (prewarm)
+캐시는 키워드를 한 번 처리한 뒤에야 도움이 되므로 매일 아침 첫 업로드가 항상 느립니다.
+한가한 시간에 최근 작업 이력(keyword_history.py)에서 자주 나온 키워드/카테고리를 골라
+(또는 주어진 키워드 목록으로) 네이버 응답/상품명/연관검색어 캐시와 카테고리 테이블을 미리 채웁니다.
+
+- 업스트림 호출은 background 레인에서 실행 (bulk 대기 행이 있으면 양보)
+- 예산: 예열 1회당 업스트림 호출 수 한도 QNAME_PREWARM_QUOTA (기본 500회, 예열이 보낸 키 풀 요청 수 기준 -
+  같은 시간에 처리되는 사용자 요청의 호출은 세지 않음)
+  키워드별 예상 호출 수(네이버 1 + 상품명 2 + 연관검색어 1, 캐시된 단계 제외)로 대상을 고르고,
+  재시도 등으로 실제 호출이 한도를 넘으면 그 자리에서 중단
+- 예열 대상 수: QNAME_PREWARM_TOP_KEYWORDS (기본 300개), QNAME_PREWARM_TOP_CATEGORIES (기본 200개)
+- 일정: QNAME_PREWARM_HOUR 시(서버 현지 시각, 기본 5시)에 매일 1회, QNAME_PREWARM=false로 끔
+- 캐시는 프로세스 메모리에 있으므로 uvicorn 워커마다 따로 예열함 (한도도 워커별)
+
+사용 예 (서비스에 예열 요청):
+    python prewarm.py --url http://localhost:8000
+    python prewarm.py --url http://localhost:8000 --keywords keywords.txt --quota 200
+    python prewarm.py --show-history --top 30
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from canonical import stable_hash
+from credentials import count_requests
+from io_executor import run_io
+from scheduler import LANE_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+PREWARM_USER = "prewarm"
+
+# 키워드 1개를 처음부터 처리할 때의 업스트림 호출 수
+NAVER_CALLS = 1
+PRODUCT_CALLS = 2  # prefix + 상품명
+RELATED_CALLS = 1
+
+
+def estimate_upstream_calls(processor, keyword: str) -> int:
+    """키워드를 처리할 때 예상되는 업스트림 호출 수 (캐시에 있는 단계는 0, 모두 캐시돼 있으면 0)"""
+    calls = 0
+    naver_result = processor.naver_cache.peek(stable_hash(keyword))
+    if naver_result is None and processor.naver_configured:
+        calls += NAVER_CALLS
+    if not processor.model:
+        return calls
+    if naver_result is None:
+        # 카테고리를 모르면 상품명/연관검색어 캐시 키를 만들 수 없으므로 모두 호출한다고 가정
+        return calls + PRODUCT_CALLS + RELATED_CALLS
+    category_format, core_keyword = processor._extract_category_info(naver_result)
+    product_name = processor.product_name_cache.peek(stable_hash(keyword, category_format, core_keyword))
+    if product_name is None:
+        return calls + PRODUCT_CALLS + RELATED_CALLS
+    if processor.related_cache.peek(stable_hash(keyword, product_name)) is None and \
+            not processor.tag_model.suggest(category_format, product_name):
+        calls += RELATED_CALLS
+    return calls
+
+
+class CachePrewarmer:
+    """예산 안에서 자주 쓰는 키워드/카테고리로 프로세서 캐시 채우기"""
+
+    def __init__(self, processor_factory: Callable, quota: int = None, top_keywords: int = None,
+                 top_categories: int = None, hour: int = None, batch_size: int = 10):
+        self.processor_factory = processor_factory
+        self.quota = quota if quota is not None else int(os.getenv("QNAME_PREWARM_QUOTA", "500"))
+        self.top_keywords = top_keywords or int(os.getenv("QNAME_PREWARM_TOP_KEYWORDS", "300"))
+        self.top_categories = top_categories or int(os.getenv("QNAME_PREWARM_TOP_CATEGORIES", "200"))
+        self.hour = hour if hour is not None else int(os.getenv("QNAME_PREWARM_HOUR", "5"))
+        self.batch_size = batch_size
+        self.running = False
+        self.next_run: Optional[datetime] = None
+        self.last_report: Optional[dict] = None
+
+    def start(self, keywords: List[str] = None, quota: int = None) -> asyncio.Task:
+        """예열을 백그라운드 태스크로 시작 (관리용 엔드포인트용, 진행 중이면 RuntimeError)"""
+        self._acquire()
+        return asyncio.create_task(self._run_logged(keywords, quota))
+
+    async def _run_logged(self, keywords: List[str], quota: int):
+        try:
+            await self._run(keywords, quota)
+        except Exception as e:
+            logger.error(f"캐시 예열 오류: {str(e)}")
+
+    def _acquire(self):
+        if self.running:
+            raise RuntimeError("캐시 예열이 이미 진행 중입니다.")
+        self.running = True
+
+    async def run_once(self, keywords: List[str] = None, quota: int = None) -> dict:
+        """예열 1회 실행 - keywords를 주면 이력 대신 그 목록을 사용"""
+        self._acquire()
+        return await self._run(keywords, quota)
+
+    async def _run(self, keywords: List[str], quota: int) -> dict:
+        started = time.monotonic()
+        quota = self.quota if quota is None else quota
+        try:
+            processor = await asyncio.to_thread(self.processor_factory)
+            report = {
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+                'source': 'keywords' if keywords else 'history',
+                'quota': quota
+            }
+            report.update(await self._warm_keywords(processor, keywords, quota))
+            report['categories_warmed'] = await run_io(self._warm_categories, processor)
+            report['duration_seconds'] = round(time.monotonic() - started, 1)
+            logger.info(f"캐시 예열 완료: 키워드 {report['warmed']}개 예열 (이미 캐시됨 {report['already_warm']}개), "
+                        f"업스트림 {report['upstream_calls']}/{quota}회, 카테고리 {report['categories_warmed']}개, "
+                        f"{report['duration_seconds']}초")
+            self.last_report = report
+            return report
+        finally:
+            self.running = False
+
+    async def _warm_keywords(self, processor, keywords: Optional[List[str]], quota: int) -> dict:
+        if keywords:
+            candidates = [processor.canonicalizer.canonicalize(keyword) for keyword in keywords]
+        else:
+            candidates = processor.keyword_history.top_keywords(self.top_keywords)
+        candidates = [keyword for keyword in dict.fromkeys(candidates) if keyword]
+
+        # 예상 호출 수가 한도 안에 드는 만큼만 (자주 나온 순서대로) 선택
+        selected, already_warm, planned = [], 0, 0
+        for keyword in candidates:
+            calls = estimate_upstream_calls(processor, keyword)
+            if calls == 0:
+                already_warm += 1
+            elif planned + calls <= quota:
+                selected.append(keyword)
+                planned += calls
+
+        result = {'candidates': len(candidates), 'already_warm': already_warm, 'warmed': 0,
+                  'planned_calls': planned, 'upstream_calls': 0, 'stopped': None}
+        if not selected:
+            return result
+        if not processor.upstream_available():
+            result['stopped'] = '업스트림 키 격리 중'
+            return result
+
+        with count_requests() as requests:
+            batches = processor.iter_keywords_async(selected, self.batch_size, user_id=PREWARM_USER,
+                                                    lane=LANE_BACKGROUND)
+            try:
+                async for batch_results in batches:
+                    result['warmed'] += sum(1 for row in batch_results if row.status == '완료' and not row.degraded)
+                    if requests.count >= quota:
+                        result['stopped'] = '업스트림 호출 한도 도달'
+                        break
+            finally:
+                await batches.aclose()
+        result['upstream_calls'] = requests.count
+        return result
+
+    def _warm_categories(self, processor) -> int:
+        """자주 나온 카테고리의 코드 조회를 미리 실행 (mmap 카테고리 테이블 페이지를 메모리에 올림)"""
+        categories = processor.keyword_history.top_categories(self.top_categories)
+        for category in categories:
+            processor.category_mapper.find_category_code(category)
+        return len(categories)
+
+    def seconds_until_next_run(self, now: datetime = None) -> float:
+        now = now or datetime.now()
+        next_run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        self.next_run = next_run
+        return (next_run - now).total_seconds()
+
+    async def run_schedule(self):
+        """매일 QNAME_PREWARM_HOUR 시에 예열 실행 (서버 시작 시 백그라운드 작업으로 실행)"""
+        while True:
+            delay = self.seconds_until_next_run()
+            logger.info(f"다음 캐시 예열: {self.next_run.isoformat(timespec='minutes')}")
+            await asyncio.sleep(delay)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"캐시 예열 오류: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'quota': self.quota,
+            'next_run': self.next_run.isoformat(timespec='minutes') if self.next_run else None,
+            'last_report': self.last_report
+        }
+
+
+def read_keyword_file(path: str) -> List[str]:
+    """한 줄에 키워드 하나인 텍스트 파일 또는 '메인키워드' 열이 있는 엑셀 파일"""
+    if path.endswith(('.xlsx', '.xls')):
+        from row_results import read_keyword_column
+        return read_keyword_column(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+async def request_prewarm(url: str, keywords: List[str] = None, quota: int = None, admin_token: str = None) -> dict:
+    """실행 중인 서비스에 예열 요청 (캐시가 서비스 프로세스 메모리에 있으므로)"""
+    import aiohttp
+    headers = {"X-Admin-Token": admin_token} if admin_token else {}
+    body = {}
+    if keywords:
+        body['keywords'] = keywords
+    if quota is not None:
+        body['quota'] = quota
+    async with aiohttp.ClientSession() as session:
+        async with session.post(f"{url.rstrip('/')}/api/qname/prewarm", json=body, headers=headers) as response:
+            data = await response.json(content_type=None)
+            if response.status >= 400:
+                raise RuntimeError(f"HTTP {response.status}: {data}")
+            return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QName 캐시 예열")
+    parser.add_argument('--url', default=os.getenv("QNAME_SERVICE_URL", "http://localhost:8000"),
+                        help="예열을 요청할 서비스 주소")
+    parser.add_argument('--keywords', default=None, help="예열할 키워드 파일 (텍스트 한 줄 하나 또는 엑셀)")
+    parser.add_argument('--quota', type=int, default=None, help="업스트림 호출 한도 (기본: 서비스 설정)")
+    parser.add_argument('--admin-token', default=os.getenv("QNAME_ADMIN_TOKEN"), help="관리자 토큰")
+    parser.add_argument('--show-history', action='store_true', help="예열 요청 대신 키워드 이력 상위 항목 출력")
+    parser.add_argument('--top', type=int, default=20, help="--show-history 출력 개수")
+    args = parser.parse_args()
+
+    if args.show_history:
+        from keyword_history import KeywordHistory
+        history = KeywordHistory.load()
+        print(f"=== 최근 {history.keep_days}일 자주 나온 키워드 ===")
+        for keyword, count in history.most_common('keywords', args.top):
+            print(f"{count:6d}  {keyword}")
+        print(f"=== 최근 {history.keep_days}일 자주 나온 카테고리 ===")
+        for category, count in history.most_common('categories', args.top):
+            print(f"{count:6d}  {category}")
+        return 0
+
+    keywords = read_keyword_file(args.keywords) if args.keywords else None
+    try:
+        result = asyncio.run(request_prewarm(args.url, keywords, args.quota, args.admin_token))
+    except Exception as e:
+        print(f"예열 요청 실패: {str(e)}")
+        return 1
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
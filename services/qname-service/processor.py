@@ -2,62 +2,48 @@
 """
 상품명 및 키워드 생성 프로세서 - 병렬 처리 최적화 버전
 배치 처리와 비동기 API 호출로 성능을 대폭 향상시킵니다.
+
+콜드 스타트 단축을 위해 pandas, aiohttp, google.generativeai는 실제로 사용하는
+시점에 임포트합니다. (모듈 임포트 시간은 bench_cold_start.py로 측정)
 """
 
+from __future__ import annotations
+
 import os
-import pandas as pd
-import requests
 import random
 import time
 import re
+import uuid
+import hashlib
 import asyncio
-import aiohttp
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime
 from dotenv import load_dotenv
-import google.generativeai as genai
-import logging
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Set, Tuple, Any, AsyncIterator, Optional
+from tag_model import LocalTagModel
+from keyword_history import KeywordHistory
+from cache import LRUCache
+from canonical import KeywordCanonicalizer, stable_hash
+from deadline import JobDeadline
+from scheduler import LANE_BULK, LANE_INTERACTIVE, LANE_BACKGROUND
+from row_results import RowResult, ResultColumns, read_keyword_column, write_results_workbook
+from io_executor import run_io
+from singleflight import SingleFlight
+from model_router import ModelRouter, STAGE_PREFIX, STAGE_NAME, STAGE_TAGS, load_model_routes, routes_signature
+from credentials import CredentialPool, PooledGeminiModel, RATE_LIMITED_STATUSES, AUTH_FAILED_STATUSES
 
 # 현재 스크립트 디렉토리 경로 (먼저 정의)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# 로깅 설정 - 파일과 콘솔 모두 출력
-import logging.handlers
-
-# 로그 디렉토리 생성
-log_dir = os.path.join(SCRIPT_DIR, 'logs')
-os.makedirs(log_dir, exist_ok=True)
-
-# 로그 파일 설정
-log_file = os.path.join(log_dir, f'qname_processor_{datetime.now().strftime("%Y%m%d")}.log')
-
-# 로거 설정
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
-
-# 파일 핸들러 (일별 로그 파일)
-file_handler = logging.handlers.TimedRotatingFileHandler(
-    log_file, 
-    when='midnight', 
-    interval=1, 
-    backupCount=7,
-    encoding='utf-8'
-)
-file_handler.setLevel(logging.INFO)
-
-# 콘솔 핸들러
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
+# 로깅 설정 - 큐 기반 비동기 파이프라인 (파일/콘솔 I/O는 별도 스레드에서 처리)
+from log_pipeline import setup_logging, get_logger
 
-# 포맷터
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
-
-# 핸들러 추가
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+# 로그 파일 (일별 로테이션, QNAME_LOG_DIR로 위치 변경 가능)
+# 임포트만으로 logs/가 생기지 않도록 파일 출력은 첫 프로세서 생성 시 붙임 (그 전에는 콘솔만)
+log_dir = os.getenv("QNAME_LOG_DIR", os.path.join(SCRIPT_DIR, 'logs'))
+log_file = os.path.join(log_dir, 'qname_processor.log')
+setup_logging()
+logger = get_logger(__name__)
 
 logger.info("QName Processor 로깅 시스템 초기화 완료")
 
@@ -114,30 +100,85 @@ if not NAVER_CLIENT_ID:
 if not NAVER_CLIENT_SECRET:
     NAVER_CLIENT_SECRET = DIRECT_NAVER_CLIENT_SECRET
 
+# 여러 키를 쓰려면 GEMINI_API_KEYS / NAVER_CREDENTIALS 설정 (credentials.py 참고)
+# 단계별 Gemini 모델은 QNAME_MODEL_PREFIX / QNAME_MODEL_NAME / QNAME_MODEL_TAGS 설정 (model_router.py 참고)
+
+# 출력 형식/프롬프트/후처리를 바꾸면 올려서 파일 결과 캐시(result_cache.py)를 무효화
+RESULT_FORMAT_VERSION = 2
+
 # 환경변수 로드 완료
 logger.info("환경변수 로드 완료")
 logger.info(f"스크립트 디렉토리: {SCRIPT_DIR}")
 
+# 카테고리 테이블 (build_category_index.py로 배포 빌드 시 미리 생성, 워커 간 mmap 공유)
+CATEGORY_SOURCE_FILE = os.path.join(SCRIPT_DIR, 'data', 'naver.xlsx')
+CATEGORY_TABLE_DIR = os.getenv("QNAME_CATEGORY_TABLE_DIR", os.path.join(SCRIPT_DIR, 'data'))
+
 class OptimizedQNameProcessor:
     """QName 처리기 - 병렬 처리 최적화 버전"""
     
-    def __init__(self, batch_size=10, max_concurrent=5):
+    def __init__(self, batch_size=10, max_concurrent=5, naver_rate_limiter=None, gemini_rate_limiter=None,
+                 scheduler=None, gemini_credentials: CredentialPool = None, naver_credentials: CredentialPool = None):
+        setup_logging(log_file=log_file)
         self.naver_url = "https://openapi.naver.com/v1/search/shop.json"
         self.category_mapper = CategoryMapper()
         self.batch_size = batch_size
         self.max_concurrent = max_concurrent
+        self.tag_model = LocalTagModel.load()
+        # 작업 키워드/카테고리 출현 이력 (캐시 예열 대상 선정용, prewarm.py)
+        self.keyword_history = KeywordHistory.load()
+        self.model_routes = load_model_routes()
+        self._model = None
+        self._model_lock = threading.Lock()
+        
+        # 공용 레이트 리미터 (여러 파일/작업이 업스트림 한도를 공유할 때 사용)
+        self.naver_rate_limiter = naver_rate_limiter
+        self.gemini_rate_limiter = gemini_rate_limiter
+        
+        # 작업 간 공정 스케줄러 (설정 시 행 단위로 실행 슬롯을 배정받음)
+        self.scheduler = scheduler
+        
+        # API 키 풀 (키가 여러 개면 남은 할당량/오류율 기준으로 분산, 429/인증 실패 키는 격리)
+        self.gemini_credentials = gemini_credentials if gemini_credentials is not None else \
+            CredentialPool.for_gemini([GEMINI_API_KEY])
+        self.naver_credentials = naver_credentials if naver_credentials is not None else \
+            CredentialPool.for_naver([(NAVER_CLIENT_ID, NAVER_CLIENT_SECRET)])
+        
+        # 키워드 정규화 (표기만 다른 키워드가 같은 캐시 항목을 쓰도록)
+        self.canonicalizer = KeywordCanonicalizer()
+        
+        # 키워드별 결과 캐시 (정규 키워드 해시 기준, 프로세서 인스턴스를 공유하는 작업끼리 재사용)
+        self.naver_cache = LRUCache(max_size=20000, ttl_seconds=24 * 3600)
+        self.product_name_cache = LRUCache(max_size=20000, ttl_seconds=24 * 3600)
+        self.related_cache = LRUCache(max_size=20000, ttl_seconds=24 * 3600)
+        
+        # 캐시 키가 같은 동시 호출은 진행 중인 호출 하나를 공유 (캐시에 들어가기 전 중복 호출 제거)
+        self.naver_flight = SingleFlight('naver')
+        self.product_flight = SingleFlight('gemini_product')
+        self.related_flight = SingleFlight('gemini_related')
         
         # 카테고리 데이터 로드
         if not self.category_mapper.load_category_data():
             logger.warning("카테고리 데이터 로드 실패 - 기본 매핑 사용")
         
-        # Gemini API 설정
-        if GEMINI_API_KEY:
-            genai.configure(api_key=GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('models/gemini-1.5-pro-latest')
-        else:
+        if not self.gemini_credentials:
             logger.error("GEMINI_API_KEY가 설정되지 않았습니다.")
-            self.model = None
+        elif len(self.gemini_credentials) > 1:
+            logger.info(f"Gemini 키 {len(self.gemini_credentials)}개 사용")
+        if len(self.naver_credentials) > 1:
+            logger.info(f"네이버 키 {len(self.naver_credentials)}개 사용")
+    
+    @property
+    def model(self):
+        """Gemini 모델 라우터 (단계별 모델 체인, 호출마다 키 풀에서 키 선택, SDK 임포트가 무거우므로 첫 사용 시 설정)"""
+        if self._model is None and self.gemini_credentials:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = ModelRouter(
+                        lambda model_name: PooledGeminiModel(self.gemini_credentials, model_name),
+                        routes=self.model_routes
+                    )
+        return self._model
     
     def calculate_optimal_batch_size(self, total_count: int) -> int:
         """총 개수에 따른 최적 배치 크기 계산"""
@@ -150,52 +191,32 @@ class OptimizedQNameProcessor:
         else:
             return 20
     
-    async def process_excel_file(self, file_path: str) -> dict:
-        """엑셀 파일을 처리하고 결과를 반환 - 비동기 환경 호환 (서버/CLI 모두 지원)"""
+    async def process_excel_file(self, file_path: str, output_path: str = None, user_id: str = None,
+                                 time_budget: float = None) -> dict:
+        """엑셀 파일을 처리하고 결과를 반환 - 비동기 환경 호환 (서버/CLI 모두 지원)
+        time_budget(초)을 주면 예산이 부족해질 때 남은 행을 간소화 모드로 처리하고 '간소화처리' 열에 표시"""
         try:
             logger.info(f"파일 처리 시작: {file_path}")
             
-            # 엑셀 파일 읽기
-            df = pd.read_excel(file_path)
-            logger.info(f"총 처리할 행 수: {len(df)}")
-            
-            if '메인키워드' not in df.columns:
-                raise ValueError("'메인키워드' 컬럼이 없습니다.")
-            
+            # 엑셀 파일의 '메인키워드' 열만 읽기 (I/O 스레드에서, 이벤트 루프를 막지 않도록)
             # B열 한 줄 전체를 하나의 키워드로 간주 (조합/슬라이싱 없이)
-            keywords = df['메인키워드'].astype(str).tolist()
+            keywords = await run_io(read_keyword_column, file_path)
+            logger.info(f"총 처리할 행 수: {len(keywords)}")
             
             # 최적 배치 크기 계산
             optimal_batch_size = self.calculate_optimal_batch_size(len(keywords))
             logger.info(f"최적 배치 크기: {optimal_batch_size}")
             
             # 비동기 처리 실행
-            results = await self.process_keywords_async(keywords, optimal_batch_size)
-            
-            # 결과를 DataFrame에 적용
-            for i, result in enumerate(results):
-                if i < len(df):
-                    df.at[i, 'NAVERCODE'] = result.get('naver_code', '')
-                    df.at[i, '카테분류형식'] = result.get('category_format', '')
-                    df.at[i, 'SEO상품명'] = result.get('product_name', '')
-                    df.at[i, '연관검색어'] = result.get('related_keywords', '')
-                    df.at[i, '네이버태그'] = result.get('naver_tags', '')
-                    df.at[i, '가공결과'] = result.get('status', '실패')
-            
-            # 결과 파일 저장
-            output_file = f"output_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            df.to_excel(output_file, index=False)
+            results = await self.process_keywords_async(
+                keywords, optimal_batch_size, user_id=user_id, time_budget=time_budget
+            )
             
-            success_count = sum(1 for r in results if r.get('status') == '완료')
-            error_count = len(results) - success_count
+            # 원본 행에 결과 열을 채워 저장 (임시 파일에 쓴 뒤 교체하여 원자적으로 저장)
+            output_file = output_path or f"output_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.xlsx"
+            await run_io(write_results_workbook, file_path, results, output_file, bool(time_budget))
             
-            return {
-                'success': True,
-                'total_processed': len(results),
-                'success_count': success_count,
-                'error_count': error_count,
-                'output_file': output_file
-            }
+            return summarize_results(results, output_file)
             
         except Exception as e:
             logger.error(f"파일 처리 오류: {str(e)}")
@@ -204,98 +225,239 @@ class OptimizedQNameProcessor:
                 'error': str(e),
                 'total_processed': 0,
                 'success_count': 0,
-                'error_count': len(df) if 'df' in locals() else 0
+                'error_count': len(keywords) if 'keywords' in locals() else 0
             }
     
-    async def process_keywords_async(self, keywords: List[str], batch_size: int) -> List[Dict]:
-        """키워드들을 배치 단위로 비동기 처리"""
+    async def process_keywords_async(self, keywords: List[str], batch_size: int, user_id: str = None,
+                                     time_budget: float = None) -> ResultColumns:
+        """키워드들을 배치 단위로 비동기 처리 (결과는 행 객체 없이 열 버퍼에 누적)"""
+        all_results = ResultColumns()
+        async for batch_results in self.iter_keywords_async(keywords, batch_size, user_id=user_id,
+                                                            time_budget=time_budget):
+            all_results.extend(batch_results)
+        return all_results
+    
+    async def iter_keywords_async(self, keywords: List[str], batch_size: int,
+                                  user_id: str = None, lane: str = LANE_BULK,
+                                  time_budget: float = None) -> AsyncIterator[List[RowResult]]:
+        """키워드들을 배치 단위로 처리하며 배치가 끝날 때마다 결과를 내보냄 (스트리밍용)
+        time_budget(초)이 있으면 배치마다 진행 속도를 확인해, 예산 초과가 예상되면
+        남은 배치를 LLM 호출 없이 캐시/로컬 생성기로 처리 (결과의 'degraded'로 표시)"""
         logger.info(f"비동기 배치 처리 시작: {len(keywords)}개 키워드, 배치 크기: {batch_size}")
         
         # 배치로 분할
         batches = [keywords[i:i + batch_size] for i in range(0, len(keywords), batch_size)]
         logger.info(f"총 {len(batches)}개 배치로 분할")
         
-        all_results = []
+        processed_count = 0
+        deadline = JobDeadline(time_budget) if time_budget else None
+        # 작업 도중 카테고리 인덱스가 교체되어도 이 작업은 시작 시점 인덱스로 일관되게 처리
+        category_index = self.category_mapper.snapshot()
         
+        import aiohttp
         async with aiohttp.ClientSession() as session:
             for batch_idx, batch in enumerate(batches):
-                logger.info(f"배치 {batch_idx + 1}/{len(batches)} 처리 시작: {len(batch)}개 키워드")
-                
-                # 1단계: 네이버 API 배치 호출
-                naver_results = await self.batch_naver_api(session, batch)
-                
-                # 2단계: 카테고리 정보 추출
-                category_infos = [self._extract_category_info(result) for result in naver_results]
-                
-                # 3단계: 상품명 생성 배치 호출
-                product_names = await self.batch_gemini_product(session, batch, category_infos)
+                logger.debug("배치 %d/%d 처리 시작: %d개 키워드", batch_idx + 1, len(batches), len(batch), extra={'category': 'batch'})
                 
-                # 4단계: 연관검색어 생성 배치 호출
-                related_keywords = await self.batch_gemini_related(session, batch, product_names)
-                
-                # 5단계: 결과 통합
-                batch_results = []
-                for i, keyword in enumerate(batch):
-                    category_format, core_keyword = category_infos[i]
-                    category_code, is_suspicious = self.category_mapper.find_category_code(category_format)
-                    
-                    # 네이버태그 생성: 연관검색어에서 10개 랜덤 선택
-                    import random
-                    related_keywords_list = related_keywords[i].split(',') if related_keywords[i] else []
-                    naver_tags = random.sample(related_keywords_list, min(10, len(related_keywords_list))) if related_keywords_list else []
-                    
-                    result = {
-                        'keyword': keyword,
-                        'naver_code': category_code,
-                        'category_format': f"{'X' if is_suspicious else ''}{category_format}",
-                        'product_name': product_names[i],
-                        'related_keywords': related_keywords[i],
-                        'naver_tags': ','.join(naver_tags),
-                        'status': '완료'
-                    }
-                    batch_results.append(result)
+                degraded = False
+                if deadline:
+                    was_degraded = deadline.degraded
+                    degraded = deadline.should_degrade(len(batches) - batch_idx - 1)
+                    if degraded and not was_degraded:
+                        logger.warning(
+                            f"시간 예산 부족 예상: 남은 {len(keywords) - processed_count}개 행을 간소화 모드로 처리 "
+                            f"(경과 {deadline.elapsed():.1f}초 / 예산 {deadline.budget_seconds:.1f}초)"
+                        )
+                batch_started = time.monotonic()
                 
-                all_results.extend(batch_results)
+                if self.scheduler:
+                    batch_results = await self._process_batch_scheduled(session, batch, user_id, lane, degraded,
+                                                                        category_index)
+                else:
+                    batch_results = await self._process_batch(session, batch, degraded, category_index)
+                processed_count += len(batch_results)
+                if lane != LANE_BACKGROUND:
+                    # 2차 보강/예열 같은 백그라운드 처리는 사용자 작업 이력에 넣지 않음
+                    self.keyword_history.record(
+                        (row.canonical_keyword, LocalTagModel.normalize_category(row.category_format))
+                        for row in batch_results if row.status == '완료'
+                    )
+                yield batch_results
                 
-                # 배치 간 딜레이 (API 레이트 리밋 고려)
-                if batch_idx < len(batches) - 1:
+                # 배치 간 딜레이 (API 레이트 리밋 고려, interactive 레인/간소화 모드는 생략)
+                if batch_idx < len(batches) - 1 and lane != LANE_INTERACTIVE and not degraded:
                     await asyncio.sleep(0.5)
+                
+                if deadline:
+                    deadline.observe(time.monotonic() - batch_started, degraded)
         
-        logger.info(f"비동기 배치 처리 완료: {len(all_results)}개 결과")
-        return all_results
+        # 로컬 태그 모델 통계/키워드 이력 저장
+        await run_io(self.tag_model.save)
+        await run_io(self.keyword_history.save)
+        
+        if deadline and deadline.degraded:
+            logger.info(f"비동기 배치 처리 완료: {processed_count}개 결과 "
+                        f"(간소화 전환 {deadline.degraded_at:.1f}초, 총 {deadline.elapsed():.1f}초 / 예산 {deadline.budget_seconds:.1f}초)")
+        else:
+            logger.info(f"비동기 배치 처리 완료: {processed_count}개 결과")
+    
+    async def process_single_keyword(self, keyword: str, user_id: str = None) -> RowResult:
+        """단일 키워드를 파일 입출력 없이 메모리에서 바로 처리"""
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            if self.scheduler:
+                results = await self._process_batch_scheduled(session, [keyword], user_id, LANE_INTERACTIVE)
+            else:
+                results = await self._process_batch(session, [keyword])
+        return results[0]
+    
+    async def _process_batch_scheduled(self, session: aiohttp.ClientSession, batch: List[str], user_id: str,
+                                       lane: str = LANE_BULK, degraded: bool = False,
+                                       category_index: CategoryIndex = None) -> List[RowResult]:
+        """배치의 각 행을 스케줄러 슬롯 안에서 처리 (다른 작업과 행 단위로 교차 실행)"""
+        async def process_row(keyword: str) -> RowResult:
+            async with self.scheduler.slot(user_id, lane):
+                results = await self._process_batch(session, [keyword], degraded, category_index)
+            return results[0]
+        
+        return list(await asyncio.gather(*(process_row(keyword) for keyword in batch)))
+    
+    async def _process_batch(self, session: aiohttp.ClientSession, batch: List[str], degraded: bool = False,
+                             category_index: CategoryIndex = None) -> List[RowResult]:
+        """한 배치의 키워드를 정규화한 뒤 네이버 → 상품명 → 연관검색어 단계로 처리"""
+        # 0단계: 키워드 정규화 (같은 정규 키워드는 배치 안에서 한 번만 처리)
+        canonical_keywords = [self.canonicalizer.canonicalize(keyword) for keyword in batch]
+        for keyword, canonical in zip(batch, canonical_keywords):
+            if canonical != keyword:
+                logger.debug("키워드 정규화: %r → %r", keyword, canonical, extra={'category': 'canonical'})
+        unique_keywords = [keyword for keyword in dict.fromkeys(canonical_keywords) if keyword]
+        
+        unique_results = await self._process_canonical_keywords(
+            session, unique_keywords, degraded, category_index
+        ) if unique_keywords else {}
+        
+        batch_results = []
+        for keyword, canonical in zip(batch, canonical_keywords):
+            if canonical:
+                batch_results.append(unique_results[canonical].with_keyword(keyword, canonical))
+            else:
+                # 빈 셀/'nan'은 업스트림 호출 없이 건너뜀
+                batch_results.append(RowResult.skipped(keyword))
+        
+        return batch_results
+    
+    async def _process_canonical_keywords(self, session: aiohttp.ClientSession, batch: List[str],
+                                          degraded: bool = False, category_index: CategoryIndex = None) -> Dict[str, RowResult]:
+        """정규 키워드별 단계 처리 결과 (정규 키워드 → 결과)
+        업스트림 일시 오류로 기본값을 쓴 키워드도 degraded로 표시 (2차 보강 대상)"""
+        fallbacks: Set[str] = set()
+        
+        # 1단계: 네이버 API 배치 호출
+        naver_results = await self.batch_naver_api(session, batch, fallbacks)
+        
+        # 2단계: 카테고리 정보 추출
+        category_infos = [self._extract_category_info(result) for result in naver_results]
+        
+        if degraded:
+            # 간소화 모드: LLM 호출 없이 캐시/로컬 생성기만 사용
+            product_names, related_keywords, degraded_flags = self._generate_degraded(batch, category_infos)
+        else:
+            # 3단계: 상품명 생성 배치 호출
+            product_names = await self.batch_gemini_product(session, batch, category_infos, fallbacks)
+            
+            # 4단계: 연관검색어 생성 배치 호출
+            related_keywords = await self.batch_gemini_related(
+                session, batch, product_names, [info[0] for info in category_infos], fallbacks
+            )
+            degraded_flags = [False] * len(batch)
+        if fallbacks:
+            degraded_flags = [flag or keyword in fallbacks for flag, keyword in zip(degraded_flags, batch)]
+        
+        # 5단계: 결과 통합
+        batch_results = {}
+        for i, keyword in enumerate(batch):
+            category_format, core_keyword = category_infos[i]
+            category_code, is_suspicious = self.category_mapper.find_category_code(category_format, category_index)
+            
+            # 네이버태그 생성: 연관검색어에서 10개 랜덤 선택
+            related_keywords_list = related_keywords[i].split(',') if related_keywords[i] else []
+            naver_tags = random.sample(related_keywords_list, min(10, len(related_keywords_list))) if related_keywords_list else []
+            
+            batch_results[keyword] = RowResult(
+                keyword=keyword,
+                canonical_keyword=keyword,
+                naver_code=category_code,
+                category_format=f"{'X' if is_suspicious else ''}{category_format}",
+                product_name=product_names[i],
+                related_keywords=related_keywords[i],
+                naver_tags=','.join(naver_tags),
+                status='완료',
+                degraded=degraded_flags[i]
+            )
+        
+        return batch_results
     
-    async def batch_naver_api(self, session: aiohttp.ClientSession, keywords: List[str]) -> List[Dict]:
-        """네이버 API 배치 호출"""
-        if not NAVER_CLIENT_ID or not NAVER_CLIENT_SECRET:
+    def _generate_degraded(self, keywords: List[str], category_infos: List[Tuple]) -> Tuple[List[str], List[str], List[bool]]:
+        """간소화 모드 생성 - 캐시된 LLM 결과가 있으면 사용하고, 없으면 기본 생성기로 대체
+        (기본 생성기를 쓴 행만 degraded로 표시)"""
+        product_names, related_keywords, degraded_flags = [], [], []
+        for keyword, (category_format, core_keyword) in zip(keywords, category_infos):
+            row_degraded = False
+            product_name = self.product_name_cache.get(stable_hash(keyword, category_format, core_keyword))
+            if product_name is None:
+                product_name = self._generate_basic_product_name(keyword, category_format, core_keyword)
+                row_degraded = True
+            
+            local_tags = self.tag_model.suggest(category_format, product_name)
+            if local_tags:
+                related = ','.join(local_tags)
+            else:
+                related = self.related_cache.get(stable_hash(keyword, product_name))
+                if related is None:
+                    related = ','.join(self._get_basic_related_keywords(keyword))
+                    row_degraded = True
+            
+            product_names.append(product_name)
+            related_keywords.append(related)
+            degraded_flags.append(row_degraded)
+        return product_names, related_keywords, degraded_flags
+    
+    async def batch_naver_api(self, session: aiohttp.ClientSession, keywords: List[str],
+                              fallbacks: Set[str] = None) -> List[Dict]:
+        """네이버 API 배치 호출 (fallbacks를 주면 일시 오류로 기본 카테고리를 쓴 키워드를 기록)"""
+        if not self.naver_configured:
             logger.warning("네이버 API 키가 설정되지 않음 - 기본 카테고리 사용")
             return [self._create_default_category(keyword) for keyword in keywords]
         
-        headers = {
-            "X-Naver-Client-Id": NAVER_CLIENT_ID,
-            "X-Naver-Client-Secret": NAVER_CLIENT_SECRET
-        }
-        
         semaphore = asyncio.Semaphore(self.max_concurrent)
         
-        async def fetch_naver_data(keyword: str) -> Dict:
+        async def request_naver(keyword: str) -> Tuple[int, Optional[dict]]:
             async with semaphore:
-                try:
-                    params = {"query": keyword, "display": 1}
-                    async with session.get(self.naver_url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=3)) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            if 'items' in result and result['items']:
-                                logger.info(f"네이버 API 성공: {keyword}")
-                                return result
-                            else:
-                                logger.warning(f"네이버 API 응답에 상품 없음: {keyword}")
-                                return self._create_default_category(keyword)
-                        else:
-                            logger.error(f"네이버 API HTTP 오류: {response.status} - {keyword}")
-                            return self._create_default_category(keyword)
-                except Exception as e:
-                    logger.error(f"네이버 API 오류: {str(e)} - {keyword}")
-                    return self._create_default_category(keyword)
+                if self.naver_rate_limiter:
+                    await self.naver_rate_limiter.acquire()
+                return await self._request_naver(session, keyword)
+        
+        async def fetch_naver_data(keyword: str) -> Dict:
+            cache_key = stable_hash(keyword)
+            cached = self.naver_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            try:
+                status, result = await self.naver_flight.do(cache_key, lambda: request_naver(keyword))
+                if status == 200:
+                    if result and result.get('items'):
+                        logger.debug("네이버 API 성공: %s", keyword, extra={'category': 'naver'})
+                        self.naver_cache.set(cache_key, result)
+                        return result
+                    else:
+                        logger.warning("네이버 API 응답에 상품 없음: %s", keyword, extra={'category': 'naver'})
+                        return self._create_default_category(keyword)
+                else:
+                    logger.error(f"네이버 API HTTP 오류: {status} - {keyword}")
+                    return self._fallback_category(keyword, fallbacks)
+            except Exception as e:
+                logger.error(f"네이버 API 오류: {str(e)} - {keyword}")
+                return self._fallback_category(keyword, fallbacks)
         
         tasks = [fetch_naver_data(keyword) for keyword in keywords]
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -305,34 +467,103 @@ class OptimizedQNameProcessor:
         for i, result in enumerate(results):
             if isinstance(result, Exception):
                 logger.error(f"네이버 API 예외: {str(result)} - {keywords[i]}")
-                processed_results.append(self._create_default_category(keywords[i]))
+                processed_results.append(self._fallback_category(keywords[i], fallbacks))
             else:
                 processed_results.append(result)
         
         return processed_results
     
-    async def batch_gemini_product(self, session: aiohttp.ClientSession, keywords: List[str], category_infos: List[Tuple]) -> List[str]:
-        """Gemini API 배치 호출 - 상품명 생성"""
+    @property
+    def naver_configured(self) -> bool:
+        """네이버 API 키 설정 여부"""
+        return bool(self.naver_credentials)
+    
+    def singleflight_stats(self) -> dict:
+        """단계별 진행 중 호출 공유 현황"""
+        return {flight.name: flight.stats() for flight in (self.naver_flight, self.product_flight, self.related_flight)}
+    
+    def model_stats(self) -> Optional[dict]:
+        """단계/모델별 호출 지연과 추정 비용 (모델을 아직 쓰지 않았으면 None)"""
+        return self._model.stats() if isinstance(self._model, ModelRouter) else None
+    
+    def upstream_configured(self) -> bool:
+        """Gemini 키가 하나라도 설정돼 있는지 (없으면 2차 보강을 기다려도 회복되지 않음)"""
+        return bool(self.gemini_credentials)
+    
+    def upstream_available(self) -> bool:
+        """설정된 업스트림 키 중 격리되지 않은 키가 있는지 (2차 보강 시작 전 확인)"""
+        return self.gemini_credentials.available() > 0 and (
+            not self.naver_configured or self.naver_credentials.available() > 0)
+    
+    @property
+    def result_version(self) -> str:
+        """같은 입력에 같은 결과를 내는 구성 식별자 (출력 형식, 단계별 모델, 카테고리 인덱스, API 키 구성)
+        키가 없으면 기본값으로 채운 결과가 나오므로 키 구성도 포함 (키 등록 후 캐시가 재사용되지 않도록)"""
+        return (f"{RESULT_FORMAT_VERSION}:{routes_signature(self.model_routes)}:"
+                f"{self.category_mapper.snapshot().version}:"
+                f"g{int(bool(self.gemini_credentials))}n{int(self.naver_configured)}")
+    
+    async def _request_naver(self, session: aiohttp.ClientSession, keyword: str) -> Tuple[int, Optional[dict]]:
+        """네이버 쇼핑 검색 API 1회 호출 → (HTTP 상태, 응답 JSON)
+        한도 초과/인증 실패 응답이면 해당 키를 격리하고 다른 키로 재시도
+        업스트림 경계 - benchmark_golden.py는 이 메서드를 녹화/재생으로 대체"""
+        import aiohttp
+        params = {"query": keyword, "display": 1}
+        status = None
+        for _ in range(len(self.naver_credentials)):
+            credential = self.naver_credentials.acquire()
+            headers = {
+                "X-Naver-Client-Id": credential.key,
+                "X-Naver-Client-Secret": credential.secret
+            }
+            async with session.get(self.naver_url, headers=headers, params=params, timeout=aiohttp.ClientTimeout(total=3)) as response:
+                status = response.status
+                if status == 200:
+                    result = await response.json()
+                    self.naver_credentials.report_success(credential)
+                    return status, result
+            self.naver_credentials.report_failure(credential, status)
+            if status not in RATE_LIMITED_STATUSES and status not in AUTH_FAILED_STATUSES:
+                break
+        return status, None
+    
+    async def batch_gemini_product(self, session: aiohttp.ClientSession, keywords: List[str], category_infos: List[Tuple],
+                                   fallbacks: Set[str] = None) -> List[str]:
+        """Gemini API 배치 호출 - 상품명 생성 (fallbacks를 주면 오류로 기본 생성기를 쓴 키워드를 기록)"""
         if not self.model:
             return [self._generate_basic_product_name(kw, cat[0], cat[1]) for kw, cat in zip(keywords, category_infos)]
         
         semaphore = asyncio.Semaphore(self.max_concurrent)
         
-        async def generate_product_name(keyword: str, category_format: str, core_keyword: str) -> str:
+        async def request_product_name(keyword: str, category_format: str, core_keyword: str) -> Tuple[str, bool]:
+            """(상품명, 대체값 사용 여부) - 공유 호출이라 호출자별 fallbacks 대신 여부를 함께 돌려줌"""
+            call_fallbacks: Set[str] = set()
             async with semaphore:
-                try:
-                    # ThreadPoolExecutor를 사용하여 동기 Gemini API를 비동기로 래핑
-                    loop = asyncio.get_event_loop()
-                    with ThreadPoolExecutor() as executor:
-                        result = await loop.run_in_executor(
-                            executor,
-                            self._generate_product_name_sync,
-                            keyword, category_format, core_keyword
-                        )
-                    return result
-                except Exception as e:
-                    logger.error(f"상품명 생성 오류: {str(e)} - {keyword}")
-                    return self._generate_basic_product_name(keyword, category_format, core_keyword)
+                if self.gemini_rate_limiter:
+                    await self.gemini_rate_limiter.acquire(2)  # prefix + 상품명 2회 호출
+                # 동기 Gemini API를 스레드에서 실행 (to_thread는 요청 ID 등 contextvars를 함께 전달)
+                result = await asyncio.to_thread(
+                    self._generate_product_name_sync,
+                    keyword, category_format, core_keyword, call_fallbacks
+                )
+            return result, bool(call_fallbacks)
+        
+        async def generate_product_name(keyword: str, category_format: str, core_keyword: str) -> str:
+            cache_key = stable_hash(keyword, category_format, core_keyword)
+            cached = self.product_name_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            try:
+                result, fell_back = await self.product_flight.do(
+                    cache_key, lambda: request_product_name(keyword, category_format, core_keyword)
+                )
+                if fell_back:
+                    _record_fallback(fallbacks, keyword)
+                return result
+            except Exception as e:
+                logger.error(f"상품명 생성 오류: {str(e)} - {keyword}")
+                _record_fallback(fallbacks, keyword)
+                return self._generate_basic_product_name(keyword, category_format, core_keyword)
         
         tasks = [generate_product_name(kw, cat[0], cat[1]) for kw, cat in zip(keywords, category_infos)]
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -342,51 +573,84 @@ class OptimizedQNameProcessor:
         for i, result in enumerate(results):
             if isinstance(result, Exception):
                 logger.error(f"상품명 생성 예외: {str(result)} - {keywords[i]}")
+                _record_fallback(fallbacks, keywords[i])
                 processed_results.append(self._generate_basic_product_name(keywords[i], category_infos[i][0], category_infos[i][1]))
             else:
                 processed_results.append(result)
         
         return processed_results
     
-    async def batch_gemini_related(self, session: aiohttp.ClientSession, keywords: List[str], product_names: List[str]) -> List[str]:
-        """Gemini API 배치 호출 - 연관검색어 생성"""
+    async def batch_gemini_related(self, session: aiohttp.ClientSession, keywords: List[str], product_names: List[str],
+                                   category_formats: List[str] = None, fallbacks: Set[str] = None) -> List[str]:
+        """Gemini API 배치 호출 - 연관검색어 생성 (로컬 태그 모델 우선, fallbacks는 batch_gemini_product와 동일)"""
+        if category_formats is None:
+            category_formats = [''] * len(keywords)
+        
+        # 신뢰도가 충분한 카테고리는 로컬 태그 모델로 즉시 응답
+        results: List[Any] = [None] * len(keywords)
+        for i, (category_format, product_name) in enumerate(zip(category_formats, product_names)):
+            local_tags = self.tag_model.suggest(category_format, product_name)
+            if local_tags:
+                results[i] = ','.join(local_tags)
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if len(pending) < len(keywords):
+            logger.info(f"로컬 태그 모델 사용: {len(keywords) - len(pending)}/{len(keywords)}개")
+        
         if not self.model:
-            return [','.join(self._get_basic_related_keywords(kw)) for kw in keywords]
+            for i in pending:
+                results[i] = ','.join(self._get_basic_related_keywords(keywords[i]))
+            return results
         
         semaphore = asyncio.Semaphore(self.max_concurrent)
         
-        async def generate_related_keywords(keyword: str, product_name: str) -> str:
+        async def request_related_keywords(keyword: str, product_name: str, category_format: str) -> Tuple[str, bool]:
+            """(연관검색어, 대체값 사용 여부) - request_product_name과 동일"""
+            call_fallbacks: Set[str] = set()
             async with semaphore:
-                try:
-                    # ThreadPoolExecutor를 사용하여 동기 Gemini API를 비동기로 래핑
-                    loop = asyncio.get_event_loop()
-                    with ThreadPoolExecutor() as executor:
-                        result = await loop.run_in_executor(
-                            executor,
-                            self._get_related_keywords_sync,
-                            keyword, product_name
-                        )
-                    return result
-                except Exception as e:
-                    logger.error(f"연관검색어 생성 오류: {str(e)} - {keyword}")
-                    return ','.join(self._get_basic_related_keywords(keyword))
+                if self.gemini_rate_limiter:
+                    await self.gemini_rate_limiter.acquire()
+                # 동기 Gemini API를 스레드에서 실행 (request_product_name과 동일)
+                result = await asyncio.to_thread(
+                    self._get_related_keywords_sync,
+                    keyword, product_name, category_format, call_fallbacks
+                )
+            return result, bool(call_fallbacks)
         
-        tasks = [generate_related_keywords(kw, pn) for kw, pn in zip(keywords, product_names)]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def generate_related_keywords(keyword: str, product_name: str, category_format: str) -> str:
+            cache_key = stable_hash(keyword, product_name)
+            cached = self.related_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            try:
+                result, fell_back = await self.related_flight.do(
+                    cache_key, lambda: request_related_keywords(keyword, product_name, category_format)
+                )
+                if fell_back:
+                    _record_fallback(fallbacks, keyword)
+                return result
+            except Exception as e:
+                logger.error(f"연관검색어 생성 오류: {str(e)} - {keyword}")
+                _record_fallback(fallbacks, keyword)
+                return ','.join(self._get_basic_related_keywords(keyword))
+        
+        tasks = [generate_related_keywords(keywords[i], product_names[i], category_formats[i]) for i in pending]
+        gemini_results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # 예외 처리
-        processed_results = []
-        for i, result in enumerate(results):
+        for i, result in zip(pending, gemini_results):
             if isinstance(result, Exception):
                 logger.error(f"연관검색어 생성 예외: {str(result)} - {keywords[i]}")
-                processed_results.append(','.join(self._get_basic_related_keywords(keywords[i])))
+                _record_fallback(fallbacks, keywords[i])
+                results[i] = ','.join(self._get_basic_related_keywords(keywords[i]))
             else:
-                processed_results.append(result)
+                results[i] = result
         
-        return processed_results
+        return results
     
-    def _generate_product_name_sync(self, keyword: str, category_format: str, core_keyword: str) -> str:
-        """동기 상품명 생성 (ThreadPoolExecutor용)"""
+    def _generate_product_name_sync(self, keyword: str, category_format: str, core_keyword: str,
+                                    fallbacks: Set[str] = None) -> str:
+        """동기 상품명 생성 (스레드 실행용)"""
         try:
             # 1단계: prefix 추천
             prefix_prompt = (
@@ -398,10 +662,11 @@ class OptimizedQNameProcessor:
             )
             
             try:
-                prefix_response = self.model.generate_content(prefix_prompt)
+                prefix_response = self.model.generate_content(prefix_prompt, stage=STAGE_PREFIX)
                 prefix = prefix_response.text.strip().split()[0]  # 첫 번째 단어만 사용
             except Exception as api_error:
                 logger.error(f"Prefix 생성 API 오류: {str(api_error)}")
+                _record_fallback(fallbacks, keyword)
                 prefix = self._select_best_prefix_word(category_format, core_keyword, keyword)
 
             # 2단계: 상품명 전체 생성
@@ -425,7 +690,7 @@ class OptimizedQNameProcessor:
             )
 
             try:
-                response = self.model.generate_content(prompt)
+                response = self.model.generate_content(prompt, stage=STAGE_NAME)
                 product_name = response.text.strip()
                 
                 # prefix가 두 번 반복되면 한 번만 남기기
@@ -439,20 +704,26 @@ class OptimizedQNameProcessor:
                 product_name = self._clean_product_name(product_name)
                 
                 if len(product_name) < 25:
-                    logger.warning(f"생성된 상품명이 25자 미만입니다. ({product_name})")
+                    logger.warning("생성된 상품명이 25자 미만입니다. (%s)", product_name, extra={'category': 'gemini'})
+                
+                # Gemini 응답으로 생성된 상품명만 캐시 (오류 대체값은 캐시하지 않음)
+                self.product_name_cache.set(stable_hash(keyword, category_format, core_keyword), product_name)
                     
             except Exception as api_error:
                 logger.error(f"상품명 생성 API 오류: {str(api_error)}")
+                _record_fallback(fallbacks, keyword)
                 product_name = f"{prefix}{keyword} 고급 품질 상품"
             
             return product_name
             
         except Exception as e:
             logger.error(f"상품명 생성 오류: {str(e)}")
+            _record_fallback(fallbacks, keyword)
             return self._generate_basic_product_name(keyword, category_format, core_keyword)
     
-    def _get_related_keywords_sync(self, keyword: str, product_name: str) -> str:
-        """동기 연관검색어 생성 (ThreadPoolExecutor용)"""
+    def _get_related_keywords_sync(self, keyword: str, product_name: str, category_format: str = None,
+                                   fallbacks: Set[str] = None) -> str:
+        """동기 연관검색어 생성 (스레드 실행용)"""
         try:
             prompt = f"""
             다음 상품에 대한 네이버 쇼핑 태그 20개를 생성해주세요:
@@ -472,14 +743,21 @@ class OptimizedQNameProcessor:
             형식: 태그1,태그2,태그3,...
             """
 
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(prompt, stage=STAGE_TAGS)
             tags = response.text.strip().split(',')
             cleaned_tags = self._remove_duplicates(tags)
             
-            return ','.join(cleaned_tags[:20])
+            # Gemini 응답은 로컬 태그 모델 학습에 반영
+            if category_format:
+                self.tag_model.observe(category_format, cleaned_tags[:20])
+            
+            related = ','.join(cleaned_tags[:20])
+            self.related_cache.set(stable_hash(keyword, product_name), related)
+            return related
 
         except Exception as e:
             logger.error(f"연관검색어 생성 API 오류: {str(e)}")
+            _record_fallback(fallbacks, keyword)
             return ','.join(self._get_basic_related_keywords(keyword))
     
     def _get_basic_related_keywords(self, keyword: str) -> List[str]:
@@ -497,7 +775,7 @@ class OptimizedQNameProcessor:
     
     def _create_default_category(self, keyword: str) -> dict:
         """기본 카테고리 정보 생성 - API 실패 시에만 사용"""
-        logger.warning(f"기본 카테고리 사용 (API 실패): {keyword}")
+        logger.warning("기본 카테고리 사용 (API 실패): %s", keyword, extra={'category': 'fallback'})
         
         # 키워드 기반으로 더 정확한 기본 카테고리 추정
         if any(word in keyword for word in ['양말', '신발', '운동화', '슬리퍼']):
@@ -524,6 +802,11 @@ class OptimizedQNameProcessor:
             }]
         }
     
+    def _fallback_category(self, keyword: str, fallbacks: Set[str] = None) -> dict:
+        """업스트림 일시 오류로 기본 카테고리 사용 (2차 보강 대상으로 기록)"""
+        _record_fallback(fallbacks, keyword)
+        return self._create_default_category(keyword)
+    
     def _extract_category_info(self, category_info: dict) -> tuple:
         """카테고리 정보에서 형식과 핵심 키워드 추출"""
         try:
@@ -649,183 +932,273 @@ class OptimizedQNameProcessor:
         
         return unique_keywords
 
+class CategoryIndex:
+    """카테고리 인덱스 스냅샷 - 만든 뒤에는 변경하지 않음
+    (재로드 시 CategoryMapper가 새 스냅샷으로 참조만 교체하므로, 작업 시작 때 잡은 스냅샷은 끝까지 일관됨)
+    데이터는 mmap된 CategoryTable에 있어 같은 파일을 여는 워커끼리 메모리를 공유"""
+    
+    __slots__ = ('table', 'source_sha256', 'loaded_at')
+    
+    def __init__(self, table=None, source_sha256: str = None):
+        self.table = table
+        self.source_sha256 = source_sha256
+        self.loaded_at = datetime.now()
+    
+    @property
+    def category_map(self):
+        """카테고리 경로 → 코드 (dict처럼 사용하는 읽기 전용 테이블)"""
+        return self.table if self.table is not None else {}
+    
+    @property
+    def has_vectors(self) -> bool:
+        return self.table is not None and self.table.has_vectors
+    
+    @property
+    def version(self) -> str:
+        """원본 naver.xlsx 해시 앞부분 (인덱스 버전 식별용)"""
+        return (self.source_sha256 or 'unknown')[:12]
+    
+    def find_category_code(self, category_format: str) -> tuple:
+        """카테고리 형식에 해당하는 코드 찾기"""
+        try:
+            # 정확한 매칭 시도
+            code = self.category_map.get(category_format)
+            if code is not None:
+                return code, False
+            
+            # 문자 n-gram TF-IDF 유사도 매칭
+            if self.has_vectors:
+                match = self.table.most_similar(category_format)
+                if match is not None:
+                    best_category, best_code, best_similarity = match
+                    logger.debug(
+                        "유사도 매칭 결과: %s → %s (유사도: %.3f)", category_format, best_category, best_similarity,
+                        extra={'category': 'category'}
+                    )
+                    # 유사도 임계값 이하라도 best_code를 반환, x 표시는 별도 로직에서 처리
+                    return best_code, True
+            
+            # 기본값 반환
+            logger.warning("카테고리 매칭 실패: %s", category_format, extra={'category': 'category'})
+            return '00000000', True
+            
+        except Exception as e:
+            logger.error(f"카테고리 코드 찾기 오류: {str(e)}")
+            return '00000000', True
+
 class CategoryMapper:
-    """카테고리 매핑 클래스 - 벡터화 기반 유사도 매칭"""
+    """카테고리 매핑 클래스 - 벡터화 기반 유사도 매칭
+    현재 인덱스 스냅샷(CategoryIndex)을 들고 있으며, naver.xlsx가 바뀌면 새 인덱스를 만든 뒤 원자적으로 교체"""
     
     def __init__(self):
-        self.category_map = {}
-        self.vectorized_data = None
-        self.cache_file = os.path.join(SCRIPT_DIR, 'data', 'category_vector_cache.pkl')
-        self.cache_expiry_days = 7  # 캐시 유효 기간 (일)
+        self.source_file = CATEGORY_SOURCE_FILE
+        self.table_dir = CATEGORY_TABLE_DIR
+        self.index = CategoryIndex()
+        self._checked_stat = None
+        self._reload_lock = threading.Lock()
+    
+    @property
+    def category_map(self):
+        return self.index.category_map
+    
+    def snapshot(self) -> CategoryIndex:
+        """현재 인덱스 스냅샷 (작업 시작 시 잡아 두고 끝까지 사용)"""
+        return self.index
         
     def load_category_data(self):
-        """naver.xlsx 파일에서 카테고리 데이터 로드 및 벡터화 (캐시 활용)"""
+        """카테고리 인덱스 로드 (빌드 단계에서 만든 인덱스가 naver.xlsx와 일치하면 그대로 사용)"""
         try:
-            # 캐시된 벡터화 데이터 확인
-            if self._load_cached_data():
-                logger.info("캐시된 벡터화 데이터를 사용합니다.")
-                return True
-            
-            # 절대 경로로 변경
-            naver_file = os.path.join(SCRIPT_DIR, "data", "naver.xlsx")
-            logger.info(f"카테고리 파일 경로: {naver_file}")
-            
-            if not os.path.exists(naver_file):
-                logger.warning(f"naver.xlsx 파일이 없습니다: {naver_file}")
+            return self.load_or_build()
+        except Exception as e:
+            logger.error(f"카테고리 데이터 로드 오류: {str(e)}")
+            return False
+    
+    def load_or_build(self, force: bool = False) -> bool:
+        """naver.xlsx와 일치하는 테이블 파일이 있으면 열고, 없거나 force면 새로 만들어 현재 인덱스로 설정
+        (build_category_index.py 배포 빌드 단계와 프로세서 시작 시 공용)"""
+        self._checked_stat = self._source_stat()
+        
+        # 미리 빌드된(또는 이전에 만든) 카테고리 테이블 확인
+        index = None if force else self._load_table()
+        if index is not None:
+            logger.info(f"카테고리 테이블을 사용합니다: {index.table.path}")
+            self.index = index
+            return True
+        
+        return self.rebuild()
+    
+    def rebuild(self) -> bool:
+        """naver.xlsx에서 새 인덱스를 만들어 저장하고 현재 인덱스와 교체"""
+        index = self._build_index()
+        if index is None:
+            return False
+        self.index = index
+        return True
+    
+    def reload(self, force: bool = False) -> bool:
+        """naver.xlsx가 바뀌었으면 새 인덱스를 만든 뒤 교체 (진행 중인 작업은 기존 스냅샷을 계속 사용)
+        교체했으면 True, 변경이 없거나 실패하면 False"""
+        with self._reload_lock:
+            stat = self._source_stat()
+            if stat is None:
+                logger.warning(f"naver.xlsx 파일이 없습니다: {self.source_file}")
                 return False
-            
-            df = pd.read_excel(naver_file)
-            
-            # '카테고리분류형식' 열이 없으면 생성
-            if '카테고리분류형식' not in df.columns:
-                df['카테고리분류형식'] = df.apply(
-                    lambda row: '>'.join(
-                        [str(row['1차분류']), str(row['2차분류']), str(row['3차분류']), str(row['4차분류'])]
-                        if not pd.isnull(row['4차분류']) else
-                        [str(row['1차분류']), str(row['2차분류']), str(row['3차분류'])]
-                    ),
-                    axis=1
-                )
-            
-            if '카테고리분류형식' not in df.columns or 'catecode' not in df.columns:
-                logger.warning("naver.xlsx 파일에 필요한 컬럼이 없습니다.")
+            if not force and stat == self._checked_stat:
                 return False
+            self._checked_stat = stat
             
-            # 카테고리 맵 생성
-            self.category_map = dict(zip(df['카테고리분류형식'], df['catecode']))
-            
-            # 벡터화 수행
-            self.vectorized_data = self._vectorize_categories(df)
-            
-            # 벡터화된 데이터 캐시 저장
-            self._save_cached_data()
+            if not force and self.source_signature() == self.index.source_sha256:
+                # 수정 시각만 바뀐 경우
+                return False
             
-            logger.info(f"카테고리 데이터 로드 완료: {len(self.category_map)}개")
+            previous_version = self.index.version
+            if not self.rebuild():
+                logger.error("카테고리 인덱스 재로드 실패 - 기존 인덱스 유지")
+                return False
+            logger.info(f"카테고리 인덱스 교체: {previous_version} → {self.index.version} ({len(self.category_map)}개)")
             return True
-            
-        except Exception as e:
-            logger.error(f"카테고리 데이터 로드 오류: {str(e)}")
-            return False
-
-    def _vectorize_categories(self, df):
-        """카테고리 데이터 벡터화"""
+    
+    def _source_stat(self) -> Optional[tuple]:
         try:
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            from sklearn.metrics.pairwise import cosine_similarity
-            
-            vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 3))
-            vectors = vectorizer.fit_transform(df['카테고리분류형식'])
-            
-            return {
-                'vectors': vectors,
-                'vectorizer': vectorizer,
-                'categories': df['카테고리분류형식'].tolist(),
-                'codes': df['catecode'].tolist(),
-                'last_updated': datetime.now()
-            }
-        except ImportError:
-            logger.warning("scikit-learn이 설치되지 않아 기본 매칭을 사용합니다.")
+            stat = os.stat(self.source_file)
+        except FileNotFoundError:
             return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def table_path(self, source_sha256: str) -> str:
+        """원본 해시별 테이블 파일 경로 (교체 시 기존 파일을 mmap 중인 워커에 영향 없도록 버전별 파일 사용)"""
+        return os.path.join(self.table_dir, f"category_table_{source_sha256[:16]}.bin")
+    
+    def _build_index(self) -> Optional[CategoryIndex]:
+        """naver.xlsx에서 카테고리 테이블(맵 + TF-IDF)을 새로 만들어 파일로 저장"""
+        naver_file = self.source_file
+        logger.info(f"카테고리 파일 경로: {naver_file}")
+        
+        if not os.path.exists(naver_file):
+            logger.warning(f"naver.xlsx 파일이 없습니다: {naver_file}")
+            return None
+        
+        # 읽는 도중 파일이 바뀌어도 해시와 내용이 어긋나지 않도록 해시를 먼저 계산
+        source_sha256 = self.source_signature()
+        
+        import pandas as pd
+        df = pd.read_excel(naver_file)
+        
+        # '카테고리분류형식' 열이 없으면 생성
+        if '카테고리분류형식' not in df.columns:
+            df['카테고리분류형식'] = df.apply(
+                lambda row: '>'.join(
+                    [str(row['1차분류']), str(row['2차분류']), str(row['3차분류']), str(row['4차분류'])]
+                    if not pd.isnull(row['4차분류']) else
+                    [str(row['1차분류']), str(row['2차분류']), str(row['3차분류'])]
+                ),
+                axis=1
+            )
+        
+        if '카테고리분류형식' not in df.columns or 'catecode' not in df.columns:
+            logger.warning("naver.xlsx 파일에 필요한 컬럼이 없습니다.")
+            return None
+        
+        from category_table import CategoryTable
+        path = self.table_path(source_sha256)
+        CategoryTable.build(dict(zip(df['카테고리분류형식'], df['catecode'])), path, source_sha256)
+        index = CategoryIndex(CategoryTable.open(path), source_sha256)
+        self._remove_stale_tables(keep=path)
+        
+        logger.info(f"카테고리 데이터 로드 완료: {len(index.category_map)}개")
+        return index
+    
+    def source_signature(self) -> Optional[str]:
+        """naver.xlsx 내용 해시 (인덱스가 어떤 원본으로 만들어졌는지 확인용, 파일이 없으면 None)"""
+        if not os.path.exists(self.source_file):
+            return None
+        digest = hashlib.sha256()
+        with open(self.source_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
 
-    def _save_cached_data(self):
-        """벡터화된 데이터를 파일로 저장"""
+    def _load_table(self) -> Optional[CategoryIndex]:
+        """naver.xlsx와 일치하는 테이블 파일 열기 (원본이 배포에 없으면 가장 최근 테이블 사용)"""
+        from category_table import CategoryTable
+        source_sha256 = self.source_signature()
+        if source_sha256 is not None:
+            path = self.table_path(source_sha256)
+        else:
+            candidates = self._table_files()
+            path = max(candidates, key=os.path.getmtime) if candidates else None
+        if not path or not os.path.exists(path):
+            return None
+        
         try:
-            import pickle
-            cache_data = {
-                'category_map': self.category_map,
-                'vectorized_data': self.vectorized_data,
-                'timestamp': datetime.now()
-            }
-            
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
-            
-            logger.info("벡터화된 데이터가 캐시에 저장되었습니다.")
-            
+            table = CategoryTable.open(path)
         except Exception as e:
-            logger.error(f"캐시 저장 오류: {str(e)}")
+            logger.warning(f"카테고리 테이블 로드 실패 (다시 생성): {str(e)}")
+            return None
+        if source_sha256 is not None and table.source_sha256 != source_sha256:
+            return None
+        return CategoryIndex(table, table.source_sha256)
+    
+    def _table_files(self) -> List[str]:
+        if not os.path.isdir(self.table_dir):
+            return []
+        return [
+            os.path.join(self.table_dir, name) for name in os.listdir(self.table_dir)
+            if name.startswith('category_table_') and name.endswith('.bin')
+        ]
+    
+    def _remove_stale_tables(self, keep: str):
+        """이전 버전 테이블 파일 정리 (이미 mmap한 워커는 열린 파일을 계속 사용, Windows에서는 실패해도 무시)"""
+        for path in self._table_files():
+            if os.path.abspath(path) == os.path.abspath(keep):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
-    def _load_cached_data(self):
-        """캐시된 벡터화 데이터 로드"""
-        try:
-            import pickle
-            if not os.path.exists(self.cache_file):
-                return False
-            
-            # 캐시 파일의 수정 시간 확인
-            cache_time = datetime.fromtimestamp(os.path.getmtime(self.cache_file))
-            if datetime.now() - cache_time > timedelta(days=self.cache_expiry_days):
-                logger.info("캐시가 만료되었습니다. 새로운 데이터를 로드합니다.")
-                return False
-            
-            with open(self.cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
-            
-            self.category_map = cache_data['category_map']
-            self.vectorized_data = cache_data['vectorized_data']
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"캐시 로드 오류: {str(e)}")
-            return False
+    def find_category_code(self, category_format: str, index: CategoryIndex = None) -> tuple:
+        """카테고리 형식에 해당하는 코드 찾기 (index를 주면 해당 스냅샷 기준)"""
+        return (index or self.index).find_category_code(category_format)
 
-    def find_category_code(self, category_format: str) -> tuple:
-        """카테고리 형식에 해당하는 코드 찾기"""
-        try:
-            # 정확한 매칭 시도
-            if category_format in self.category_map:
-                return self.category_map[category_format], False
-            
-            # 벡터화된 데이터가 있으면 유사도 매칭
-            if self.vectorized_data:
-                try:
-                    from sklearn.metrics.pairwise import cosine_similarity
-                    
-                    # 입력 카테고리 벡터화
-                    input_vector = self.vectorized_data['vectorizer'].transform([category_format])
-                    
-                    # 유사도 계산
-                    similarities = cosine_similarity(input_vector, self.vectorized_data['vectors']).flatten()
-                    
-                    # 가장 유사한 카테고리 찾기
-                    best_match_idx = similarities.argmax()
-                    best_similarity = similarities[best_match_idx]
-                    best_category = self.vectorized_data['categories'][best_match_idx]
-                    best_code = self.vectorized_data['codes'][best_match_idx]
-                    logger.info(f"유사도 매칭 결과: {category_format} → {best_category} (유사도: {best_similarity:.3f})")
-                    # 유사도 임계값 이하라도 best_code를 반환, x 표시는 별도 로직에서 처리
-                    return best_code, True
-                except Exception as e:
-                    logger.error(f"벡터화 매칭 오류: {str(e)}")
-                    return '00000000', True
-            
-            # 기본값 반환
-            logger.warning(f"카테고리 매칭 실패: {category_format}")
-            return '00000000', True
-            
-        except Exception as e:
-            logger.error(f"카테고리 코드 찾기 오류: {str(e)}")
-            return '00000000', True
+def _record_fallback(fallbacks: Optional[Set[str]], keyword: str):
+    """업스트림 오류로 대체값을 쓴 키워드 기록 (Gemini 스레드에서도 호출됨, set.add는 원자적)"""
+    if fallbacks is not None:
+        fallbacks.add(keyword)
+
+def summarize_results(results: ResultColumns, output_file: str) -> dict:
+    """process_excel_file 형식의 처리 결과 요약"""
+    return {
+        'success': True,
+        'total_processed': len(results),
+        'success_count': results.success_count,
+        'error_count': len(results) - results.success_count,
+        'degraded_count': results.degraded_count,
+        'output_file': output_file,
+        'results': results
+    }
 
 def check_api_keys():
     """API 키 설정 상태 확인"""
     logger.info("=== API 키 설정 상태 확인 ===")
+    gemini_keys = len(CredentialPool.for_gemini([GEMINI_API_KEY]))
+    naver_keys = len(CredentialPool.for_naver([(NAVER_CLIENT_ID, NAVER_CLIENT_SECRET)]))
     
-    if GEMINI_API_KEY:
-        logger.info("✅ Gemini API 키가 설정되어 있습니다.")
+    if gemini_keys:
+        logger.info(f"✅ Gemini API 키가 설정되어 있습니다. ({gemini_keys}개)")
     else:
         logger.warning("❌ Gemini API 키가 설정되지 않았습니다.")
     
-    if NAVER_CLIENT_ID and NAVER_CLIENT_SECRET:
-        logger.info("✅ 네이버 API 키가 설정되어 있습니다.")
+    if naver_keys:
+        logger.info(f"✅ 네이버 API 키가 설정되어 있습니다. ({naver_keys}개)")
     else:
         logger.warning("❌ 네이버 API 키가 설정되지 않았습니다.")
     
     return {
-        'gemini_configured': bool(GEMINI_API_KEY),
-        'naver_configured': bool(NAVER_CLIENT_ID and NAVER_CLIENT_SECRET)
+        'gemini_configured': bool(gemini_keys),
+        'naver_configured': bool(naver_keys),
+        'gemini_keys': gemini_keys,
+        'naver_keys': naver_keys
     }
 
 # CLI/테스트 환경에서만 사용하세요. 서버(비동기 환경)에서는 절대 asyncio.run()을 사용하지 마세요.
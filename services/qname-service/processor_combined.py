@@ -7,7 +7,6 @@
 import os
 import pandas as pd
 import requests
-import random
 import time
 import re
 import asyncio
@@ -17,7 +16,9 @@ from dotenv import load_dotenv
 import google.generativeai as genai
 import logging
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
+
+from io_executor import run_io
 
 # 현재 스크립트 디렉토리 경로
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -25,33 +26,39 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # 로깅 설정
 import logging.handlers
 
-log_dir = os.path.join(SCRIPT_DIR, 'logs')
-os.makedirs(log_dir, exist_ok=True)
-
+log_dir = os.getenv("QNAME_LOG_DIR", os.path.join(SCRIPT_DIR, 'logs'))
 log_file = os.path.join(log_dir, f'qname_processor_{datetime.now().strftime("%Y%m%d")}.log')
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-file_handler = logging.handlers.TimedRotatingFileHandler(
-    log_file, 
-    when='midnight', 
-    interval=1, 
-    backupCount=7,
-    encoding='utf-8'
-)
-file_handler.setLevel(logging.INFO)
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
-
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
 console_handler.setFormatter(formatter)
-
-logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
+_file_handler = None
+
+
+def enable_file_logging():
+    """파일 로그 추가 (임포트만으로 logs/가 생기지 않도록 첫 프로세서 생성 시 호출)"""
+    global _file_handler
+    if _file_handler is not None:
+        return
+    os.makedirs(log_dir, exist_ok=True)
+    _file_handler = logging.handlers.TimedRotatingFileHandler(
+        log_file, 
+        when='midnight', 
+        interval=1, 
+        backupCount=7,
+        encoding='utf-8'
+    )
+    _file_handler.setLevel(logging.INFO)
+    _file_handler.setFormatter(formatter)
+    logger.addHandler(_file_handler)
+
 logger.info("QName Processor (키워드 조합 버전) 로깅 시스템 초기화 완료")
 
 # .env 파일 로드
@@ -95,13 +102,16 @@ logger.info("환경변수 로드 완료")
 class CombinedQNameProcessor:
     """QName 처리기 - 키워드 조합 최적화 버전"""
     
-    def __init__(self, batch_size=10, max_concurrent=5, min_keywords=3, max_keywords=5):
+    def __init__(self, batch_size=10, max_concurrent=5, min_keywords=3, max_keywords=5, max_candidates_per_row=2):
+        enable_file_logging()
         self.naver_url = "https://openapi.naver.com/v1/search/shop.json"
         self.category_mapper = CategoryMapper()
         self.batch_size = batch_size
         self.max_concurrent = max_concurrent
         self.min_keywords = min_keywords
         self.max_keywords = max_keywords
+        self.max_candidates_per_row = max_candidates_per_row  # 행당 API 호출 후보 수 상한
+        self._category_vocab = None
         
         # 카테고리 데이터 로드
         if not self.category_mapper.load_category_data():
@@ -115,73 +125,126 @@ class CombinedQNameProcessor:
             logger.error("GEMINI_API_KEY가 설정되지 않았습니다.")
             self.model = None
     
-    def create_keyword_combinations(self, keywords: List[str]) -> List[Dict]:
-        """키워드들을 조합하여 더 구체적인 검색어 생성"""
-        combinations = []
-        
-        # 키워드가 3개 미만이면 기본 조합 생성
-        if len(keywords) < self.min_keywords:
-            # 부족한 키워드를 기본값으로 채움
-            default_keywords = ['주방용품', '가정용', '실용적인']
-            while len(keywords) < self.min_keywords:
-                keywords.append(random.choice(default_keywords))
-        
-        # 슬라이딩 윈도우로 키워드 조합 생성
-        for i in range(len(keywords) - self.min_keywords + 1):
-            for j in range(self.min_keywords, min(self.max_keywords + 1, len(keywords) - i + 1)):
-                keyword_group = keywords[i:i+j]
-                combined_keyword = ' '.join(keyword_group)
-                
-                combination = {
-                    'original_keywords': keyword_group,
-                    'combined_keyword': combined_keyword,
-                    'start_index': i,
-                    'end_index': i + j
-                }
-                combinations.append(combination)
-        
-        logger.info(f"키워드 조합 생성: {len(keywords)}개 → {len(combinations)}개 조합")
-        return combinations
+    def create_row_combinations(self, keywords: List[str]) -> Tuple[List[Dict], List[List[int]]]:
+        """행별 키워드 조합 후보 생성 - 로컬 점수로 행당 후보 수를 제한하고 행 간 중복 제거"""
+        unique_combinations = []  # API로 처리할 고유 조합
+        combination_index = {}  # 조합 키워드 → unique_combinations 인덱스
+        row_candidates = []  # 행별 후보 조합 인덱스 (점수 높은 순)
+        total_candidates = 0
+        
+        for row_idx, keyword in enumerate(keywords):
+            tokens = self._tokenize_keyword(keyword)
+            
+            # 행 안의 후보를 로컬 점수로 정렬 (API 호출 전 선별)
+            scored = {}
+            for start, group in self._iter_token_windows(tokens):
+                combined_keyword = ' '.join(group)
+                if combined_keyword not in scored:
+                    scored[combined_keyword] = (self.score_combination(group, start), group)
+            total_candidates += len(scored)
+            ranked = sorted(scored.items(), key=lambda item: -item[1][0])
+            
+            candidate_ids = []
+            for combined_keyword, (score, group) in ranked[:self.max_candidates_per_row]:
+                combo_id = combination_index.get(combined_keyword)
+                if combo_id is None:
+                    combo_id = len(unique_combinations)
+                    combination_index[combined_keyword] = combo_id
+                    unique_combinations.append({
+                        'original_keywords': group,
+                        'combined_keyword': combined_keyword,
+                        'score': score,
+                        'rows': []
+                    })
+                unique_combinations[combo_id]['rows'].append(row_idx)
+                candidate_ids.append(combo_id)
+            row_candidates.append(candidate_ids)
+        
+        logger.info(
+            f"행별 키워드 조합 생성: {len(keywords)}행 → 후보 {total_candidates}개 → "
+            f"API 처리 {len(unique_combinations)}개 (행당 최대 {self.max_candidates_per_row}개, 중복 제거)"
+        )
+        return unique_combinations, row_candidates
+    
+    def score_combination(self, group: List[str], start: int = 0) -> float:
+        """카테고리 어휘 기반 로컬 점수 계산 (API 호출 없음)"""
+        vocab = self._get_category_vocab()
+        category_hits = sum(1 for token in group if token in vocab)
+        # 카테고리 단어 포함 > 조합 길이 > 앞쪽 키워드(메인키워드) 우선
+        return category_hits * 2 + min(len(group), self.max_keywords) * 0.5 - start * 0.1
     
-    def process_excel_file(self, file_path: str) -> dict:
-        """엑셀 파일을 처리하고 결과를 반환 - 키워드 조합 방식"""
+    def _get_category_vocab(self) -> set:
+        """카테고리 경로의 단어 집합 (점수 계산용, 최초 1회 생성)"""
+        if self._category_vocab is None:
+            vocab = set()
+            for category_format in self.category_mapper.category_map:
+                for part in str(category_format).split('>'):
+                    vocab.update(word for word in part.split('/') if word)
+            self._category_vocab = vocab
+        return self._category_vocab
+    
+    def _tokenize_keyword(self, keyword) -> List[str]:
+        """행 키워드를 중복 없는 단어 목록으로 분리"""
+        text = str(keyword).strip()
+        if not text or text.lower() == 'nan':
+            return []
+        tokens = []
+        for token in re.split(r'[\s,]+', text):
+            if token and token not in tokens:
+                tokens.append(token)
+        return tokens
+    
+    def _iter_token_windows(self, tokens: List[str]):
+        """슬라이딩 윈도우 조합 (시작 위치, 단어 목록) 생성"""
+        if len(tokens) <= self.min_keywords:
+            if tokens:
+                yield 0, tokens
+            return
+        for size in range(self.min_keywords, min(self.max_keywords, len(tokens)) + 1):
+            for start in range(len(tokens) - size + 1):
+                yield start, tokens[start:start + size]
+    
+    def _select_row_candidate(self, candidate_ids: List[int], classifications: List[Dict]) -> Optional[int]:
+        """행의 후보 중 네이버 카테고리 조회 결과로 1개 선택 (네이버 상품 있음 > 정확 매칭 카테고리 > 로컬 점수 순)"""
+        best_id, best_key = None, None
+        for position, combo_id in enumerate(candidate_ids):
+            classification = classifications[combo_id]
+            key = (classification['naver_found'], not classification['is_suspicious'], -position)
+            if best_key is None or key > best_key:
+                best_id, best_key = combo_id, key
+        return best_id
+    
+    async def process_excel_file(self, file_path: str) -> dict:
+        """엑셀 파일을 처리하고 결과를 반환 - 행별 키워드 조합 방식 (비동기)"""
         try:
             logger.info(f"파일 처리 시작: {file_path}")
             
-            # 엑셀 파일 읽기
-            df = pd.read_excel(file_path)
+            # 엑셀 파일 읽기 (이벤트 루프를 막지 않도록 I/O 실행기에서)
+            df = await run_io(pd.read_excel, file_path)
             logger.info(f"총 처리할 행 수: {len(df)}")
             
             if '메인키워드' not in df.columns:
                 raise ValueError("'메인키워드' 컬럼이 없습니다.")
             
-            # 키워드 추출 및 조합 생성
-            keywords = df['메인키워드'].tolist()
-            keyword_combinations = self.create_keyword_combinations(keywords)
+            # 행별 조합 후보 생성 (중복 제거, 행당 후보 수 제한)
+            keywords = df['메인키워드'].astype(str).tolist()
+            keyword_combinations, row_candidates = self.create_row_combinations(keywords)
             
-            # 비동기 처리 실행
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                results = loop.run_until_complete(
-                    self.process_combined_keywords_async(keyword_combinations)
-                )
-            finally:
-                loop.close()
+            # 후보는 네이버 카테고리로만 비교하고, 행마다 고른 조합만 Gemini로 생성
+            results = await self.process_row_candidates_async(keyword_combinations, row_candidates)
             
             # 결과를 DataFrame에 적용
             for i, result in enumerate(results):
-                if i < len(df):
-                    df.at[i, 'NAVERCODE'] = result.get('naver_code', '')
-                    df.at[i, '카테분류형식'] = result.get('category_format', '')
-                    df.at[i, 'SEO상품명'] = result.get('product_name', '')
-                    df.at[i, '연관검색어'] = result.get('related_keywords', '')
-                    df.at[i, '가공결과'] = result.get('status', '실패')
-                    df.at[i, '사용된키워드조합'] = result.get('used_combination', '')
+                df.at[i, 'NAVERCODE'] = result.get('naver_code', '')
+                df.at[i, '카테분류형식'] = result.get('category_format', '')
+                df.at[i, 'SEO상품명'] = result.get('product_name', '')
+                df.at[i, '연관검색어'] = result.get('related_keywords', '')
+                df.at[i, '가공결과'] = result.get('status', '실패')
+                df.at[i, '사용된키워드조합'] = result.get('used_combination', '')
             
             # 결과 파일 저장
             output_file = f"output_combined_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            df.to_excel(output_file, index=False)
+            await run_io(df.to_excel, output_file, index=False)
             
             success_count = sum(1 for r in results if r.get('status') == '완료')
             error_count = len(results) - success_count
@@ -205,59 +268,92 @@ class CombinedQNameProcessor:
                 'error_count': len(df) if 'df' in locals() else 0
             }
     
-    async def process_combined_keywords_async(self, keyword_combinations: List[Dict]) -> List[Dict]:
-        """조합된 키워드들을 배치 단위로 비동기 처리"""
-        logger.info(f"조합 키워드 비동기 배치 처리 시작: {len(keyword_combinations)}개 조합")
+    async def process_row_candidates_async(self, keyword_combinations: List[Dict], row_candidates: List[List[int]]) -> List[Dict]:
+        """행별 후보 조합 처리 - 모든 후보는 네이버 조회만 하고, 행마다 선택된 조합만 상품명/연관검색어 생성"""
+        if not keyword_combinations:
+            return [{'status': '실패'} for _ in row_candidates]
         
-        # 배치로 분할
-        batches = [keyword_combinations[i:i + self.batch_size] 
-                  for i in range(0, len(keyword_combinations), self.batch_size)]
-        logger.info(f"총 {len(batches)}개 배치로 분할")
+        async with aiohttp.ClientSession() as session:
+            classifications = await self.classify_combinations_async(session, keyword_combinations)
+            chosen = [self._select_row_candidate(candidate_ids, classifications) for candidate_ids in row_candidates]
+            chosen_ids = list(dict.fromkeys(combo_id for combo_id in chosen if combo_id is not None))
+            logger.info(f"행별 조합 선택: 후보 {len(keyword_combinations)}개 → Gemini 처리 {len(chosen_ids)}개")
+            generated = await self.generate_for_combinations_async(
+                session,
+                [keyword_combinations[combo_id] for combo_id in chosen_ids],
+                [classifications[combo_id] for combo_id in chosen_ids]
+            )
         
+        results_by_id = dict(zip(chosen_ids, generated))
+        return [results_by_id[combo_id] if combo_id is not None else {'status': '실패'} for combo_id in chosen]
+    
+    async def process_combined_keywords_async(self, keyword_combinations: List[Dict]) -> List[Dict]:
+        """조합된 키워드들을 모두 처리 (조합마다 네이버 조회 + 상품명/연관검색어 생성)"""
+        async with aiohttp.ClientSession() as session:
+            classifications = await self.classify_combinations_async(session, keyword_combinations)
+            return await self.generate_for_combinations_async(session, keyword_combinations, classifications)
+    
+    def _split_batches(self, items: List) -> List[List]:
+        return [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+    
+    async def classify_combinations_async(self, session: aiohttp.ClientSession, keyword_combinations: List[Dict]) -> List[Dict]:
+        """1단계: 조합별 네이버 카테고리 조회 및 카테고리 코드 매칭 (Gemini 호출 없음)"""
+        logger.info(f"조합 키워드 네이버 조회 시작: {len(keyword_combinations)}개 조합")
+        batches = self._split_batches(keyword_combinations)
+        classifications = []
+        
+        for batch_idx, batch in enumerate(batches):
+            combined_keywords = [item['combined_keyword'] for item in batch]
+            naver_results = await self.batch_naver_api(session, combined_keywords)
+            
+            for naver_result in naver_results:
+                category_format, core_keyword = self._extract_category_info(naver_result)
+                category_code, is_suspicious = self.category_mapper.find_category_code(category_format)
+                classifications.append({
+                    'naver_found': not naver_result.get('default', False),
+                    'category_format': category_format,
+                    'core_keyword': core_keyword,
+                    'naver_code': category_code,
+                    'is_suspicious': is_suspicious
+                })
+            
+            # 배치 간 딜레이
+            if batch_idx < len(batches) - 1:
+                await asyncio.sleep(0.5)
+        
+        return classifications
+    
+    async def generate_for_combinations_async(self, session: aiohttp.ClientSession, keyword_combinations: List[Dict],
+                                              classifications: List[Dict]) -> List[Dict]:
+        """2단계: 카테고리가 정해진 조합의 상품명/연관검색어를 배치 단위로 생성"""
+        logger.info(f"조합 키워드 상품명 생성 시작: {len(keyword_combinations)}개 조합")
+        batches = self._split_batches(list(zip(keyword_combinations, classifications)))
         all_results = []
         
-        async with aiohttp.ClientSession() as session:
-            for batch_idx, batch in enumerate(batches):
-                logger.info(f"배치 {batch_idx + 1}/{len(batches)} 처리 시작: {len(batch)}개 조합")
-                
-                # 조합된 키워드들로 API 호출
-                combined_keywords = [item['combined_keyword'] for item in batch]
-                
-                # 1단계: 네이버 API 배치 호출 (조합된 키워드로)
-                naver_results = await self.batch_naver_api(session, combined_keywords)
-                
-                # 2단계: 카테고리 정보 추출
-                category_infos = [self._extract_category_info(result) for result in naver_results]
-                
-                # 3단계: 상품명 생성 배치 호출
-                product_names = await self.batch_gemini_product(session, combined_keywords, category_infos)
-                
-                # 4단계: 연관검색어 생성 배치 호출
-                related_keywords = await self.batch_gemini_related(session, combined_keywords, product_names)
-                
-                # 5단계: 결과 통합
-                batch_results = []
-                for i, combination in enumerate(batch):
-                    category_format, core_keyword = category_infos[i]
-                    category_code, is_suspicious = self.category_mapper.find_category_code(category_format)
-                    
-                    result = {
-                        'original_keywords': combination['original_keywords'],
-                        'combined_keyword': combination['combined_keyword'],
-                        'naver_code': category_code,
-                        'category_format': f"{'X' if is_suspicious else ''}{category_format}",
-                        'product_name': product_names[i],
-                        'related_keywords': related_keywords[i],
-                        'used_combination': combination['combined_keyword'],
-                        'status': '완료'
-                    }
-                    batch_results.append(result)
-                
-                all_results.extend(batch_results)
-                
-                # 배치 간 딜레이
-                if batch_idx < len(batches) - 1:
-                    await asyncio.sleep(0.5)
+        for batch_idx, batch in enumerate(batches):
+            logger.info(f"배치 {batch_idx + 1}/{len(batches)} 처리 시작: {len(batch)}개 조합")
+            combined_keywords = [combination['combined_keyword'] for combination, _ in batch]
+            category_infos = [(info['category_format'], info['core_keyword']) for _, info in batch]
+            
+            # 상품명 생성 → 연관검색어 생성 배치 호출
+            product_names = await self.batch_gemini_product(session, combined_keywords, category_infos)
+            related_keywords = await self.batch_gemini_related(session, combined_keywords, product_names)
+            
+            for i, (combination, info) in enumerate(batch):
+                all_results.append({
+                    'original_keywords': combination['original_keywords'],
+                    'combined_keyword': combination['combined_keyword'],
+                    'naver_code': info['naver_code'],
+                    'category_format': f"{'X' if info['is_suspicious'] else ''}{info['category_format']}",
+                    'product_name': product_names[i],
+                    'related_keywords': related_keywords[i],
+                    'used_combination': combination['combined_keyword'],
+                    'status': '완료'
+                })
+            
+            # 배치 간 딜레이
+            if batch_idx < len(batches) - 1:
+                await asyncio.sleep(0.5)
         
         logger.info(f"조합 키워드 비동기 배치 처리 완료: {len(all_results)}개 결과")
         return all_results
@@ -483,6 +579,7 @@ class CombinedQNameProcessor:
         
         categories = category.split('>')
         return {
+            'default': True,  # 네이버 상품 없이 추정한 카테고리 (조합 후보 비교 시 후순위)
             'items': [{
                 'category1': categories[0] if len(categories) > 0 else '주방용품',
                 'category2': categories[1] if len(categories) > 1 else '주방용품',
@@ -767,8 +864,8 @@ def process_file(file_path: str) -> dict:
         # 프로세서 초기화 (키워드 조합 방식)
         processor = CombinedQNameProcessor(batch_size=10, max_concurrent=5, min_keywords=3, max_keywords=5)
         
-        # 파일 처리
-        result = processor.process_excel_file(file_path)
+        # 파일 처리 (CLI 전용 - 서버에서는 await processor.process_excel_file 사용)
+        result = asyncio.run(processor.process_excel_file(file_path))
         
         logger.info(f"=== 파일 처리 완료 ===")
         logger.info(f"처리 결과: {result}")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+비동기 토큰 버킷 레이트 리미터
+여러 작업(파일)이 하나의 업스트림 API 호출 한도를 공유할 때 사용합니다.
+"""
+
+import time
+import asyncio
+
+
+class AsyncRateLimiter:
+    """초당 요청 수를 제한하는 토큰 버킷"""
+
+    def __init__(self, rate_per_second: float, burst: int = None):
+        self.rate = float(rate_per_second)
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_second)))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.total_wait = 0.0  # 누적 대기 시간 (초)
+        self._lock = None
+
+    async def acquire(self, tokens: float = 1):
+        """토큰이 확보될 때까지 대기"""
+        tokens = min(tokens, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+                self.total_wait += wait
+                await asyncio.sleep(wait)
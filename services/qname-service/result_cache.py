@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+파일 단위 결과 캐시
+같은 워크북을 다시 올리면(다운로드 실패 후 재업로드, 동료가 같은 파일 업로드 등)
+네이버/Gemini 파이프라인을 다시 돌리지 않고 이전 결과 아티팩트를 바로 돌려줍니다.
+
+- 키: 업로드 내용 SHA-256 + 결과 버전(프로세서 출력 형식, 모델, 카테고리 인덱스, API 키 구성) + 옵션
+- 값: 결과 아티팩트 ID와 처리 요약 (파일은 ArtifactStore가 보관, 정리되면 캐시 항목도 무효)
+- 항목 수/보관기간 제한 LRU, 아티팩트 저장소 디렉토리에 JSON으로 저장해 재시작 후에도 유지
+- 간소화/기본값 대체 행이 있는 결과는 저장하지 않음 (2차 보강이 끝나면 보강된 결과로 등록)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from canonical import stable_hash
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+
+class FileResultCache:
+    """(업로드 해시, 결과 버전, 옵션) → 결과 아티팩트"""
+
+    def __init__(self, artifact_store, path: str = None, max_entries: int = None, ttl_seconds: float = None):
+        self.artifact_store = artifact_store
+        self.path = path or os.path.join(artifact_store.root, 'result_cache.json')
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.getenv("QNAME_RESULT_CACHE_MAX_ENTRIES", "500"))
+        # 아티팩트 보관기간보다 오래 가리킬 이유가 없음
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else artifact_store.max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional[OrderedDict] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(upload_sha256: str, result_version: str, **options) -> str:
+        return stable_hash(upload_sha256, result_version, *(f"{name}={options[name]}" for name in sorted(options)))
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """캐시된 결과 (요약 + 'artifact_id', 'path'), 없거나 아티팩트가 정리됐으면 None"""
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is not None and time.time() - entry['stored_at'] > self.ttl_seconds:
+                entry = None
+            path = self.artifact_store.path_for(entry['artifact_id']) if entry else None
+            if path is None:
+                if key in entries:
+                    del entries[key]
+                    self._save()
+                self.misses += 1
+                return None
+            entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry, path=path)
+
+    def store(self, key: str, artifact_id: str, summary: dict):
+        """완료된 결과 등록 (degraded 행이 있으면 저장하지 않음, 빈 행은 error_count에 포함되므로 보지 않음)"""
+        if summary.get('degraded_count'):
+            return
+        entry = {
+            'artifact_id': artifact_id,
+            'stored_at': time.time(),
+            'total_processed': summary.get('total_processed', 0),
+            'success_count': summary.get('success_count', 0),
+            'error_count': summary.get('error_count', 0),
+            'degraded_count': 0
+        }
+        with self._lock:
+            entries = self._load()
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._save()
+
+    def _load(self) -> OrderedDict:
+        """저장된 캐시 로드 (최초 사용 시 1회, 잠금 안에서 호출)"""
+        if self._entries is None:
+            self._entries = OrderedDict()
+            try:
+                if os.path.exists(self.path):
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if data.get('version') == CACHE_FORMAT_VERSION:
+                        self._entries.update(data.get('entries', []))
+                        logger.info(f"파일 결과 캐시 로드: {len(self._entries)}개")
+            except Exception as e:
+                logger.warning(f"파일 결과 캐시 로드 실패 (비워서 시작): {str(e)}")
+        return self._entries
+
+    def _save(self):
+        """원자적 저장 (잠금 안에서 호출)"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_FORMAT_VERSION, 'entries': list(self._entries.items())}, f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"파일 결과 캐시 저장 실패: {str(e)}")
+
+    def stats(self) -> dict:
+        # hits/misses는 lookup이 잠금 안에서 올리므로 같은 잠금 안에서 한 번에 읽음 (적중률 계산이 어긋나지 않도록)
+        with self._lock:
+            size = len(self._entries) if self._entries is not None else None
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 3) if total else 0.0
+        }
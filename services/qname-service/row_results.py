@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+행 결과 표현 (메모리 절약형)
+5만 행 작업에서 행마다 결과 dict를 만들어 모두 보관한 뒤 DataFrame에 다시 복사하면
+dict 오버헤드와 이중 복사가 최대 메모리를 좌우하므로,
+- RowResult: __slots__ 기반 행 결과 (배치 처리 중에만 잠깐 존재, dict처럼 get/[] 지원)
+- ResultColumns: 작업 전체 결과를 필드별 열 버퍼로 보관 (행 객체 없이)
+- read_keyword_column / write_results_workbook: openpyxl read-only/write-only 모드로
+  원본 시트를 행 단위로 스트리밍하며 결과 열을 채워 저장 (중간 DataFrame 없음)
+"""
+
+import os
+import tempfile
+from typing import Iterable, Iterator, List, Optional
+
+RESULT_FIELDS = (
+    'keyword', 'canonical_keyword', 'naver_code', 'category_format', 'product_name',
+    'related_keywords', 'naver_tags', 'status', 'degraded'
+)
+# degraded: 시간 예산 간소화 모드나 업스트림 일시 오류로 기본 생성값을 쓴 행 (2차 보강 대상)
+
+# 열 버퍼로 보관하는 문자열 필드 (degraded는 bytearray로 별도 보관)
+_TEXT_FIELDS = RESULT_FIELDS[:-1]
+
+KEYWORD_COLUMN = '메인키워드'
+
+# 결과 필드 → 출력 엑셀 열 (원본에 없는 열은 이 순서로 오른쪽에 추가)
+OUTPUT_COLUMNS = (
+    ('naver_code', 'NAVERCODE'),
+    ('category_format', '카테분류형식'),
+    ('product_name', 'SEO상품명'),
+    ('related_keywords', '연관검색어'),
+    ('naver_tags', '네이버태그'),
+    ('status', '가공결과'),
+)
+DEGRADED_COLUMN = '간소화처리'
+
+
+class RowResult:
+    """행 1개의 처리 결과"""
+
+    __slots__ = RESULT_FIELDS
+
+    def __init__(self, keyword: str = '', canonical_keyword: str = '', naver_code='', category_format: str = '',
+                 product_name: str = '', related_keywords: str = '', naver_tags: str = '', status: str = '실패',
+                 degraded: bool = False):
+        self.keyword = keyword
+        self.canonical_keyword = canonical_keyword
+        self.naver_code = naver_code
+        self.category_format = category_format
+        self.product_name = product_name
+        self.related_keywords = related_keywords
+        self.naver_tags = naver_tags
+        self.status = status
+        self.degraded = degraded
+
+    @classmethod
+    def skipped(cls, keyword: str) -> 'RowResult':
+        """빈 셀/'nan' 행 (업스트림 호출 없이 건너뜀)"""
+        return cls(keyword=keyword, status='건너뜀')
+
+    def with_keyword(self, keyword: str, canonical_keyword: str) -> 'RowResult':
+        """같은 정규 키워드 결과를 원본 키워드 행에 복사 (문자열은 공유)"""
+        return RowResult(keyword, canonical_keyword, self.naver_code, self.category_format, self.product_name,
+                         self.related_keywords, self.naver_tags, self.status, self.degraded)
+
+    def get(self, name: str, default=None):
+        return getattr(self, name) if name in RESULT_FIELDS else default
+
+    def __getitem__(self, name: str):
+        if name not in RESULT_FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in RESULT_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"RowResult({self.keyword!r}, status={self.status!r})"
+
+
+class ResultColumns:
+    """작업 결과 열 버퍼 - 행 순서대로 필드별 리스트에 기록
+    RowResult/dict 모두 추가할 수 있고, 순회하면 RowResult를 그때그때 만들어 돌려줌"""
+
+    def __init__(self, results: Iterable = ()):
+        self._columns = {name: [] for name in _TEXT_FIELDS}
+        self._degraded = bytearray()
+        self.extend(results)
+
+    def append(self, result):
+        for name, column in self._columns.items():
+            column.append(result.get(name, '실패' if name == 'status' else ''))
+        self._degraded.append(1 if result.get('degraded') else 0)
+
+    def extend(self, results: Iterable):
+        for result in results:
+            self.append(result)
+
+    def column(self, name: str) -> list:
+        """필드 열 (degraded는 bool 목록으로 변환)"""
+        if name == 'degraded':
+            return [bool(flag) for flag in self._degraded]
+        return self._columns[name]
+
+    @property
+    def success_count(self) -> int:
+        return self._columns['status'].count('완료')
+
+    @property
+    def degraded_count(self) -> int:
+        return self._degraded.count(1)
+
+    def __len__(self) -> int:
+        return len(self._degraded)
+
+    def __getitem__(self, index: int) -> RowResult:
+        values = [self._columns[name][index] for name in _TEXT_FIELDS]
+        return RowResult(*values, degraded=bool(self._degraded[index]))
+
+    def __setitem__(self, index: int, result):
+        """행 결과 교체 (2차 보강 결과 반영)"""
+        for name, column in self._columns.items():
+            column[index] = result.get(name, '실패' if name == 'status' else '')
+        self._degraded[index] = 1 if result.get('degraded') else 0
+
+    def degraded_indices(self) -> List[int]:
+        return [index for index, flag in enumerate(self._degraded) if flag]
+
+    def __iter__(self) -> Iterator[RowResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+def _iter_sheet_rows(worksheet) -> Iterator[tuple]:
+    """시트 행 순회 (중간 빈 행은 유지하고 끝쪽 빈 행은 제외 - pandas.read_excel과 같은 행 구성)"""
+    blank_rows = 0
+    for row in worksheet.iter_rows(values_only=True):
+        if all(value is None for value in row):
+            blank_rows += 1
+            continue
+        for _ in range(blank_rows):
+            yield ()
+        blank_rows = 0
+        yield row
+
+
+def read_keyword_column(path: str) -> List[str]:
+    """첫 시트의 '메인키워드' 열을 행 순서대로 읽음 (빈 셀은 '')"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = _iter_sheet_rows(workbook.worksheets[0])
+        header = list(next(rows, ()))
+        if KEYWORD_COLUMN not in header:
+            raise ValueError(f"'{KEYWORD_COLUMN}' 컬럼이 없습니다.")
+        position = header.index(KEYWORD_COLUMN)
+        keywords = []
+        for row in rows:
+            value = row[position] if position < len(row) else None
+            keywords.append('' if value is None else str(value))
+        return keywords
+    finally:
+        workbook.close()
+
+
+def count_data_rows(path: str, stop_at: int = None) -> int:
+    """첫 시트의 헤더를 뺀 행 수 (read_keyword_column과 같은 행 구성, stop_at에 닿으면 더 읽지 않음)"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = _iter_sheet_rows(workbook.worksheets[0])
+        next(rows, None)
+        count = 0
+        for _ in rows:
+            count += 1
+            if stop_at is not None and count >= stop_at:
+                break
+        return count
+    finally:
+        workbook.close()
+
+
+def write_results_workbook(input_path: str, results: ResultColumns, output_path: str,
+                           flag_degraded: bool = False, sheet_title: Optional[str] = None):
+    """원본 시트를 행 단위로 읽으면서 결과 열을 채워 새 통합문서로 저장
+    같은 디렉토리의 임시 파일에 쓴 뒤 os.replace로 교체 (중간 상태 파일 노출 방지)"""
+    from openpyxl import Workbook, load_workbook
+    source = load_workbook(input_path, read_only=True, data_only=True)
+    try:
+        source_sheet = source.worksheets[0]
+        rows = _iter_sheet_rows(source_sheet)
+        header = list(next(rows, ()))
+
+        fields = list(OUTPUT_COLUMNS)
+        if flag_degraded:
+            fields.append(('degraded', DEGRADED_COLUMN))
+        buffers = []
+        for name, column_title in fields:
+            if column_title not in header:
+                header.append(column_title)
+            if name == 'degraded':
+                column = ['Y' if flag else '' for flag in results.column('degraded')]
+            else:
+                column = results.column(name)
+            buffers.append((header.index(column_title), column))
+
+        output = Workbook(write_only=True)
+        sheet = output.create_sheet(title=sheet_title or source_sheet.title)
+        sheet.append(header)
+        for index, row in enumerate(rows):
+            values = list(row[:len(header)]) + [None] * (len(header) - len(row))
+            if index < len(results):
+                for position, column in buffers:
+                    values[position] = column[index]
+            sheet.append(values)
+
+        directory = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.xlsx', dir=directory)
+        os.close(fd)
+        try:
+            output.save(temp_path)
+            os.replace(temp_path, output_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    finally:
+        source.close()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+QName 작업 스케줄러 - 사용자별 가중 공정 큐잉(WFQ) + 우선순위 레인
+여러 작업의 행(row)을 하나의 업스트림 동시 실행 한도 안에서 번갈아 실행하여,
+대용량 파일 하나가 모든 슬롯을 점유하지 않도록 합니다.
+- interactive 레인(단건 미리보기): 항상 먼저 배정, 예약 슬롯 보유
+- bulk 레인(파일/배치 작업): 예약 슬롯을 제외한 범위에서만 실행,
+  행이 끝날 때마다 슬롯을 반납하므로 행 경계에서 interactive 요청에 양보
+- background 레인(2차 보강 등): bulk 대기 행이 없을 때만, bulk가 쓰지 않는 슬롯 중
+  최대 QNAME_BACKGROUND_MAX_ROWS개까지 실행
+"""
+
+import os
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_USER = "anonymous"
+
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+LANE_BACKGROUND = "background"
+LANES = (LANE_INTERACTIVE, LANE_BULK, LANE_BACKGROUND)  # 배정 우선순위 순서
+
+
+def parse_user_weights(value: str) -> Dict[str, float]:
+    """'user1=2,user2=0.5' 형식의 사용자 가중치 파싱"""
+    weights = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        user_id, weight = item.split("=", 1)
+        try:
+            weights[user_id.strip()] = max(0.01, float(weight))
+        except ValueError:
+            continue
+    return weights
+
+
+class _UserState:
+    """사용자별 대기열/실행 상태"""
+
+    __slots__ = ('weight', 'in_flight', 'last_tag', 'waiters', 'completed')
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.in_flight = 0
+        self.last_tag = 0.0
+        self.waiters = deque()  # (가상 완료 시각, future)
+        self.completed = 0
+
+
+class _Lane:
+    """우선순위 레인별 사용자 상태와 가상 시각"""
+
+    __slots__ = ('users', 'in_flight', 'virtual_time', 'completed')
+
+    def __init__(self):
+        self.users: Dict[str, _UserState] = {}
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self.completed = 0
+
+
+class FairScheduler:
+    """행 단위 실행 슬롯을 레인 우선순위와 사용자별 가중치에 따라 공정하게 분배"""
+
+    def __init__(self, max_in_flight: int = None, max_in_flight_per_user: int = None,
+                 weights: Dict[str, float] = None, default_weight: float = 1.0,
+                 interactive_reserved: int = None, background_max: int = None):
+        self.max_in_flight = max_in_flight or int(os.getenv("QNAME_MAX_IN_FLIGHT_ROWS", "12"))
+        self.max_in_flight_per_user = max_in_flight_per_user or int(os.getenv("QNAME_MAX_IN_FLIGHT_PER_USER", "6"))
+        self.weights = weights if weights is not None else parse_user_weights(os.getenv("QNAME_USER_WEIGHTS", ""))
+        self.default_weight = default_weight
+        # interactive 전용 예약 슬롯 (bulk는 max_in_flight - 예약분까지만 사용)
+        reserved = interactive_reserved if interactive_reserved is not None else int(
+            os.getenv("QNAME_INTERACTIVE_RESERVED_ROWS", "2"))
+        self.interactive_reserved = min(max(0, reserved), self.max_in_flight - 1)
+        self.background_max = background_max if background_max is not None else int(
+            os.getenv("QNAME_BACKGROUND_MAX_ROWS", "2"))
+        self.in_flight = 0
+        self._lanes: Dict[str, _Lane] = {lane: _Lane() for lane in LANES}
+
+    def _lane(self, lane: Optional[str]) -> _Lane:
+        if lane not in self._lanes:
+            raise ValueError(f"알 수 없는 레인: {lane}")
+        return self._lanes[lane]
+
+    def _lane_limit(self, lane: str) -> int:
+        if lane == LANE_BULK:
+            return self.max_in_flight - self.interactive_reserved
+        if lane == LANE_BACKGROUND:
+            # interactive 예약 슬롯과 bulk 실행 중인 슬롯은 건드리지 않음
+            bulk_limit = self.max_in_flight - self.interactive_reserved
+            return max(0, min(self.background_max, bulk_limit - self._lanes[LANE_BULK].in_flight))
+        return self.max_in_flight
+
+    def _state(self, lane: _Lane, user_id: str) -> _UserState:
+        state = lane.users.get(user_id)
+        if state is None:
+            state = _UserState(self.weights.get(user_id, self.default_weight))
+            lane.users[user_id] = state
+        return state
+
+    async def acquire(self, user_id: Optional[str] = None, lane: str = LANE_BULK):
+        """실행 슬롯 확보 (레인 우선순위와 공정 순서가 될 때까지 대기)"""
+        user_id = user_id or ANONYMOUS_USER
+        lane_state = self._lane(lane)
+        state = self._state(lane_state, user_id)
+        # 가상 완료 시각: 가중치가 클수록 간격이 좁아져 더 자주 선택됨
+        tag = max(lane_state.virtual_time, state.last_tag) + 1.0 / state.weight
+        state.last_tag = tag
+
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.append((tag, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 슬롯을 받은 직후 취소된 경우 반납
+                self.release(user_id, lane, completed=False)
+            else:
+                self._remove_waiter(state, future)
+                self._cleanup(lane_state, user_id)
+            raise
+
+    def release(self, user_id: Optional[str] = None, lane: str = LANE_BULK, completed: bool = True):
+        """실행 슬롯 반납 후 다음 대기 행 배정 (bulk 행 경계에서 interactive가 먼저 배정됨)"""
+        user_id = user_id or ANONYMOUS_USER
+        lane_state = self._lane(lane)
+        state = lane_state.users.get(user_id)
+        if state is None:
+            return
+        state.in_flight -= 1
+        lane_state.in_flight -= 1
+        if completed:
+            state.completed += 1
+            lane_state.completed += 1
+        self.in_flight -= 1
+        self._dispatch()
+        self._cleanup(lane_state, user_id)
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[str] = None, lane: str = LANE_BULK):
+        await self.acquire(user_id, lane)
+        try:
+            yield
+        finally:
+            self.release(user_id, lane)
+
+    def _dispatch(self):
+        """우선순위가 높은 레인부터, 레인 안에서는 가상 완료 시각이 가장 이른 대기 행에 슬롯 배정"""
+        for lane in LANES:
+            lane_state = self._lanes[lane]
+            if lane == LANE_BACKGROUND and self._has_waiters(self._lanes[LANE_BULK]):
+                break
+            lane_limit = self._lane_limit(lane)
+            while self.in_flight < self.max_in_flight and lane_state.in_flight < lane_limit:
+                best_user = None
+                best_tag = None
+                for user_id, state in lane_state.users.items():
+                    while state.waiters and state.waiters[0][1].done():
+                        state.waiters.popleft()  # 취소된 대기 제거
+                    if not state.waiters or state.in_flight >= self.max_in_flight_per_user:
+                        continue
+                    tag = state.waiters[0][0]
+                    if best_tag is None or tag < best_tag:
+                        best_user, best_tag = user_id, tag
+                if best_user is None:
+                    break
+
+                state = lane_state.users[best_user]
+                _, future = state.waiters.popleft()
+                state.in_flight += 1
+                lane_state.in_flight += 1
+                self.in_flight += 1
+                lane_state.virtual_time = max(lane_state.virtual_time, best_tag)
+                future.set_result(None)
+
+    @staticmethod
+    def _has_waiters(lane_state: _Lane) -> bool:
+        return any(not future.done() for state in lane_state.users.values() for _, future in state.waiters)
+
+    def _remove_waiter(self, state: _UserState, future: asyncio.Future):
+        for item in list(state.waiters):
+            if item[1] is future:
+                state.waiters.remove(item)
+                break
+
+    def _cleanup(self, lane_state: _Lane, user_id: str):
+        state = lane_state.users.get(user_id)
+        if state is not None and state.in_flight == 0 and not state.waiters:
+            del lane_state.users[user_id]
+
+    def stats(self) -> dict:
+        """레인별/사용자별 실행/대기 행 수"""
+        lanes = {}
+        for lane, lane_state in self._lanes.items():
+            users = {
+                user_id: {
+                    'in_flight': state.in_flight,
+                    'waiting': len(state.waiters),
+                    'weight': state.weight
+                }
+                for user_id, state in lane_state.users.items()
+            }
+            lanes[lane] = {
+                'limit': self._lane_limit(lane),
+                'in_flight': lane_state.in_flight,
+                'waiting': sum(user['waiting'] for user in users.values()),
+                'completed': lane_state.completed,
+                'users': users
+            }
+        return {
+            'max_in_flight': self.max_in_flight,
+            'max_in_flight_per_user': self.max_in_flight_per_user,
+            'interactive_reserved': self.interactive_reserved,
+            'background_max': self.background_max,
+            'in_flight': self.in_flight,
+            'waiting': sum(lane['waiting'] for lane in lanes.values()),
+            'lanes': lanes
+        }
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+대용량 업로드 샤드 분산 처리 (코디네이터 모드)
+업로드 파일의 키워드를 행 범위(샤드)로 나눠 여러 qname 워커 레플리카의
+/api/qname/process-batch(NDJSON)로 보내고, 샤드별 완료/실패를 추적해 실패한 샤드는
+다른 워커로 재시도한 뒤 행 순서대로 결과를 합쳐 하나의 엑셀 파일로 저장합니다.
+
+- 워커 목록: QNAME_WORKER_URLS (쉼표 구분, 예: http://qname-1:8000,http://qname-2:8000)
+- 샤드 크기: QNAME_SHARD_SIZE (기본 1000행)
+- 샤드 분산 최소 행 수: QNAME_SHARD_MIN_ROWS (기본 샤드 크기, 미만이면 코디네이터 인스턴스에서 직접 처리)
+- 워커 호출에는 QNAME_INTERNAL_TOKEN을 X-Internal-Token으로 실어 보냄 (워커가 X-User-ID를 믿도록, user_identity.py)
+- 테스트/단일 인스턴스용으로 같은 프로세스의 프로세서를 쓰는 LocalShardWorker 제공
+
+사용 예:
+    python shard_coordinator.py catalogue.xlsx -o result.xlsx --workers http://qname-1:8000,http://qname-2:8000
+    python shard_coordinator.py catalogue.xlsx -o result.xlsx --local 2
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+from row_results import RowResult, ResultColumns
+from user_identity import INTERNAL_TOKEN_HEADER, USER_ID_HEADER
+
+logger = logging.getLogger(__name__)
+
+
+class ShardFailed(Exception):
+    """재시도 횟수를 모두 쓴 샤드가 있어 작업을 완료할 수 없음"""
+
+    def __init__(self, shard_index: int, error: str):
+        self.shard_index = shard_index
+        self.error = error
+        super().__init__(f"샤드 {shard_index + 1} 처리 실패: {error}")
+
+
+def parse_worker_urls(value: str) -> List[str]:
+    """'http://a:8000,http://b:8000' 형식의 워커 URL 목록 파싱"""
+    return [url.strip().rstrip('/') for url in (value or "").split(",") if url.strip()]
+
+
+class HttpShardWorker:
+    """다른 qname 레플리카의 process-batch 엔드포인트로 샤드를 보내는 워커"""
+
+    def __init__(self, base_url: str, read_timeout: float = None):
+        self.base_url = base_url.rstrip('/')
+        self.read_timeout = read_timeout or float(os.getenv("QNAME_SHARD_READ_TIMEOUT", "300"))
+        # 워커는 이 토큰이 맞을 때만 X-User-ID(코디네이터가 확인한 사용자)를 공정 분배에 사용
+        self.internal_token = os.getenv("QNAME_INTERNAL_TOKEN", "")
+        self.name = self.base_url
+
+    async def process(self, keywords: List[str], user_id: str = None, time_budget: float = None) -> List[RowResult]:
+        """빈 셀 행은 보내지 않고 여기서 '건너뜀' 행으로 채움 (샤드 없이 처리하는 파일 경로와 같은 결과)"""
+        sent = [index for index, keyword in enumerate(keywords) if str(keyword or '').strip()]
+        results = [RowResult.skipped(keyword) for keyword in keywords]
+        if sent:
+            rows = await self._post_batch([keywords[index] for index in sent], user_id, time_budget)
+            for index, row in zip(sent, rows):
+                results[index] = row
+        return results
+
+    async def _post_batch(self, keywords: List[str], user_id: str = None, time_budget: float = None) -> List[RowResult]:
+        import aiohttp
+        body = "".join(json.dumps(keyword, ensure_ascii=False) + "\n" for keyword in keywords).encode('utf-8')
+        headers = {"Content-Type": "application/x-ndjson"}
+        if user_id:
+            headers[USER_ID_HEADER] = user_id
+        if self.internal_token:
+            headers[INTERNAL_TOKEN_HEADER] = self.internal_token
+        params = {"time_budget": str(time_budget)} if time_budget else None
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=self.read_timeout)
+
+        rows = []
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.post(f"{self.base_url}/api/qname/process-batch", data=body,
+                                    headers=headers, params=params) as response:
+                if response.status != 200:
+                    detail = (await response.text())[:200]
+                    raise RuntimeError(f"HTTP {response.status}: {detail}")
+                async for raw_line in response.content:
+                    if not raw_line.strip():
+                        continue
+                    line = json.loads(raw_line)
+                    if 'error' in line:
+                        raise RuntimeError(line['error'])
+                    if 'summary' in line:
+                        continue
+                    rows.append(self._row_from_line(line))
+
+        if len(rows) != len(keywords):
+            raise RuntimeError(f"결과 행 수 불일치: {len(rows)}/{len(keywords)}")
+        return rows
+
+    def _row_from_line(self, line: dict) -> RowResult:
+        """NDJSON 결과 줄을 프로세서 결과 형식으로 변환"""
+        return RowResult(
+            keyword=line.get('keyword', ''),
+            canonical_keyword=line.get('canonical_keyword', ''),
+            naver_code=line.get('category_code', ''),
+            category_format=line.get('category_format', ''),
+            product_name=line.get('product_name', ''),
+            related_keywords=line.get('related_keywords', ''),
+            naver_tags=line.get('naver_tags', ''),
+            status=line.get('status', '실패'),
+            degraded=bool(line.get('degraded'))
+        )
+
+
+class LocalShardWorker:
+    """같은 프로세스의 프로세서로 샤드를 처리하는 워커 (테스트/단일 인스턴스용)"""
+
+    def __init__(self, processor, name: str = "local"):
+        self.processor = processor
+        self.name = name
+
+    async def process(self, keywords: List[str], user_id: str = None, time_budget: float = None) -> ResultColumns:
+        batch_size = self.processor.calculate_optimal_batch_size(len(keywords))
+        return await self.processor.process_keywords_async(
+            keywords, batch_size, user_id=user_id, time_budget=time_budget
+        )
+
+
+class ShardCoordinator:
+    """키워드 목록을 샤드로 나눠 여러 워커에 분배하고 순서대로 합침"""
+
+    def __init__(self, workers: list, shard_size: int = None, max_attempts: int = None,
+                 max_worker_failures: int = 3, min_rows: int = None):
+        if not workers:
+            raise ValueError("워커가 하나 이상 필요합니다.")
+        self.workers = workers
+        self.shard_size = shard_size or int(os.getenv("QNAME_SHARD_SIZE", "1000"))
+        self.max_attempts = max_attempts or int(os.getenv("QNAME_SHARD_MAX_ATTEMPTS", "3"))
+        # 작은 파일은 워커 왕복/파일 재작성 비용이 처리 시간보다 커서 샤드로 나누지 않음
+        self.min_rows = min_rows if min_rows is not None else int(
+            os.getenv("QNAME_SHARD_MIN_ROWS", str(self.shard_size)))
+        self.max_worker_failures = max_worker_failures
+        self.jobs: Dict[str, dict] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional['ShardCoordinator']:
+        """QNAME_WORKER_URLS가 설정되어 있으면 HTTP 워커 코디네이터 생성"""
+        urls = parse_worker_urls(os.getenv("QNAME_WORKER_URLS", ""))
+        if not urls:
+            return None
+        return cls([HttpShardWorker(url) for url in urls])
+
+    def should_shard(self, row_count: int) -> bool:
+        """이 행 수의 파일을 워커로 분산할지 (QNAME_SHARD_MIN_ROWS 미만이면 로컬 처리)"""
+        return row_count >= self.min_rows
+
+    async def process_keywords(self, keywords: List[str], user_id: str = None,
+                               time_budget: float = None) -> ResultColumns:
+        """샤드 분산 처리 후 원래 행 순서의 결과 반환 (실패 샤드는 재시도, 끝내 실패하면 ShardFailed)"""
+        shards = [keywords[i:i + self.shard_size] for i in range(0, len(keywords), self.shard_size)]
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'rows': len(keywords),
+            'shards': len(shards),
+            'completed': 0,
+            'retries': 0,
+            'started': time.time()
+        }
+        self.jobs[job_id] = job
+        deadline = time.monotonic() + time_budget if time_budget else None
+        logger.info(f"샤드 작업 {job_id} 시작: {len(keywords)}행, {len(shards)}개 샤드, 워커 {len(self.workers)}개")
+
+        results: List[Optional[ResultColumns]] = [None] * len(shards)
+        attempts = [0] * len(shards)
+        pending = [len(shards)]
+        active_workers = [len(self.workers)]
+        failure: List[ShardFailed] = []
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(len(shards)):
+            queue.put_nowait(index)
+
+        def finish():
+            # 대기 중인 모든 워커를 종료시킴
+            for _ in self.workers:
+                queue.put_nowait(None)
+
+        if not shards:
+            finish()
+
+        async def run_worker(worker):
+            consecutive_failures = 0
+            while True:
+                index = await queue.get()
+                if index is None or failure:
+                    return
+                attempts[index] += 1
+                remaining = max(1.0, deadline - time.monotonic()) if deadline else None
+                try:
+                    results[index] = ResultColumns(
+                        await worker.process(shards[index], user_id=user_id, time_budget=remaining)
+                    )
+                except Exception as e:
+                    consecutive_failures += 1
+                    logger.warning(f"샤드 작업 {job_id}: 샤드 {index + 1} 실패 ({worker.name}, "
+                                   f"{attempts[index]}/{self.max_attempts}회): {str(e)}")
+                    if attempts[index] >= self.max_attempts:
+                        failure.append(ShardFailed(index, str(e)))
+                        finish()
+                        return
+                    job['retries'] += 1
+                    queue.put_nowait(index)
+                    # 연속으로 실패하는 워커는 다른 워커가 남아 있으면 제외 (재시도는 남은 워커가 처리)
+                    if consecutive_failures >= self.max_worker_failures and active_workers[0] > 1:
+                        logger.error(f"샤드 작업 {job_id}: 워커 제외 ({worker.name})")
+                        active_workers[0] -= 1
+                        return
+                    # 재시도가 다른 워커에 먼저 배정되도록 양보
+                    await asyncio.sleep(0)
+                    continue
+
+                consecutive_failures = 0
+                job['completed'] += 1
+                logger.info(f"샤드 작업 {job_id}: 샤드 {index + 1}/{len(shards)} 완료 ({worker.name})")
+                pending[0] -= 1
+                if pending[0] == 0:
+                    finish()
+
+        try:
+            await asyncio.gather(*(run_worker(worker) for worker in self.workers))
+            if failure:
+                raise failure[0]
+        finally:
+            self.jobs.pop(job_id, None)
+
+        elapsed = time.time() - job['started']
+        logger.info(f"샤드 작업 {job_id} 완료: {len(keywords)}행, 재시도 {job['retries']}회, {elapsed:.1f}초")
+        merged = ResultColumns()
+        for shard_results in results:
+            merged.extend(shard_results)
+        return merged
+
+    async def process_excel_file(self, file_path: str, output_path: str, user_id: str = None,
+                                 time_budget: float = None) -> dict:
+        """엑셀 파일을 샤드 분산 처리하고 결과를 하나의 파일로 저장 (프로세서와 같은 결과 형식)"""
+        from processor import summarize_results
+        from row_results import read_keyword_column, write_results_workbook
+        from io_executor import run_io
+        try:
+            keywords = await run_io(read_keyword_column, file_path)
+
+            results = await self.process_keywords(keywords, user_id=user_id, time_budget=time_budget)
+
+            await run_io(write_results_workbook, file_path, results, output_path, bool(time_budget))
+            return summarize_results(results, output_path)
+        except Exception as e:
+            logger.error(f"샤드 파일 처리 오류: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'total_processed': 0,
+                'success_count': 0,
+                'error_count': len(keywords) if 'keywords' in locals() else 0
+            }
+
+    @property
+    def result_version(self) -> str:
+        """파일 결과 캐시용 구성 식별자 - 워커의 카테고리/키 구성은 여기서 알 수 없으므로
+        워커 목록만 반영 (워커 쪽 변경은 결과 캐시 보관기간이 지나야 반영됨)"""
+        return "shards:" + ",".join(sorted(worker.name for worker in self.workers))
+
+    def stats(self) -> dict:
+        """워커 목록과 진행 중인 샤드 작업 현황"""
+        return {
+            'workers': [worker.name for worker in self.workers],
+            'shard_size': self.shard_size,
+            'jobs': {job_id: dict(job) for job_id, job in self.jobs.items()}
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QName 대용량 파일 샤드 분산 처리")
+    parser.add_argument('input', help="입력 엑셀 파일")
+    parser.add_argument('-o', '--output', required=True, help="결과 엑셀 파일")
+    parser.add_argument('--workers', default=os.getenv("QNAME_WORKER_URLS", ""),
+                        help="워커 URL 목록 (쉼표 구분, 기본값 QNAME_WORKER_URLS)")
+    parser.add_argument('--local', type=int, default=0, help="HTTP 대신 로컬 워커 N개 사용")
+    parser.add_argument('--shard-size', type=int, default=None, help="샤드당 행 수")
+    parser.add_argument('--time-budget', type=float, default=None, help="전체 작업 시간 예산(초)")
+    args = parser.parse_args()
+
+    if args.local:
+        from processor import OptimizedQNameProcessor
+        processor = OptimizedQNameProcessor()
+        workers = [LocalShardWorker(processor, name=f"local-{i + 1}") for i in range(args.local)]
+    else:
+        workers = [HttpShardWorker(url) for url in parse_worker_urls(args.workers)]
+    if not workers:
+        print("워커가 없습니다. --workers 또는 --local을 지정하세요.")
+        sys.exit(1)
+
+    coordinator = ShardCoordinator(workers, shard_size=args.shard_size)
+    started = time.time()
+    result = asyncio.run(coordinator.process_excel_file(args.input, args.output, time_budget=args.time_budget))
+    elapsed = time.time() - started
+
+    if not result['success']:
+        print(f"❌ 처리 실패: {result['error']}")
+        sys.exit(1)
+    print(f"✅ {result['total_processed']}행 처리 ({result['success_count']}행 성공), "
+          f"{elapsed:.1f}초 → {result['output_file']}")
+
+
+if __name__ == "__main__":
+    main()
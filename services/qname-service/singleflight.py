@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+진행 중 업스트림 호출 공유 (singleflight)
+같은 키워드가 들어 있는 작업 여러 개가 동시에 돌면 캐시 항목이 생기기 전에 같은 네이버 조회/
+Gemini 프롬프트를 각자 호출하게 됩니다. 같은 키(캐시 키와 동일)의 호출이 진행 중이면
+새로 호출하지 않고 진행 중인 호출의 결과를 함께 기다립니다.
+
+- 결과/예외는 기다리는 모든 호출자에게 똑같이 전달
+- 호출자 하나가 취소돼도 다른 호출자가 기다리는 동안에는 호출을 계속하고,
+  기다리는 호출자가 모두 취소되면 진행 중인 호출도 취소
+- 호출이 끝나면 키를 바로 비움 (결과 보관은 LRUCache 몫)
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class _Call:
+    """키 1개의 진행 중 호출과 기다리는 호출자 수"""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """키별 진행 중 호출 공유 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.shared = 0
+        self._inflight: Dict[str, _Call] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """key의 호출이 진행 중이면 그 결과를, 아니면 func()를 실행한 결과를 반환"""
+        call = self._inflight.get(key)
+        if call is None:
+            self.calls += 1
+            # 첫 호출자가 취소돼도 다른 호출자를 위해 계속 실행되도록 별도 태스크로 실행
+            call = _Call(asyncio.ensure_future(func()))
+            self._inflight[key] = call
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+        else:
+            self.shared += 1
+            logger.debug("진행 중 호출 공유: %s %s", self.name, key[:12], extra={'category': 'singleflight'})
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # 취소 중인 호출에 새 호출자가 붙지 않도록 키를 먼저 비움
+                if self._inflight.get(key) is call:
+                    del self._inflight[key]
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: str, call: _Call):
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+        if not call.task.cancelled():
+            # 기다리던 호출자가 모두 취소된 뒤 끝난 호출의 예외가 '처리되지 않음' 경고로 남지 않도록
+            call.task.exception()
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'shared': self.shared,
+            'in_flight': len(self._inflight)
+        }
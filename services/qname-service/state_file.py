@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+여러 워커/레플리카가 함께 쓰는 JSON 상태 파일 (tag_model.json, keyword_history.json)
+각 워커가 자기 메모리 사본으로 파일 전체를 덮어쓰면 마지막에 저장한 워커의 내용만 남으므로,
+워커는 마지막 저장 이후의 변경분만 들고 있다가 저장할 때 파일 잠금 안에서
+현재 파일을 다시 읽어 변경분을 합친 뒤 원자적으로 교체합니다.
+
+- 잠금: '<경로>.lock' 파일에 fcntl.flock (fcntl이 없는 환경(Windows 개발 PC)에서는 잠금 없이 병합만)
+- 교체: 같은 디렉터리의 임시 파일에 쓴 뒤 os.replace
+"""
+
+import os
+import json
+import tempfile
+import logging
+from contextlib import contextmanager
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(path: str):
+    """path 파일에 대한 프로세스 간 배타 잠금"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f"{path}.lock", 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def read_json(path: str) -> dict:
+    """JSON 상태 파일 읽기 (없거나 깨졌으면 빈 dict)"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception as e:
+        logger.error(f"상태 파일 읽기 오류: {path} - {str(e)}")
+        return {}
+
+
+def merge_json_file(path: str, merge: Callable[[dict], dict]) -> dict:
+    """잠금 안에서 현재 파일 내용에 merge()를 적용해 원자적으로 저장하고, 저장한 내용을 반환"""
+    with file_lock(path):
+        data = merge(read_json(path))
+        content = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=os.path.dirname(path) or '.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    return data
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+로컬 연관검색어(태그) 모델
+과거 가공 결과에서 카테고리 → 태그 동시출현 통계를 쌓아 두고,
+신뢰도가 충분한 카테고리는 Gemini 호출 없이 즉시 태그를 반환합니다.
+저장 시에는 마지막 저장 이후 쌓인 변경분만 파일에 합치므로 여러 워커가 같은 파일을 써도 통계가 유실되지 않습니다.
+"""
+
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from state_file import merge_json_file, read_json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TAG_MODEL_PATH = os.path.join(SCRIPT_DIR, 'data', 'tag_model.json')
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTagModel:
+    """카테고리별 태그 동시출현 통계 기반 태그 생성기"""
+
+    def __init__(self, path: str = DEFAULT_TAG_MODEL_PATH, min_samples: int = 5,
+                 min_support: float = 0.3, min_tags: int = 10, max_tags_per_category: int = 60):
+        self.path = path
+        self.min_samples = min_samples  # 카테고리별 최소 관측 행 수
+        self.min_support = min_support  # 태그가 채택되기 위한 최소 출현 비율
+        self.min_tags = min_tags  # 로컬 응답에 필요한 최소 태그 수
+        self.max_tags_per_category = max_tags_per_category  # 카테고리별 보관 태그 수 (압축)
+        self.categories: Dict[str, Dict] = {}
+        # 마지막 저장 이후 관측분 (카테고리 → {'n': 행 수, 'tags': {태그: 횟수}})
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_category(category_format: str) -> str:
+        """의심 표시(X)와 공백을 제거한 카테고리 키"""
+        category = str(category_format or '').strip()
+        if category.startswith('X'):
+            category = category[1:]
+        return category
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_TAG_MODEL_PATH, **kwargs) -> 'LocalTagModel':
+        """저장된 모델 로드 (없으면 빈 모델)"""
+        model = cls(path, **kwargs)
+        if not os.path.exists(path):
+            return model
+        model.categories = read_json(path).get('categories', {})
+        logger.info(f"로컬 태그 모델 로드: {len(model.categories)}개 카테고리")
+        return model
+
+    def save(self) -> bool:
+        """마지막 저장 이후 관측분을 파일의 최신 통계에 합쳐 저장 (다른 워커가 저장한 통계도 함께 반영)"""
+        with self._lock:
+            if not self._pending:
+                return False
+            pending, self._pending = self._pending, {}
+
+        def merge(data: dict) -> dict:
+            categories = data.get('categories', {})
+            self._apply(categories, pending)
+            return {
+                'version': 1,
+                'updated_at': datetime.now().isoformat(),
+                'categories': categories
+            }
+
+        try:
+            categories = merge_json_file(self.path, merge)['categories']
+        except Exception as e:
+            logger.error(f"로컬 태그 모델 저장 오류: {str(e)}")
+            with self._lock:
+                # 다음 저장 때 다시 시도하도록 관측분을 되돌림
+                self._apply(self._pending, pending, prune=False)
+            return False
+
+        with self._lock:
+            # 저장하는 동안 들어온 관측분은 아직 파일에 없으므로 병합 결과 위에 다시 얹음
+            self._apply(categories, self._pending)
+            self.categories = categories
+        return True
+
+    def _apply(self, categories: Dict[str, Dict], observations: Dict[str, Dict], prune: bool = True):
+        """관측분을 카테고리 통계에 더함 (prune이면 드문 태그를 잘라 모델 크기를 일정하게 유지)"""
+        for category, observed in observations.items():
+            entry = categories.setdefault(category, {'n': 0, 'tags': {}})
+            entry['n'] += observed['n']
+            counts = entry['tags']
+            for tag, count in observed['tags'].items():
+                counts[tag] = counts.get(tag, 0) + count
+            if prune and len(counts) > self.max_tags_per_category * 2:
+                top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+                entry['tags'] = dict(top[:self.max_tags_per_category])
+
+    def observe(self, category_format: str, tags: Iterable[str]):
+        """한 행의 카테고리/태그 결과를 통계에 누적"""
+        category = self.normalize_category(category_format)
+        unique_tags = []
+        for tag in tags:
+            tag = str(tag).strip()
+            if tag and tag not in unique_tags:
+                unique_tags.append(tag)
+        if not category or not unique_tags:
+            return
+
+        observation = {category: {'n': 1, 'tags': {tag: 1 for tag in unique_tags}}}
+        with self._lock:
+            self._apply(self.categories, observation)
+            self._apply(self._pending, observation, prune=False)
+
+    def suggest(self, category_format: str, product_name: str = '', count: int = 20) -> Optional[List[str]]:
+        """신뢰도가 충분하면 태그 목록을, 아니면 None을 반환"""
+        category = self.normalize_category(category_format)
+        with self._lock:
+            entry = self.categories.get(category)
+            if not entry or entry['n'] < self.min_samples:
+                return None
+            total = entry['n']
+            ranked = sorted(entry['tags'].items(), key=lambda item: (-item[1], item[0]))
+
+        # 상품명에 포함된 단어는 재사용하지 않음 (Gemini 프롬프트 규칙과 동일)
+        name_words = set(str(product_name).split())
+        tags = [
+            tag for tag, freq in ranked
+            if freq / total >= self.min_support and tag not in name_words
+        ]
+        if len(tags) < self.min_tags:
+            return None
+        return tags[:count]
+
+    def build_from_outputs(self, file_paths: Iterable[str]) -> int:
+        """과거 가공 결과 엑셀 파일들로부터 통계 구축"""
+        import pandas as pd
+
+        observed = 0
+        for file_path in file_paths:
+            try:
+                df = pd.read_excel(file_path)
+            except Exception as e:
+                logger.error(f"결과 파일 읽기 오류: {file_path} - {str(e)}")
+                continue
+            if '카테분류형식' not in df.columns or '연관검색어' not in df.columns:
+                logger.warning(f"필요한 컬럼이 없습니다: {file_path}")
+                continue
+            for category_format, related in zip(df['카테분류형식'], df['연관검색어']):
+                if pd.isnull(category_format) or pd.isnull(related):
+                    continue
+                self.observe(category_format, str(related).split(','))
+                observed += 1
+            logger.info(f"결과 파일 반영: {file_path}")
+        return observed
+
+
+if __name__ == "__main__":
+    # 사용법: python tag_model.py output_*.xlsx
+    import sys
+    import glob
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    paths = [path for pattern in sys.argv[1:] for path in glob.glob(pattern)]
+    if not paths:
+        print("사용법: python tag_model.py <결과파일 또는 glob 패턴>...")
+        sys.exit(1)
+
+    model = LocalTagModel.load()
+    rows = model.build_from_outputs(paths)
+    model.save()
+    print(f"{len(paths)}개 파일, {rows}개 행 반영 → {len(model.categories)}개 카테고리 ({model.path})")
@@ -3,6 +3,7 @@
 키워드 조합 방식 성능 테스트
 """
 
+import asyncio
 import pandas as pd
 import time
 from datetime import datetime
@@ -80,7 +81,7 @@ def test_combined_approach():
     print(f"\n처리 시작: {datetime.now().isoformat()}")
     
     try:
-        result = processor.process_excel_file(test_file)
+        result = asyncio.run(processor.process_excel_file(test_file))
         
         end_time = time.time()
         total_time = end_time - start_time
@@ -145,7 +146,7 @@ def compare_approaches():
     old_processor = OldProcessor(batch_size=10, max_concurrent=5)
     
     start_time = time.time()
-    old_result = old_processor.process_excel_file(test_file)
+    old_result = asyncio.run(old_processor.process_excel_file(test_file))
     old_time = time.time() - start_time
     
     print(f"기존 방식 처리 시간: {old_time:.2f}초")
@@ -162,7 +163,7 @@ def compare_approaches():
     )
     
     start_time = time.time()
-    combined_result = combined_processor.process_excel_file(test_file)
+    combined_result = asyncio.run(combined_processor.process_excel_file(test_file))
     combined_time = time.time() - start_time
     
     print(f"조합 방식 처리 시간: {combined_time:.2f}초")
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 서비스 모듈은 패키지가 아닌 평면 모듈이므로 서비스 디렉터리를 임포트 경로에 추가
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+# 공용 로깅 패키지(services/shared/log_core)를 pip로 설치하지 않은 개발 환경에서도 임포트되도록 경로 추가
+sys.path.append(os.path.join(SERVICE_DIR, '..', 'shared', 'log_core'))
+
+# 로그/카테고리 테이블은 임포트 시점에 경로가 정해지므로 테스트 모듈 수집 전에 임시 디렉터리로 돌림
+# (소스 트리의 logs/, data/category_table_*.bin을 건드리지 않도록)
+_RUNTIME_DIR = tempfile.mkdtemp(prefix='qname_runtime_')
+os.environ.setdefault('QNAME_LOG_DIR', os.path.join(_RUNTIME_DIR, 'logs'))
+os.environ.setdefault('QNAME_CATEGORY_TABLE_DIR', os.path.join(_RUNTIME_DIR, 'data'))
+
+
+@pytest.fixture(scope='session')
+def main_module():
+    """main.py 앱 (아티팩트/이력 파일은 임시 디렉터리, 백그라운드 작업은 끔)"""
+    state_dir = tempfile.mkdtemp(prefix='qname_test_')
+    os.environ.update({
+        'QNAME_ARTIFACT_DIR': os.path.join(state_dir, 'artifacts'),
+        'QNAME_KEYWORD_HISTORY_PATH': os.path.join(state_dir, 'keyword_history.json'),
+        'QNAME_WARM_PROCESSOR': 'false',
+        'QNAME_CATEGORY_WATCH_INTERVAL': '0',
+        'QNAME_LOOP_WATCHDOG': 'false',
+        'QNAME_PREWARM': 'false',
+        'QNAME_SECOND_PASS': 'false',
+    })
+    import main
+    return main
@@ -0,0 +1,89 @@
+import os
+import time
+
+from openpyxl import Workbook, load_workbook
+
+from artifact_store import ArtifactStore
+from row_results import ResultColumns, RowResult, read_keyword_column, write_results_workbook
+
+
+def _age(path: str, seconds: float):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_evict_keeps_temp_files_of_running_jobs(tmp_path):
+    store = ArtifactStore(str(tmp_path), temp_max_age_seconds=60)
+    upload_path = store.new_temp_path('.xlsx', 'upload_')
+    orphan_path = os.path.join(store.tmp_dir, 'upload_orphan.xlsx')
+    open(orphan_path, 'wb').close()
+    _age(upload_path, 3600)
+    _age(orphan_path, 3600)
+
+    store.evict()
+    # 진행 중인 작업의 업로드 원본은 오래돼도 남고, 주인 없는 임시 파일만 정리
+    assert os.path.exists(upload_path)
+    assert not os.path.exists(orphan_path)
+
+    assert store.discard_temp(upload_path)
+    assert not os.path.exists(upload_path)
+    assert not store.discard_temp(upload_path)
+
+
+def test_put_file_releases_temp_path(tmp_path):
+    store = ArtifactStore(str(tmp_path), temp_max_age_seconds=60)
+    output_path = store.new_temp_path('.xlsx', 'output_')
+    with open(output_path, 'wb') as f:
+        f.write(b'result')
+
+    artifact_id = store.put_file(output_path)
+    assert not os.path.exists(output_path)
+    assert open(store.path_for(artifact_id), 'rb').read() == b'result'
+    assert not store._active_temp
+
+
+def test_result_columns_round_trip():
+    results = ResultColumns([
+        RowResult('머그컵', '머그컵', '50000001', '주방>컵', '도자기 머그컵', '컵', '머그', '완료'),
+        {'keyword': '텀블러', 'status': '완료', 'degraded': True},
+        RowResult.skipped(''),
+    ])
+
+    assert len(results) == 3
+    assert results.success_count == 2
+    assert results.degraded_count == 1
+    assert results.degraded_indices() == [1]
+    assert results.column('degraded') == [False, True, False]
+    assert results[0].to_dict() == RowResult('머그컵', '머그컵', '50000001', '주방>컵', '도자기 머그컵',
+                                             '컵', '머그', '완료').to_dict()
+    assert results[1].naver_code == '' and results[1].degraded
+    assert results[2].status == '건너뜀'
+
+    # 2차 보강 결과로 행 교체
+    results[1] = RowResult('텀블러', '텀블러', '50000002', '주방>텀블러', '보온 텀블러', status='완료')
+    assert results.degraded_count == 0
+    assert [row.product_name for row in results] == ['도자기 머그컵', '보온 텀블러', '']
+
+
+def test_write_results_workbook_fills_result_columns(tmp_path):
+    input_path = str(tmp_path / 'input.xlsx')
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['메인키워드', '비고'])
+    sheet.append(['머그컵', 'a'])
+    sheet.append(['텀블러', 'b'])
+    workbook.save(input_path)
+
+    results = ResultColumns([
+        RowResult('머그컵', '머그컵', '50000001', '주방>컵', '도자기 머그컵', status='완료'),
+        RowResult('텀블러', '텀블러', status='완료', degraded=True),
+    ])
+    output_path = str(tmp_path / 'output.xlsx')
+    write_results_workbook(input_path, results, output_path, flag_degraded=True)
+
+    rows = list(load_workbook(output_path).worksheets[0].iter_rows(values_only=True))
+    assert rows[0] == ('메인키워드', '비고', 'NAVERCODE', '카테분류형식', 'SEO상품명', '연관검색어',
+                       '네이버태그', '가공결과', '간소화처리')
+    assert rows[1][:5] == ('머그컵', 'a', '50000001', '주방>컵', '도자기 머그컵')
+    assert rows[2][-1] == 'Y'
+    assert read_keyword_column(output_path) == ['머그컵', '텀블러']
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+import benchmark_golden
+from benchmark_golden import (CASSETTE_DIR, GOLDEN_DIR, REDACTED, WORKBOOKS, Cassette, benchmark_workbook,
+                              compare_with_golden)
+
+
+@pytest.mark.parametrize('workbook', WORKBOOKS)
+def test_replay_matches_golden(workbook):
+    stem = os.path.splitext(os.path.basename(workbook))[0]
+    cassette = Cassette.load(os.path.join(CASSETTE_DIR, f"{stem}.json"))
+    golden = benchmark_golden._load_json(os.path.join(GOLDEN_DIR, f"{stem}.json"))
+    assert cassette is not None and golden is not None
+
+    run = benchmark_workbook(workbook, cassette, record=False, latency_scale=0)
+    failures, _ = compare_with_golden(golden, run)
+    assert failures == []
+
+
+def test_load_keywords_keeps_blank_cells_like_production(tmp_path):
+    path = tmp_path / 'keywords.xlsx'
+    path.write_text('상품코드,메인키워드\nA1,텀블러\nA2,\n', encoding='utf-8')
+    assert benchmark_golden.load_keywords(str(path)) == ['텀블러', '']
+
+
+def test_llm_cassette_covers_gemini_path():
+    cassette = Cassette.load(os.path.join(CASSETTE_DIR, 'llm_sample.json'))
+    assert cassette.naver_enabled and cassette.gemini_enabled
+    assert any('error' in entry for entry in cassette.gemini.values())
+
+
+def test_save_scrubs_keys(tmp_path):
+    cassette = Cassette(str(tmp_path / 'cassette.json'))
+    cassette.secrets.update({'naver-secret-value', 'AIzaSyConfiguredKey'})
+    cassette.record_naver('텀블러', {'error': 'auth failed for naver-secret-value'})
+    cassette.record_gemini('prompt', {'error': 'API key not valid: AIza' + 'x' * 35})
+    cassette.record_gemini('other', {'error': 'quota exceeded key=AIzaSyConfiguredKey'})
+    cassette.save()
+
+    text = (tmp_path / 'cassette.json').read_text(encoding='utf-8')
+    assert 'naver-secret-value' not in text and 'AIza' not in text
+    assert text.count(REDACTED) == 3
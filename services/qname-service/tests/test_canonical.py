@@ -0,0 +1,35 @@
+import pytest
+
+from canonical import KeywordCanonicalizer
+
+
+@pytest.mark.parametrize('keyword, canonical', [
+    # 브랜드에 쓰이는 영어 단어는 잡음 토큰이 아님
+    ('New Balance 운동화', 'New Balance 운동화'),
+    ('Hot Wheels 자동차', 'Hot Wheels 자동차'),
+    ('BEST 셀러 텀블러', 'BEST 셀러 텀블러'),
+    # 모델/규격 괄호는 유지 (괄호 기호만 공백으로)
+    ('아이폰 케이스 (갤럭시 S23)', '아이폰 케이스 갤럭시 S23'),
+    ('노트북 거치대 (무료배송) (15인치)', '노트북 거치대 15인치'),
+    ('(S23)', 'S23'),
+    # 옵션/판촉 괄호와 문구는 제거
+    ('원피스 (블랙/M)', '원피스'),
+    ('원피스 (블랙/M) [무료배송]', '원피스'),
+    ('가방 [색상 선택]', '가방'),
+    ('텀블러 옵션: 500ml', '텀블러'),
+    ('텀블러 무료배송 특가', '텀블러'),
+    ('１+１　텀블러', '텀블러'),
+    ('무료배송', '무료배송'),
+    # 빈 값
+    ('nan', ''),
+    (None, ''),
+    ('  ', ''),
+])
+def test_canonicalize(keyword, canonical):
+    assert KeywordCanonicalizer().canonicalize(keyword) == canonical
+
+
+def test_noise_tokens_are_configurable():
+    canonicalizer = KeywordCanonicalizer(noise_tokens=['new'])
+    assert canonicalizer.canonicalize('NEW 텀블러') == '텀블러'
+    assert canonicalizer.key('NEW 텀블러') == canonicalizer.key('텀블러')
@@ -0,0 +1,138 @@
+import os
+import math
+from collections import Counter
+
+import pytest
+
+from category_table import CategoryTable, char_ngrams
+
+CATEGORY_MAP = {
+    '생활/건강>주방용품>잔/컵>텀블러': 50000803,
+    '생활/건강>주방용품>잔/컵>머그컵': 50000804,
+    '생활/건강>주방용품>보관/밀폐용기>도시락': 50000820,
+    '패션의류>여성의류>원피스': 50000807,
+    '패션잡화>양말>남성양말': 50000855,
+    '디지털/가전>휴대폰액세서리>휴대폰케이스': 50001383,
+}
+
+QUERIES = [
+    '주방용품>잔/컵>텀블러',
+    '생활/건강>주방용품>머그',
+    '여성의류>원피스',
+    '휴대폰 케이스',
+    '양말',
+    '도시락 보관용기',
+]
+
+
+def _reference_match(category_map, text):
+    """TfidfVectorizer(analyzer='char', ngram_range=(2, 3)) + cosine_similarity와 같은 계산 (밀집 벡터)"""
+    keys = list(category_map)
+    documents = [Counter(char_ngrams(key)) for key in keys]
+    document_frequency = Counter(term for counts in documents for term in counts)
+    idf = {term: math.log((1 + len(keys)) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    def vector(counts):
+        weighted = {term: count * idf[term] for term, count in counts.items() if term in idf}
+        norm = math.sqrt(sum(value * value for value in weighted.values()))
+        return {term: value / norm for term, value in weighted.items()} if norm else {}
+
+    query = vector(Counter(char_ngrams(text)))
+    if not query:
+        return None
+    scores = [sum(weight * vector(counts).get(term, 0.0) for term, weight in query.items()) for counts in documents]
+    best = max(range(len(keys)), key=lambda i: scores[i])
+    return keys[best], category_map[keys[best]], scores[best]
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = str(tmp_path / 'category_table.bin')
+    CategoryTable.build(CATEGORY_MAP, path, 'a' * 64)
+    return CategoryTable.open(path)
+
+
+def test_lookup_matches_source_map(table):
+    assert len(table) == len(CATEGORY_MAP)
+    assert dict(table.items()) == CATEGORY_MAP
+    assert table['패션의류>여성의류>원피스'] == 50000807
+    assert table.get('없는>카테고리') is None
+    assert '없는>카테고리' not in table
+    assert table.source_sha256 == 'a' * 64
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_most_similar_matches_reference_tfidf(table, query):
+    category, code, similarity = table.most_similar(query)
+    expected_category, expected_code, expected_similarity = _reference_match(CATEGORY_MAP, query)
+    assert (category, code) == (expected_category, expected_code)
+    assert similarity == pytest.approx(expected_similarity, abs=1e-5)
+
+
+def test_most_similar_matches_sklearn(table):
+    feature_extraction = pytest.importorskip('sklearn.feature_extraction.text')
+    from sklearn.metrics.pairwise import cosine_similarity
+    keys = list(CATEGORY_MAP)
+    vectorizer = feature_extraction.TfidfVectorizer(analyzer='char', ngram_range=(2, 3))
+    matrix = vectorizer.fit_transform(keys)
+    for query in QUERIES:
+        scores = cosine_similarity(vectorizer.transform([query]), matrix)[0]
+        category, _, similarity = table.most_similar(query)
+        assert category == keys[scores.argmax()]
+        assert similarity == pytest.approx(scores.max(), abs=1e-5)
+
+
+def test_most_similar_without_common_ngrams_is_none(table):
+    assert table.most_similar('xyz') is None
+    assert table.most_similar('') is None
+
+
+def test_build_skips_bad_codes_and_keeps_sheet_codes(tmp_path):
+    path = str(tmp_path / 'category_table.bin')
+    count = CategoryTable.build({
+        '텀블러': 50000803.0,  # NaN이 섞인 열에서 float로 읽힌 숫자 코드
+        '머그컵': float('nan'),
+        '도시락': None,
+        '양말': '',
+        '원피스': '0050000807',
+        '케이스': 'A-100',
+    }, path)
+    table = CategoryTable.open(path)
+
+    assert count == 3
+    assert dict(table.items()) == {'텀블러': 50000803, '원피스': '0050000807', '케이스': 'A-100'}
+    assert '머그컵' not in table
+
+
+def test_mapper_load_or_build_reuses_matching_table(tmp_path):
+    from openpyxl import Workbook
+    from processor import CategoryMapper
+
+    source = str(tmp_path / 'naver.xlsx')
+    workbook = Workbook()
+    workbook.active.append(['카테고리분류형식', 'catecode'])
+    for category, code in CATEGORY_MAP.items():
+        workbook.active.append([category, code])
+    workbook.save(source)
+
+    def mapper():
+        m = CategoryMapper()
+        m.source_file = source
+        m.table_dir = str(tmp_path / 'tables')
+        return m
+
+    first = mapper()
+    assert first.load_or_build()
+    path = first.snapshot().table.path
+    assert dict(first.category_map.items()) == CATEGORY_MAP
+
+    # 원본과 일치하는 테이블이 있으면 다시 만들지 않고 같은 파일을 엶
+    built_at = os.path.getmtime(path)
+    second = mapper()
+    assert second.load_or_build()
+    assert second.snapshot().table.path == path
+    assert os.path.getmtime(path) == built_at
+
+    os.utime(path, (built_at - 60, built_at - 60))
+    assert second.load_or_build(force=True)
+    assert os.path.getmtime(path) > built_at - 60
@@ -0,0 +1,37 @@
+import pytest
+
+from credentials import create_gemini_model
+
+glm = pytest.importorskip('google.ai.generativelanguage')
+
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    def generate_content(self, request, **kwargs):
+        self.calls.append((request, kwargs))
+        return glm.GenerateContentResponse(
+            candidates=[glm.Candidate(content=glm.Content(parts=[glm.Part(text='보온 텀블러')]))],
+            usage_metadata={'prompt_token_count': 12, 'candidates_token_count': 4}
+        )
+
+
+def test_keyed_models_do_not_share_clients():
+    first = create_gemini_model('key-1', 'gemini-1.5-flash')
+    second = create_gemini_model('key-2', 'gemini-1.5-flash')
+    assert first.client is not second.client
+
+
+def test_generate_content_matches_sdk_response():
+    model = create_gemini_model('key-1', 'gemini-1.5-flash')
+    model.client = RecordingClient()
+
+    response = model.generate_content('텀블러 상품명', request_options={'timeout': 5})
+
+    request, kwargs = model.client.calls[0]
+    assert request.model == 'models/gemini-1.5-flash'
+    assert request.contents[0].parts[0].text == '텀블러 상품명'
+    assert kwargs == {'timeout': 5}
+    assert response.text == '보온 텀블러'
+    assert response.usage_metadata.candidates_token_count == 4
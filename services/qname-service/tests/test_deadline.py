@@ -0,0 +1,40 @@
+from deadline import JobDeadline
+
+
+def test_no_observation_degrades_only_when_budget_is_spent():
+    deadline = JobDeadline(10)
+    assert not deadline.should_degrade(batches_after=100)
+
+    deadline.started -= 11
+    assert deadline.should_degrade(batches_after=0)
+    assert deadline.degraded_at >= 11
+
+
+def test_degrades_when_next_full_batch_would_not_leave_room():
+    deadline = JobDeadline(10, safety_factor=1.5, degraded_batch_seconds=0.5)
+    deadline.observe(2.0, degraded=False)
+    # 다음 정상 배치 2.0 × 1.5 + 나머지 4배치 × 0.5 = 5.0초 < 남은 10초
+    assert not deadline.should_degrade(batches_after=4)
+
+    deadline.started -= 6
+    # 남은 4초로는 5.0초가 모자람
+    assert deadline.should_degrade(batches_after=4)
+    assert deadline.degraded
+
+
+def test_degraded_mode_is_sticky():
+    deadline = JobDeadline(10)
+    deadline.started -= 11
+    assert deadline.should_degrade(batches_after=0)
+    deadline.started += 11
+    deadline.observe(0.1, degraded=True)
+    assert deadline.should_degrade(batches_after=0)
+
+
+def test_observations_are_smoothed():
+    deadline = JobDeadline(100, smoothing=0.5)
+    deadline.observe(2.0, degraded=False)
+    deadline.observe(4.0, degraded=False)
+    assert deadline._full_batch_seconds == 3.0
+    deadline.observe(1.0, degraded=True)
+    assert deadline._degraded_batch_seconds == 0.75
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from enrichment import SecondPassEnricher, STATUS_FAILED, STATUS_QUEUED
+from row_results import ResultColumns, RowResult
+
+
+class StubProcessor:
+    def __init__(self, configured: bool, available: bool):
+        self.configured = configured
+        self.available = available
+        self.calls = 0
+
+    def upstream_configured(self) -> bool:
+        return self.configured
+
+    def upstream_available(self) -> bool:
+        return self.available
+
+    async def iter_keywords_async(self, *args, **kwargs):
+        self.calls += 1
+        yield []
+
+
+def _degraded_results() -> ResultColumns:
+    return ResultColumns([RowResult('텀블러', '텀블러', status='완료', degraded=True)])
+
+
+def _attempt(enricher: SecondPassEnricher, job_id: str):
+    async def run():
+        await enricher._attempt(enricher.jobs[job_id])
+    asyncio.run(run())
+    return enricher.jobs[job_id]
+
+
+def test_job_fails_immediately_without_configured_keys():
+    processor = StubProcessor(configured=False, available=False)
+    enricher = SecondPassEnricher(lambda: processor, artifact_store=None, max_jobs=10)
+    job_id = enricher.submit('a' * 32, _degraded_results())
+
+    job = _attempt(enricher, job_id)
+    assert job.status == STATUS_FAILED
+    assert job.attempts == 0
+    assert processor.calls == 0
+    assert enricher.stats()['pending_rows'] == 0
+
+
+def test_quarantined_keys_wait_only_up_to_max_wait():
+    processor = StubProcessor(configured=True, available=False)
+    enricher = SecondPassEnricher(lambda: processor, artifact_store=None, max_jobs=10, max_wait_seconds=600)
+    job_id = enricher.submit('a' * 32, _degraded_results())
+
+    job = _attempt(enricher, job_id)
+    assert job.status == STATUS_QUEUED
+    assert job.attempts == 0
+
+    job.created_at = time.time() - 601
+    job = _attempt(enricher, job_id)
+    assert job.status == STATUS_FAILED
+    assert '600초' in job.error
+    assert processor.calls == 0
@@ -0,0 +1,35 @@
+from collections import Counter
+from datetime import date, timedelta
+
+from keyword_history import KeywordHistory
+
+
+def test_save_merges_history_from_other_workers(tmp_path):
+    path = str(tmp_path / 'keyword_history.json')
+    first = KeywordHistory.load(path)
+    second = KeywordHistory.load(path)
+
+    first.record([('텀블러', '주방>텀블러'), ('머그컵', '주방>컵')])
+    second.record([('텀블러', '주방>텀블러'), ('', '주방>컵')])
+    assert first.save()
+    assert second.save()
+
+    merged = KeywordHistory.load(path)
+    assert merged.most_common('keywords', 10) == [('텀블러', 2), ('머그컵', 1)]
+    assert dict(merged.most_common('categories', 10)) == {'주방>컵': 2, '주방>텀블러': 2}
+    # 저장한 워커도 다른 워커의 이력을 받아 옴
+    assert second.top_keywords(1) == ['텀블러']
+    assert not second.save()
+
+
+def test_save_drops_days_past_retention(tmp_path):
+    path = str(tmp_path / 'keyword_history.json')
+    history = KeywordHistory.load(path, keep_days=2)
+    old_day = (date.today() - timedelta(days=5)).isoformat()
+    history.record([('텀블러', '')])
+    # 보관 기간이 지난 일자의 누적분은 저장하면서 정리
+    history._pending[old_day] = {'keywords': Counter({'머그컵': 1}), 'categories': Counter()}
+    assert history.save()
+
+    assert list(KeywordHistory.load(path).days) == [date.today().isoformat()]
+    assert old_day not in history.days
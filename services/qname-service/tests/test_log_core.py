@@ -0,0 +1,18 @@
+from log_core import debug_requested, redact_headers
+
+
+def test_debug_header_ignored_without_token(monkeypatch):
+    monkeypatch.delenv('LOG_DEBUG_TOKEN', raising=False)
+    assert not debug_requested({'X-Debug-Log': 'true'})
+
+
+def test_debug_header_must_match_token(monkeypatch):
+    monkeypatch.setenv('LOG_DEBUG_TOKEN', 's3cret')
+    assert not debug_requested({'X-Debug-Log': 'true'})
+    assert not debug_requested({})
+    assert debug_requested({'X-Debug-Log': 's3cret'})
+
+
+def test_redact_headers_hides_credentials():
+    redacted = redact_headers({'Authorization': 'Bearer abc', 'Cookie': 'sid=1', 'X-User-ID': '7'})
+    assert redacted == {'Authorization': '***', 'Cookie': '***', 'X-User-ID': '7'}
@@ -0,0 +1,153 @@
+import pytest
+
+import model_router
+from model_router import MIN_CALLS, STAGE_NAME, STAGE_PREFIX, ModelRouter
+
+FAST = 'models/fast'
+PRIMARY = 'models/primary'
+BACKUP = 'models/backup'
+
+
+class FakeClock:
+    """model_router가 쓰는 monotonic/perf_counter를 테스트에서 직접 진행"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class FakeModel:
+    def __init__(self, name, clock):
+        self.name = name
+        self.clock = clock
+        self.calls = 0
+        self.latency = 0.1
+        self.error = None
+        self.usage = None
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        self.clock.now += self.latency
+        if self.error:
+            raise self.error
+        return FakeResponse(f"{self.name}:{prompt}", self.usage)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(model_router, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def models(clock):
+    return {name: FakeModel(name, clock) for name in (FAST, PRIMARY, BACKUP)}
+
+
+def _router(models, **kwargs):
+    kwargs.setdefault('routes', {STAGE_PREFIX: (FAST,), STAGE_NAME: (PRIMARY, BACKUP), 'tags': (BACKUP,)})
+    kwargs.setdefault('slow_seconds', {STAGE_NAME: 1.0})
+    kwargs.setdefault('cooldown_seconds', 60)
+    kwargs.setdefault('costs', {})
+    return ModelRouter(models.__getitem__, request_timeouts=False, **kwargs)
+
+
+def test_error_falls_back_to_next_model(models):
+    router = _router(models)
+    models[PRIMARY].error = RuntimeError('500 internal')
+
+    response = router.generate_content('상품명', stage=STAGE_NAME)
+
+    assert response.text == f"{BACKUP}:상품명"
+    stats = router.stats()[STAGE_NAME]['models']
+    assert stats[PRIMARY]['errors'] == 1 and stats[PRIMARY]['fallbacks'] == 1
+    assert stats[BACKUP]['calls'] == 1
+
+
+def test_last_model_error_is_raised(models):
+    router = _router(models)
+    models[PRIMARY].error = RuntimeError('500 internal')
+    models[BACKUP].error = RuntimeError('429 quota')
+
+    with pytest.raises(RuntimeError, match='429'):
+        router.generate_content('상품명', stage=STAGE_NAME)
+    stats = router.stats()[STAGE_NAME]['models']
+    assert stats[BACKUP]['errors'] == 1 and stats[BACKUP]['fallbacks'] == 0
+
+
+def test_slow_model_is_skipped_until_cooldown_ends(models, clock):
+    router = _router(models)
+    models[PRIMARY].latency = 5.0
+
+    for _ in range(MIN_CALLS):
+        router.generate_content('상품명', stage=STAGE_NAME)
+    assert models[PRIMARY].calls == MIN_CALLS
+    assert router.candidates(STAGE_NAME) == [BACKUP]
+
+    router.generate_content('상품명', stage=STAGE_NAME)
+    assert models[PRIMARY].calls == MIN_CALLS and models[BACKUP].calls == 1
+
+    # 건너뛰기 기간이 지나면 우선 모델을 다시 시도
+    clock.now += 61
+    models[PRIMARY].latency = 0.1
+    assert router.candidates(STAGE_NAME) == [PRIMARY, BACKUP]
+    router.generate_content('상품명', stage=STAGE_NAME)
+    assert models[PRIMARY].calls == MIN_CALLS + 1
+
+
+def test_slow_model_below_min_calls_is_not_skipped(models):
+    router = _router(models)
+    models[PRIMARY].latency = 5.0
+
+    for _ in range(MIN_CALLS - 1):
+        router.generate_content('상품명', stage=STAGE_NAME)
+    assert router.candidates(STAGE_NAME) == [PRIMARY, BACKUP]
+
+
+def test_last_model_in_chain_is_never_skipped(models):
+    router = _router(models)
+    models[PRIMARY].error = RuntimeError('500 internal')
+    models[BACKUP].latency = 5.0
+
+    for _ in range(MIN_CALLS + 2):
+        router.generate_content('상품명', stage=STAGE_NAME)
+    assert router.candidates(STAGE_NAME) == [BACKUP]
+    assert router.stats()[STAGE_NAME]['models'][BACKUP]['skip_count'] == 0
+
+    # 단일 모델 체인도 마찬가지
+    models[FAST].error = RuntimeError('500 internal')
+    for _ in range(MIN_CALLS):
+        with pytest.raises(RuntimeError):
+            router.generate_content('prefix', stage=STAGE_PREFIX)
+    assert router.candidates(STAGE_PREFIX) == [FAST]
+
+
+def test_cost_uses_usage_metadata(models):
+    router = _router(models, costs={PRIMARY: (1.0, 4.0)})
+    models[PRIMARY].usage = FakeUsage(prompt_token_count=1200, candidates_token_count=300)
+
+    router.generate_content('상품명', stage=STAGE_NAME)
+    router.generate_content('상품명', stage=STAGE_NAME)
+
+    stats = router.stats()[STAGE_NAME]['models'][PRIMARY]
+    assert stats['input_tokens'] == 2400
+    assert stats['output_tokens'] == 600
+    assert stats['cost_usd'] == pytest.approx((2400 * 1.0 + 600 * 4.0) / 1_000_000)
@@ -0,0 +1,50 @@
+import asyncio
+import contextvars
+
+import prewarm
+from credentials import Credential, CredentialPool
+from prewarm import CachePrewarmer
+from row_results import RowResult
+
+
+class StubCanonicalizer:
+    def canonicalize(self, keyword: str) -> str:
+        return keyword.strip()
+
+
+class StubProcessor:
+    """예열 키워드마다 키 풀 요청 1회, 그 사이 사용자 요청이 같은 풀로 3회씩 나감"""
+
+    def __init__(self):
+        self.gemini_credentials = CredentialPool('gemini', [Credential('gemini-1', 'key-1', quota=1000)])
+        self.canonicalizer = StubCanonicalizer()
+        self.user_requests = 0
+
+    def upstream_available(self) -> bool:
+        return True
+
+    async def _user_traffic(self):
+        for _ in range(3):
+            self.gemini_credentials.acquire()
+            self.user_requests += 1
+
+    async def iter_keywords_async(self, keywords, batch_size, user_id=None, lane=None):
+        for keyword in keywords:
+            await asyncio.to_thread(self.gemini_credentials.acquire)
+            # 다른 요청의 태스크 (예열 컨텍스트를 물려받지 않음)
+            await asyncio.get_running_loop().create_task(self._user_traffic(), context=contextvars.Context())
+            yield [RowResult(keyword, keyword, status='완료')]
+
+
+def test_prewarm_quota_counts_only_its_own_requests(monkeypatch):
+    monkeypatch.setattr(prewarm, 'estimate_upstream_calls', lambda processor, keyword: 1)
+    processor = StubProcessor()
+    prewarmer = CachePrewarmer(lambda: processor, quota=3, batch_size=1)
+
+    result = asyncio.run(prewarmer._warm_keywords(processor, ['a', 'b', 'c', 'd'], quota=3))
+
+    assert result['planned_calls'] == 3
+    assert result['warmed'] == 3
+    assert result['upstream_calls'] == 3
+    assert processor.user_requests == 9
+    assert processor.gemini_credentials.credentials[0].requests == 12
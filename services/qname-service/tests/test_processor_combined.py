@@ -0,0 +1,84 @@
+import asyncio
+
+import processor_combined
+from processor_combined import CombinedQNameProcessor
+
+
+class StubCategoryMapper:
+    category_map = {'주방용품>커피용품>텀블러': '50000001'}
+
+    def find_category_code(self, category_format):
+        if category_format in self.category_map:
+            return self.category_map[category_format], False
+        return '00000000', True
+
+
+def make_processor(max_candidates_per_row=2):
+    # 카테고리 파일/Gemini 설정 없이 조합 로직만 사용
+    processor = CombinedQNameProcessor.__new__(CombinedQNameProcessor)
+    processor.category_mapper = StubCategoryMapper()
+    processor.batch_size = 10
+    processor.max_concurrent = 5
+    processor.min_keywords = 3
+    processor.max_keywords = 5
+    processor.max_candidates_per_row = max_candidates_per_row
+    processor._category_vocab = None
+    return processor
+
+
+def test_score_prefers_category_words_then_earlier_windows():
+    processor = make_processor()
+    assert processor.score_combination(['텀블러', '보온', '휴대용']) > processor.score_combination(['보온', '휴대용', '대용량'])
+    assert processor.score_combination(['보온', '휴대용', '대용량'], 0) > processor.score_combination(['보온', '휴대용', '대용량'], 1)
+
+
+def test_row_combinations_are_bounded_and_deduplicated():
+    processor = make_processor()
+    combinations, row_candidates = processor.create_row_combinations([
+        '텀블러 보온 휴대용 스테인리스', '텀블러 보온 휴대용 스테인리스', '', '양말'
+    ])
+    assert all(len(candidates) <= 2 for candidates in row_candidates)
+    assert row_candidates[0] == row_candidates[1]
+    assert row_candidates[2] == []
+    assert sum(len(combination['rows']) for combination in combinations) == 5
+
+
+def test_gemini_runs_only_for_the_selected_candidate(monkeypatch):
+    processor = make_processor()
+    gemini_keywords = []
+
+    async def naver(session, keywords):
+        # 세 단어짜리 텀블러 조합만 네이버 상품이 있음
+        return [
+            {'items': [{'category1': '주방용품', 'category2': '커피용품', 'category3': '텀블러'}]}
+            if '텀블러' in keyword and len(keyword.split()) == 3 else processor._create_default_category(keyword)
+            for keyword in keywords
+        ]
+
+    async def product(session, keywords, category_infos):
+        gemini_keywords.extend(keywords)
+        return [f"{keyword} 상품명" for keyword in keywords]
+
+    async def related(session, keywords, product_names):
+        return ['태그' for _ in keywords]
+
+    async def no_sleep(seconds):
+        return None
+
+    monkeypatch.setattr(processor, 'batch_naver_api', naver)
+    monkeypatch.setattr(processor, 'batch_gemini_product', product)
+    monkeypatch.setattr(processor, 'batch_gemini_related', related)
+    monkeypatch.setattr(processor_combined.asyncio, 'sleep', no_sleep)
+
+    combinations, row_candidates = processor.create_row_combinations([
+        '보온 텀블러 휴대용 스테인리스', '보온 텀블러 휴대용 스테인리스', '양말'
+    ])
+    results = asyncio.run(processor.process_row_candidates_async(combinations, row_candidates))
+
+    # 후보 3개(행 간 중복 제거) 중 행마다 1개만 Gemini로 생성
+    assert len(combinations) == 3
+    assert gemini_keywords == ['보온 텀블러 휴대용', '양말']
+    assert results[0]['used_combination'] == '보온 텀블러 휴대용'
+    assert results[0]['category_format'] == '주방용품>커피용품>텀블러'
+    assert results[1] is results[0]
+    assert results[2]['status'] == '완료'
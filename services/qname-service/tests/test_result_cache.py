@@ -0,0 +1,72 @@
+import os
+
+from artifact_store import ArtifactStore, file_sha256
+from result_cache import FileResultCache
+
+SUMMARY = {'total_processed': 2, 'success_count': 2, 'error_count': 0, 'degraded_count': 0}
+
+
+def _upload(tmp_path, name: str, content: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(content)
+    return file_sha256(str(path))
+
+
+def _stored_artifact(store: ArtifactStore, content: bytes = b'result workbook') -> str:
+    path = store.new_temp_path('.xlsx', 'output_')
+    with open(path, 'wb') as f:
+        f.write(content)
+    return store.put_file(path)
+
+
+def test_identical_upload_bytes_hit(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'artifacts'))
+    cache = FileResultCache(store)
+    artifact_id = _stored_artifact(store)
+    cache.store(FileResultCache.make_key(_upload(tmp_path, 'a.xlsx', b'keywords'), 'v1'), artifact_id, SUMMARY)
+
+    # 파일 이름이 달라도 내용이 같으면 같은 결과
+    cached = cache.lookup(FileResultCache.make_key(_upload(tmp_path, 'b.xlsx', b'keywords'), 'v1'))
+    assert cached['artifact_id'] == artifact_id
+    assert cached['path'] == store.path_for(artifact_id)
+    assert cached['success_count'] == 2
+
+    assert cache.lookup(FileResultCache.make_key(_upload(tmp_path, 'c.xlsx', b'keywords!'), 'v1')) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_result_version_change_misses(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'artifacts'))
+    cache = FileResultCache(store)
+    upload_sha256 = _upload(tmp_path, 'a.xlsx', b'keywords')
+    cache.store(FileResultCache.make_key(upload_sha256, '2:prefix=a:idx1:g1n1'), _stored_artifact(store), SUMMARY)
+
+    assert cache.lookup(FileResultCache.make_key(upload_sha256, '2:prefix=a:idx2:g1n1')) is None
+    assert cache.lookup(FileResultCache.make_key(upload_sha256, '2:prefix=a:idx1:g1n1',
+                                                 degraded_column=True)) is None
+    assert cache.lookup(FileResultCache.make_key(upload_sha256, '2:prefix=a:idx1:g1n1')) is not None
+
+
+def test_restart_reloads_persisted_entries(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'artifacts'))
+    key = FileResultCache.make_key(_upload(tmp_path, 'a.xlsx', b'keywords'), 'v1')
+    artifact_id = _stored_artifact(store)
+    FileResultCache(store).store(key, artifact_id, SUMMARY)
+    assert os.path.exists(os.path.join(store.root, 'result_cache.json'))
+
+    restarted = FileResultCache(ArtifactStore(store.root))
+    assert restarted.lookup(key)['artifact_id'] == artifact_id
+    assert restarted.stats()['size'] == 1
+
+
+def test_degraded_results_and_evicted_artifacts_are_not_served(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'artifacts'))
+    cache = FileResultCache(store)
+    cache.store('degraded', _stored_artifact(store, b'a'), dict(SUMMARY, degraded_count=1))
+    assert cache.lookup('degraded') is None
+
+    artifact_id = _stored_artifact(store, b'b')
+    cache.store('evicted', artifact_id, SUMMARY)
+    os.remove(store.path_for(artifact_id))
+    assert cache.lookup('evicted') is None
+    assert cache.stats()['size'] == 0
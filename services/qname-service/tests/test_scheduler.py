@@ -0,0 +1,79 @@
+import asyncio
+
+from scheduler import FairScheduler, LANE_BACKGROUND, LANE_BULK, LANE_INTERACTIVE
+
+
+async def _order_of_grants(scheduler: FairScheduler, requests, hold_lane: str = LANE_BULK):
+    """슬롯을 하나 붙잡은 채 (user_id, lane) 요청을 모두 대기시킨 뒤 풀었을 때 행이 실행되는 순서"""
+    order = []
+
+    async def row(user_id: str, lane: str):
+        async with scheduler.slot(user_id, lane):
+            order.append(user_id)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire('holder', hold_lane)
+    tasks = [asyncio.ensure_future(row(user_id, lane)) for user_id, lane in requests]
+    await asyncio.sleep(0)
+    scheduler.release('holder', hold_lane)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def _scheduler(**kwargs) -> FairScheduler:
+    # 동시 실행 2행 중 1행은 interactive 예약 → bulk는 한 번에 1행씩
+    options = dict(max_in_flight=2, max_in_flight_per_user=2, weights={}, interactive_reserved=1, background_max=1)
+    options.update(kwargs)
+    return FairScheduler(**options)
+
+
+def test_rows_alternate_between_users():
+    scheduler = _scheduler()
+    requests = [('big', LANE_BULK)] * 4 + [('small', LANE_BULK)] * 2
+    order = asyncio.run(_order_of_grants(scheduler, requests))
+    # 먼저 몰린 대용량 작업이 있어도 두 번째 사용자의 행이 번갈아 끼어듦
+    assert order == ['big', 'small', 'big', 'small', 'big', 'big']
+
+
+def test_weights_scale_share_of_slots():
+    scheduler = _scheduler(weights={'heavy': 2.0})
+    requests = [('heavy', LANE_BULK)] * 6 + [('light', LANE_BULK)] * 6
+    order = asyncio.run(_order_of_grants(scheduler, requests))
+    assert order[:6].count('heavy') == 4
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()['waiting'] == 0
+
+
+def test_bulk_leaves_reserved_slot_for_interactive():
+    async def run():
+        scheduler = _scheduler()
+        await scheduler.acquire('big', LANE_BULK)
+        waiting_bulk = asyncio.ensure_future(scheduler.acquire('big', LANE_BULK))
+        await asyncio.sleep(0)
+        assert not waiting_bulk.done()
+
+        # bulk 행이 대기 중이어도 예약 슬롯으로 바로 실행
+        await asyncio.wait_for(scheduler.acquire('viewer', LANE_INTERACTIVE), timeout=1)
+        assert scheduler.stats()['lanes'][LANE_BULK]['in_flight'] == 1
+
+        scheduler.release('viewer', LANE_INTERACTIVE)
+        scheduler.release('big', LANE_BULK)
+        await waiting_bulk
+        scheduler.release('big', LANE_BULK)
+        assert scheduler.in_flight == 0
+    asyncio.run(run())
+
+
+def test_interactive_goes_first_at_row_boundary():
+    scheduler = _scheduler(interactive_reserved=0, max_in_flight=1)
+    requests = [('big', LANE_BULK)] * 2 + [('viewer', LANE_INTERACTIVE)]
+    order = asyncio.run(_order_of_grants(scheduler, requests))
+    assert order == ['viewer', 'big', 'big']
+
+
+def test_background_waits_for_bulk_queue_to_drain():
+    # 사용자당 한도 때문에 bulk 대기 행이 있어도 빈 슬롯이 남는 상황
+    scheduler = _scheduler(max_in_flight=3, interactive_reserved=0, max_in_flight_per_user=1)
+    requests = [('big', LANE_BULK)] * 2 + [('prewarm', LANE_BACKGROUND)]
+    order = asyncio.run(_order_of_grants(scheduler, requests))
+    assert order == ['big', 'big', 'prewarm']
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from row_results import RowResult, count_data_rows
+from shard_coordinator import HttpShardWorker, ShardCoordinator, ShardFailed
+
+
+def completed_row(keyword):
+    return RowResult(keyword, keyword, product_name=f"{keyword} 상품", status='완료')
+
+
+class FakeProcessor:
+    """빈 키워드는 실제 프로세서처럼 '건너뜀' 행으로 돌려주는 프로세서"""
+
+    def calculate_optimal_batch_size(self, total):
+        return 10
+
+    async def iter_keywords_async(self, keywords, batch_size, user_id=None, time_budget=None):
+        yield [completed_row(k) if k.strip() else RowResult.skipped(k) for k in keywords]
+
+
+class FakeWorker:
+    def __init__(self, name, failures=0):
+        self.name = name
+        self.failures = failures
+        self.calls = []
+
+    async def process(self, keywords, user_id=None, time_budget=None):
+        self.calls.append(list(keywords))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("연결 끊김")
+        return [completed_row(keyword) for keyword in keywords]
+
+
+def test_process_batch_returns_skipped_rows_for_blank_keywords(main_module, monkeypatch):
+    monkeypatch.setattr(main_module, 'get_processor', FakeProcessor)
+    client = TestClient(main_module.app)
+    response = client.post('/api/qname/process-batch', json=['텀블러', '', {'keyword': ''}, {'keyword': None}])
+    assert response.status_code == 200
+    lines = [line for line in response.text.splitlines() if '"index"' in line]
+    assert [('"완료"' in line, '"건너뜀"' in line) for line in lines] == [
+        (True, False), (False, True), (False, True), (False, True)
+    ]
+
+
+def test_process_batch_still_rejects_non_string_keywords(main_module, monkeypatch):
+    monkeypatch.setattr(main_module, 'get_processor', FakeProcessor)
+    client = TestClient(main_module.app)
+    assert client.post('/api/qname/process-batch', json=[123]).status_code == 400
+
+
+def test_http_worker_keeps_blank_rows_out_of_the_payload(monkeypatch):
+    worker = HttpShardWorker('http://worker:8000')
+    sent = []
+
+    async def post_batch(keywords, user_id=None, time_budget=None):
+        sent.append(keywords)
+        return [completed_row(keyword) for keyword in keywords]
+
+    monkeypatch.setattr(worker, '_post_batch', post_batch)
+    rows = asyncio.run(worker.process(['텀블러', '', '  ', '양말']))
+    assert sent == [['텀블러', '양말']]
+    assert [row.status for row in rows] == ['완료', '건너뜀', '건너뜀', '완료']
+    assert rows[3].keyword == '양말'
+
+    sent.clear()
+    rows = asyncio.run(worker.process(['', '']))
+    assert sent == []
+    assert [row.status for row in rows] == ['건너뜀', '건너뜀']
+
+
+def test_coordinator_partitions_and_merges_in_row_order():
+    workers = [FakeWorker('a'), FakeWorker('b')]
+    coordinator = ShardCoordinator(workers, shard_size=3)
+    keywords = [f"키워드{i}" for i in range(10)]
+    results = asyncio.run(coordinator.process_keywords(keywords))
+    assert results.column('keyword') == keywords
+    assert sorted(len(call) for worker in workers for call in worker.calls) == [1, 3, 3, 3]
+
+
+def test_coordinator_retries_failed_shard_on_another_worker():
+    flaky, healthy = FakeWorker('flaky', failures=1), FakeWorker('healthy')
+    coordinator = ShardCoordinator([flaky, healthy], shard_size=5, max_attempts=3)
+    results = asyncio.run(coordinator.process_keywords([f"키워드{i}" for i in range(5)]))
+    assert results.success_count == 5
+    assert len(flaky.calls) + len(healthy.calls) == 2
+
+
+def test_coordinator_gives_up_after_max_attempts():
+    coordinator = ShardCoordinator([FakeWorker('down', failures=99)], shard_size=5, max_attempts=2)
+    with pytest.raises(ShardFailed):
+        asyncio.run(coordinator.process_keywords(['텀블러']))
+
+
+def _workbook(path, keywords):
+    from openpyxl import Workbook
+    workbook = Workbook()
+    workbook.active.append(['메인키워드'])
+    for keyword in keywords:
+        workbook.active.append([keyword])
+    workbook.save(path)
+    return str(path)
+
+
+def test_count_data_rows_stops_at_threshold(tmp_path):
+    path = _workbook(tmp_path / 'rows.xlsx', ['텀블러', None, '양말', '머그컵'])
+    assert count_data_rows(path) == 4
+    assert count_data_rows(path, stop_at=2) == 2
+
+
+def test_small_uploads_skip_sharding(main_module, monkeypatch, tmp_path):
+    coordinator = ShardCoordinator([FakeWorker('a')], shard_size=100, min_rows=10)
+    local = FakeProcessor()
+    monkeypatch.setattr(main_module, 'shard_coordinator', coordinator)
+    monkeypatch.setattr(main_module, 'get_processor', lambda: local)
+
+    small = _workbook(tmp_path / 'small.xlsx', [f"키워드{i}" for i in range(5)])
+    large = _workbook(tmp_path / 'large.xlsx', [f"키워드{i}" for i in range(10)])
+    assert asyncio.run(main_module.file_processor_for(small)) is local
+    assert asyncio.run(main_module.file_processor_for(large)) is coordinator
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    async def run():
+        flight = SingleFlight('naver')
+        calls = []
+        release = asyncio.Event()
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return {'code': '50000001'}
+
+        waiters = [asyncio.ensure_future(flight.do('텀블러', fetch)) for _ in range(3)]
+        other = asyncio.ensure_future(flight.do('머그컵', fetch))
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, other)
+
+        assert len(calls) == 2
+        assert all(result == {'code': '50000001'} for result in results)
+        assert flight.stats() == {'calls': 2, 'shared': 2, 'in_flight': 0}
+    asyncio.run(run())
+
+
+def test_error_reaches_every_waiter_and_key_is_cleared():
+    async def run():
+        flight = SingleFlight('gemini')
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise RuntimeError('429')
+
+        waiters = [asyncio.ensure_future(flight.do('prompt', failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        async def succeeding():
+            return 'ok'
+        # 실패한 호출은 남지 않으므로 다음 호출은 새로 실행
+        assert await flight.do('prompt', succeeding) == 'ok'
+        assert flight.calls == 2
+    asyncio.run(run())
+
+
+def test_cancelling_one_waiter_keeps_call_for_others():
+    async def run():
+        flight = SingleFlight('naver')
+        release = asyncio.Event()
+        started = []
+
+        async def fetch():
+            started.append(1)
+            await release.wait()
+            return 'result'
+
+        first = asyncio.ensure_future(flight.do('텀블러', fetch))
+        second = asyncio.ensure_future(flight.do('텀블러', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == 'result'
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert len(started) == 1
+    asyncio.run(run())
+
+
+def test_cancelling_all_waiters_cancels_call():
+    async def run():
+        flight = SingleFlight('naver')
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flight.do('텀블러', fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert flight.stats()['in_flight'] == 0
+    asyncio.run(run())
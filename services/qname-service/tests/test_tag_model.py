@@ -0,0 +1,29 @@
+from tag_model import LocalTagModel
+
+
+def test_save_merges_updates_from_other_workers(tmp_path):
+    path = str(tmp_path / 'tag_model.json')
+    first = LocalTagModel.load(path)
+    second = LocalTagModel.load(path)
+
+    first.observe('주방>컵', ['머그컵', '커피잔'])
+    second.observe('주방>컵', ['머그컵'])
+    second.observe('캠핑>랜턴', ['랜턴'])
+    assert first.save()
+    assert second.save()
+
+    merged = LocalTagModel.load(path).categories
+    assert merged['주방>컵'] == {'n': 2, 'tags': {'머그컵': 2, '커피잔': 1}}
+    assert merged['캠핑>랜턴']['n'] == 1
+    # 저장한 워커도 다른 워커의 통계를 받아 옴
+    assert second.categories['주방>컵']['n'] == 2
+
+
+def test_save_without_new_observations_is_noop(tmp_path):
+    path = str(tmp_path / 'tag_model.json')
+    model = LocalTagModel.load(path)
+    assert not model.save()
+    model.observe('X주방>컵', ['머그컵'])
+    assert model.save()
+    assert not model.save()
+    assert LocalTagModel.load(path).categories['주방>컵']['n'] == 1
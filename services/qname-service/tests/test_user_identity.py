@@ -0,0 +1,75 @@
+import hmac
+import json
+import time
+import base64
+import hashlib
+
+from fastapi.testclient import TestClient
+
+from user_identity import UserIdentityResolver, decode_hs256_jwt
+
+SECRET = 'main-api-jwt-secret'
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def make_token(payload: dict, secret: str = SECRET, alg: str = 'HS256') -> str:
+    """main-api(python-jose)가 발급하는 것과 같은 형식의 HS256 JWT"""
+    signing_input = f"{_b64url(json.dumps({'alg': alg, 'typ': 'JWT'}).encode())}." \
+                    f"{_b64url(json.dumps(payload).encode())}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{_b64url(signature)}"
+
+
+def test_decode_rejects_forged_expired_and_other_algorithms():
+    payload = {'sub': 'a@example.com', 'exp': time.time() + 600}
+    assert decode_hs256_jwt(make_token(payload), SECRET)['sub'] == 'a@example.com'
+    assert decode_hs256_jwt(make_token(payload, secret='other'), SECRET) is None
+    assert decode_hs256_jwt(make_token(payload, alg='none'), SECRET) is None
+    assert decode_hs256_jwt(make_token({'sub': 'a@example.com', 'exp': time.time() - 600}), SECRET) is None
+    assert decode_hs256_jwt('not-a-token', SECRET) is None
+
+
+def test_scheduler_user_comes_from_login_token_not_header():
+    resolver = UserIdentityResolver(jwt_secret=SECRET, internal_token='')
+    token = make_token({'sub': 'a@example.com', 'exp': time.time() + 600})
+
+    assert resolver.resolve({'Authorization': f'Bearer {token}', 'X-User-ID': 'b@example.com'},
+                            '10.0.0.1') == 'a@example.com'
+    # 토큰이 없거나 위조되면 X-User-ID를 무시하고 IP 기준
+    assert resolver.resolve({'X-User-ID': 'b@example.com'}, '10.0.0.1') == 'ip:10.0.0.1'
+    forged = make_token({'sub': 'b@example.com'}, secret='guess')
+    assert resolver.resolve({'Authorization': f'Bearer {forged}'}, '10.0.0.1') == 'ip:10.0.0.1'
+
+
+def test_user_header_trusted_only_with_internal_token():
+    resolver = UserIdentityResolver(jwt_secret='', internal_token='shard-secret')
+    assert resolver.resolve({'X-User-ID': 'a@example.com', 'X-Internal-Token': 'shard-secret'}) == 'a@example.com'
+    assert resolver.resolve({'X-User-ID': 'a@example.com', 'X-Internal-Token': 'wrong'}, '10.0.0.2') == 'ip:10.0.0.2'
+    # 토큰을 설정하지 않았으면 내부 호출도 없음
+    unset = UserIdentityResolver(jwt_secret='', internal_token='')
+    assert unset.resolve({'X-User-ID': 'a@example.com', 'X-Internal-Token': ''}, '10.0.0.2') == 'ip:10.0.0.2'
+
+
+def test_process_batch_schedules_under_resolved_user(main_module, monkeypatch):
+    seen = []
+
+    class RecordingProcessor:
+        def calculate_optimal_batch_size(self, total):
+            return total
+
+        async def iter_keywords_async(self, keywords, batch_size, user_id=None, time_budget=None):
+            seen.append(user_id)
+            yield [{'keyword': keyword, 'status': '완료'} for keyword in keywords]
+
+    monkeypatch.setattr(main_module, 'get_processor', RecordingProcessor)
+    monkeypatch.setattr(main_module, 'user_identity', UserIdentityResolver(jwt_secret=SECRET, internal_token=''))
+    client = TestClient(main_module.app)
+    token = make_token({'sub': 'a@example.com', 'exp': time.time() + 600})
+
+    client.post('/api/qname/process-batch', json=['텀블러'], headers={'X-User-ID': 'someone-else'})
+    client.post('/api/qname/process-batch', json=['텀블러'],
+                headers={'X-User-ID': 'someone-else', 'Authorization': f'Bearer {token}'})
+    assert seen == ['ip:testclient', 'a@example.com']
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+업로드 파일 스풀링
+업로드 본문을 고정 크기 청크로 디스크에 기록하면서 크기 제한을 즉시 검사하고
+SHA-256 해시를 함께 계산합니다. 요청당 메모리 사용량이 파일 크기와 무관하게 일정합니다.
+디스크 쓰기/해시 계산은 I/O 스레드에서 실행해 이벤트 루프를 막지 않습니다.
+"""
+
+import os
+import hashlib
+from typing import NamedTuple
+
+from io_executor import run_io
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class UploadTooLarge(Exception):
+    """업로드 크기 제한 초과"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"업로드 파일이 최대 크기({max_bytes // (1024 * 1024)}MB)를 초과했습니다.")
+
+
+class SpooledUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+async def spool_upload(upload, dest_path: str, max_bytes: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SpooledUpload:
+    """UploadFile을 청크 단위로 dest_path에 저장 (제한 초과 시 파일 삭제 후 UploadTooLarge)"""
+    digest = hashlib.sha256()
+    size = 0
+
+    def write_chunk(f, chunk: bytes):
+        digest.update(chunk)
+        f.write(chunk)
+
+    try:
+        f = await run_io(open, dest_path, 'wb')
+        try:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                await run_io(write_chunk, f, chunk)
+        finally:
+            await run_io(f.close)
+    except BaseException:
+        await run_io(_remove_if_exists, dest_path)
+        raise
+    return SpooledUpload(dest_path, size, digest.hexdigest())
+
+
+def _remove_if_exists(path: str):
+    if os.path.exists(path):
+        os.remove(path)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+스케줄러 공정 분배용 사용자 식별
+X-User-ID 헤더는 클라이언트가 마음대로 정할 수 있으므로 그대로 믿으면 다른 사용자의 몫을 가져가거나
+요청마다 다른 값을 보내 공정 분배를 우회할 수 있습니다. 아래 순서로 사용자를 정합니다.
+
+1. main-api가 발급한 로그인 토큰 (Authorization: Bearer, HS256 JWT)
+   - QNAME_JWT_SECRET (없으면 main-api와 같은 이름의 JWT_SECRET)로 서명/만료를 확인하고 sub(이메일)를 사용
+2. 내부 호출 (샤드 코디네이터 → 워커 등)
+   - X-Internal-Token이 QNAME_INTERNAL_TOKEN과 일치할 때만 X-User-ID를 그대로 사용
+3. 그 외: 접속 IP 기준 익명 사용자 (ip:<주소>) - X-User-ID는 무시
+
+비밀값을 설정하지 않으면 해당 단계는 건너뜁니다 (둘 다 없으면 모든 요청이 IP 기준).
+"""
+
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import logging
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+INTERNAL_TOKEN_HEADER = "X-Internal-Token"
+USER_ID_HEADER = "X-User-ID"
+
+# 만료 시각 비교 시 서버 간 시계 차이 허용 (초)
+CLOCK_SKEW_SECONDS = 30
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def decode_hs256_jwt(token: str, secret: str, now: float = None) -> Optional[dict]:
+    """HS256 JWT 서명/만료 확인 후 페이로드 반환 (형식 오류, 다른 알고리즘, 서명 불일치, 만료면 None)"""
+    try:
+        header_segment, payload_segment, signature_segment = token.split('.')
+        header = json.loads(_b64url_decode(header_segment))
+        if header.get('alg') != 'HS256':
+            return None
+        expected = hmac.new(secret.encode('utf-8'), f"{header_segment}.{payload_segment}".encode('ascii'),
+                            hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_segment)):
+            return None
+        payload = json.loads(_b64url_decode(payload_segment))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    expires_at = payload.get('exp')
+    if expires_at is not None and (now or time.time()) > float(expires_at) + CLOCK_SKEW_SECONDS:
+        return None
+    return payload
+
+
+class UserIdentityResolver:
+    """요청 헤더/접속 주소 → 스케줄러 사용자 ID"""
+
+    def __init__(self, jwt_secret: str = None, internal_token: str = None):
+        self.jwt_secret = jwt_secret if jwt_secret is not None else (
+            os.getenv("QNAME_JWT_SECRET") or os.getenv("JWT_SECRET") or "")
+        self.internal_token = internal_token if internal_token is not None else os.getenv("QNAME_INTERNAL_TOKEN", "")
+
+    def resolve(self, headers: Mapping[str, str], client_host: str = None) -> str:
+        principal = self._token_subject(headers.get('Authorization'))
+        if principal:
+            return principal
+        if self.is_internal(headers):
+            user_id = (headers.get(USER_ID_HEADER) or '').strip()
+            if user_id:
+                return user_id
+        return f"ip:{client_host or 'unknown'}"
+
+    def is_internal(self, headers: Mapping[str, str]) -> bool:
+        """내부 호출 토큰 일치 여부 (미설정 시 항상 False)"""
+        presented = headers.get(INTERNAL_TOKEN_HEADER)
+        return bool(self.internal_token and presented) and hmac.compare_digest(
+            presented.encode('utf-8'), self.internal_token.encode('utf-8'))
+
+    def _token_subject(self, authorization: Optional[str]) -> Optional[str]:
+        if not self.jwt_secret or not authorization:
+            return None
+        scheme, _, token = authorization.partition(' ')
+        if scheme.lower() != 'bearer' or not token.strip():
+            return None
+        payload = decode_hs256_jwt(token.strip(), self.jwt_secret)
+        if payload is None:
+            logger.debug("로그인 토큰 확인 실패 - IP 기준 사용자로 처리", extra={'category': 'auth'})
+            return None
+        subject = payload.get('sub')
+        return str(subject) if subject else None
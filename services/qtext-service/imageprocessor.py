@@ -5,7 +5,7 @@ from dotenv import load_dotenv
 import os
 import io
 import zipfile
-from typing import List, Tuple
+from typing import Iterable, List, Tuple
 from google.api_core.exceptions import GoogleAPIError
 import re
 import tempfile
@@ -134,49 +134,54 @@ def process_single_image(image_bytes: bytes, filename: str) -> Tuple[bytes, bool
         logger.error(f"이미지 처리 중 오류 발생 {filename}: {e}")
         return image_bytes, False
 
-async def process_images_batch(image_files: List[Tuple[bytes, str]], user_info: dict = None) -> bytes:
-    """여러 이미지를 처리하고 ZIP 파일로 반환"""
-    try:
-        # 임시 ZIP 파일 생성
-        zip_buffer = io.BytesIO()
+def _write_processed_zip(zip_target, image_items: Iterable[Tuple[bytes, str]], total_count: int, user_info: dict = None) -> int:
+    """이미지를 하나씩 처리하여 ZIP에 기록 (한 번에 한 이미지만 메모리에 유지)"""
+    with zipfile.ZipFile(zip_target, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        processed_count = 0
+        error_count = 0
         
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            processed_count = 0
-            error_count = 0
-            
-            for image_bytes, filename in image_files:
-                try:
-                    processed_bytes, success = process_single_image(image_bytes, filename)
-                    
-                    if success:
-                        # 원본 파일명을 안전하게 변환하여 ZIP에 추가 (접두사 없이)
-                        safe_name = safe_filename(filename)
-                        zip_file.writestr(safe_name, processed_bytes)
-                        processed_count += 1
-                        logger.info(f"ZIP에 추가됨: {safe_name}")
-                    else:
-                        error_count += 1
-                        logger.error(f"처리 실패: {filename}")
-                        
-                except Exception as e:
+        for image_bytes, filename in image_items:
+            try:
+                processed_bytes, success = process_single_image(image_bytes, filename)
+                
+                if success:
+                    # 원본 파일명을 안전하게 변환하여 ZIP에 추가 (접두사 없이)
+                    safe_name = safe_filename(filename)
+                    zip_file.writestr(safe_name, processed_bytes)
+                    processed_count += 1
+                    logger.info(f"ZIP에 추가됨: {safe_name}")
+                else:
                     error_count += 1
-                    logger.error(f"파일 처리 중 오류 {filename}: {e}")
-                    continue
-            
-            # 처리 결과 요약을 텍스트 파일로 추가
-            user_name = user_info.get('name', '사용자') if user_info else '사용자'
-            user_id = user_info.get('id', 'unknown') if user_info else 'unknown'
-            
-            summary = f"""Image Text Removal Processing Result
+                    logger.error(f"처리 실패: {filename}")
+                    
+            except Exception as e:
+                error_count += 1
+                logger.error(f"파일 처리 중 오류 {filename}: {e}")
+                continue
+        
+        # 처리 결과 요약을 텍스트 파일로 추가
+        user_name = user_info.get('name', '사용자') if user_info else '사용자'
+        user_id = user_info.get('id', 'unknown') if user_info else 'unknown'
+        
+        summary = f"""Image Text Removal Processing Result
 ========================
-Total Files: {len(image_files)}
+Total Files: {total_count}
 Success: {processed_count}
 Failed: {error_count}
 Completed: {np.datetime64('now')}
 
 서비스이용자=이름/{user_name}/id={user_id}
 """
-            zip_file.writestr("processing_result.txt", summary.encode('utf-8'))
+        zip_file.writestr("processing_result.txt", summary.encode('utf-8'))
+    
+    return processed_count
+
+async def process_images_batch(image_files: List[Tuple[bytes, str]], user_info: dict = None) -> bytes:
+    """여러 이미지를 처리하고 ZIP 파일로 반환"""
+    try:
+        # 임시 ZIP 파일 생성
+        zip_buffer = io.BytesIO()
+        processed_count = _write_processed_zip(zip_buffer, image_files, len(image_files), user_info)
         
         zip_buffer.seek(0)
         logger.info(f"ZIP 파일 생성 완료: {processed_count}개 파일 처리됨")
@@ -0,0 +1,149 @@
+"""
+구조화 로깅 공용 구성요소 (JSON 포맷터, 샘플링 필터, 드롭 큐 핸들러, 요청 컨텍스트)
+
+main-api와 qname-service가 함께 쓰는 공용 패키지 (services/shared/log_core)입니다.
+각 서비스의 requirements.txt/빌드 명령이 경로 의존성으로 설치하므로 Railway는 저장소 루트에서 빌드하고
+서비스 디렉터리로 cd 해서 실행합니다 (각 서비스의 railway.json).
+
+- 요청 단위 DEBUG: LOG_DEBUG_TOKEN이 설정돼 있고 X-Debug-Log 헤더 값이 그 토큰과 같을 때만 활성화
+  (설정하지 않으면 헤더를 무시 - 아무 클라이언트나 샘플링을 우회하지 못하도록)
+- 로그에 남기는 요청 헤더는 인증/쿠키/토큰 값을 가림
+"""
+
+import os
+import hmac
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import contextvars
+import logging.handlers
+from datetime import datetime
+from typing import Dict, Mapping
+
+DEBUG_HEADER = "X-Debug-Log"
+
+# 로그에 값을 남기지 않는 요청 헤더 (소문자)
+REDACTED_HEADERS = {
+    "authorization", "proxy-authorization", "cookie", "set-cookie",
+    "x-admin-token", "x-api-key", "x-debug-log"
+}
+
+# 요청 컨텍스트 (미들웨어에서 설정)
+REQUEST_DEBUG = contextvars.ContextVar("request_debug", default=False)
+REQUEST_ID = contextvars.ContextVar("request_id", default=None)
+
+
+def parse_category_config(value: str) -> Dict[str, float]:
+    """'naver=0.1,category=0.05' 형식의 카테고리별 설정 파싱"""
+    config = {}
+    for item in (value or "").split(","):
+        if "=" not in item:
+            continue
+        name, number = item.split("=", 1)
+        try:
+            config[name.strip()] = float(number)
+        except ValueError:
+            continue
+    return config
+
+
+def debug_requested(headers: Mapping[str, str]) -> bool:
+    """X-Debug-Log 헤더가 LOG_DEBUG_TOKEN과 일치하는지 (토큰 미설정 시 항상 False)"""
+    token = os.getenv("LOG_DEBUG_TOKEN")
+    value = headers.get(DEBUG_HEADER)
+    if not token or not value:
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), token.encode("utf-8"))
+
+
+def redact_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    """인증/쿠키/토큰 헤더 값을 가린 요청 헤더"""
+    return {
+        key: "***" if key.lower() in REDACTED_HEADERS else value
+        for key, value in headers.items()
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """로그 레코드를 JSON 한 줄로 변환 (extra 필드 포함)"""
+
+    RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self.RESERVED and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """레벨/카테고리 기준 필터 - 큐에 넣기 전(요청 스레드)에서 실행"""
+
+    def __init__(self, base_level: int, sample_rates: Dict[str, float], rate_limits: Dict[str, float]):
+        super().__init__()
+        self.base_level = base_level
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        self.dropped: Dict[str, int] = {}
+        self._buckets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        debug = REQUEST_DEBUG.get()
+        if record.levelno < self.base_level and not debug:
+            return False
+
+        request_id = REQUEST_ID.get()
+        if request_id and not hasattr(record, "request_id"):
+            record.request_id = request_id
+
+        category = getattr(record, "category", None)
+        if category is None or debug:
+            return True
+
+        rate = self.sample_rates.get(category, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return self._drop(category)
+
+        limit = self.rate_limits.get(category)
+        if limit:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated_at = self._buckets.get(category, (limit, now))
+                tokens = min(limit, tokens + (now - updated_at) * limit)
+                if tokens < 1:
+                    self._buckets[category] = (tokens, now)
+                    return self._drop(category)
+                self._buckets[category] = (tokens - 1, now)
+        return True
+
+    def _drop(self, category: str) -> bool:
+        self.dropped[category] = self.dropped.get(category, 0) + 1
+        return False
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 요청을 막지 않고 레코드를 버림"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1